@@ -3,20 +3,17 @@ import { ShoppingCart } from 'lucide-react';
 import { useCart } from '../context/CartContext';
 import { Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
+import { imageUrl } from '../services/api';
 
 const ProductCard = ({ product }) => {
     const { addToCart } = useCart();
 
-    // Parse image URL from description if present (format: "Description. Image: url")
-    // Or assume a default if not found.
-    let imageUrl = "https://images.unsplash.com/photo-1555529733-4917a94b581b?auto=format&fit=crop&q=80&w=600";
-    let description = product.description || "";
-
-    if (description.includes("Image: ")) {
-        const parts = description.split("Image: ");
-        description = parts[0];
-        imageUrl = parts[1].trim();
-    }
+    // First product image (fetched with ?expand=images), or a default
+    const image = product.images?.[0];
+    const imageSrc = image
+        ? imageUrl(image, 'medium')
+        : "https://images.unsplash.com/photo-1555529733-4917a94b581b?auto=format&fit=crop&q=80&w=600";
+    const description = product.description || "";
 
     return (
         <motion.div
@@ -27,7 +24,7 @@ const ProductCard = ({ product }) => {
         >
             <Link to={`/products/${product.product_id}`} className="relative overflow-hidden aspect-[4/5] block bg-gray-100">
                 <img
-                    src={imageUrl}
+                    src={imageSrc}
                     alt={product.name}
                     className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-105"
                 />
@@ -19,21 +19,8 @@ export const AuthProvider = ({ children }) => {
 
     const login = async (email, password) => {
         try {
-            // In a real app, you'd hit a /login endpoint. 
-            // Based on available routes, we might need to query users/verify or similar.
-            // But looking at server/app.py, there is no specific login route, just Users GET/POST.
-            // We will simulate login by fetching all users and matching credentials (NOT SECURE, but matches backend provided).
-            // Ideally we should add a login endpoint.
-
-            // Let's rely on finding the user by email for now or creating a session.
-            // Since I can't easily change the backend logic to add Auth without asking, 
-            // I will assume we can filter by email effectively or fetch all.
-            // Actually, Users GET supports 'role', but not email filter.
-            // Fetching all users to find one is inefficient but necessary given the backend.
-
-            const response = await api.get('/users');
-            const users = response.data;
-            const foundUser = users.find(u => u.email === email && u.password === password);
+            const response = await api.post('/login', { email, password });
+            const foundUser = response.data;
 
             if (foundUser) {
                 setUser(foundUser);
@@ -43,6 +30,9 @@ export const AuthProvider = ({ children }) => {
                 return { success: false, error: 'Invalid credentials' };
             }
         } catch (error) {
+            if (error.response?.status === 401) {
+                return { success: false, error: 'Invalid credentials' };
+            }
             console.error("Login error", error);
             return { success: false, error: error.message };
         }
@@ -19,17 +19,12 @@ const Cart = () => {
 
         setCheckingOut(true);
         try {
-            // Need to get customer_id first. In a real app we'd have this in user context context properly.
-            // For now, let's look up the customer record for this user if possible, or just fail gracefully if not found.
-            // But wait, the seeds assign customers to users. 
-            // We need to fetch customer info.
-
-            // Let's assume we can POST to /orders with a dummy customer_id if we don't have it, 
-            // OR we try to find the customer associated with this user.
-            // The backend doesn't expose a "get customer by user id" easily aside from /customers.
-            // I'll fetch customers and find the match.
-            const customersRes = await api.get('/customers');
-            const customer = customersRes.data.find(c => c.user_id === user.user_id);
+            const customer = await api.get(`/users/${user.user_id}/customer`)
+                .then(res => res.data)
+                .catch(error => {
+                    if (error.response?.status === 404) return null;
+                    throw error;
+                });
 
             if (!customer) {
                 alert("You need to upgrade to a customer account to purchase.");
@@ -38,27 +33,16 @@ const Cart = () => {
                 return;
             }
 
-            const orderData = {
+            // One request creates the order and all of its items; the server
+            // prices each line and computes the total.
+            await api.post('/checkout', {
                 customer_id: customer.customer_id,
-                total_amount: total,
                 order_type: "retail", // default
-                order_status: "pending",
-                payment_status: "unpaid",
-                delivery_status: "not_shipped"
-            };
-
-            const orderRes = await api.post('/orders', orderData);
-            const orderId = orderRes.data.order_id;
-
-            // Create order items
-            for (const item of cartItems) {
-                await api.post('/order_items', {
-                    order_id: orderId,
+                items: cartItems.map(item => ({
                     product_id: item.product_id,
-                    quantity: item.quantity,
-                    unit_price: item.price
-                });
-            }
+                    quantity: item.quantity
+                }))
+            });
 
             clearCart();
             alert("Order placed successfully!");
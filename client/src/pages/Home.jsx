@@ -20,7 +20,7 @@ const Home = () => {
                 setError(null);
 
                 const [productsRes, businessesRes] = await Promise.all([
-                    api.get('/products'),
+                    api.get('/products?expand=images'),
                     api.get('/businesses')
                 ]);
 
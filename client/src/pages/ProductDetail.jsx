@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import api from '../services/api';
+import api, { imageUrl } from '../services/api';
 import { useCart } from '../context/CartContext';
 import { ShoppingCart, ArrowLeft, Truck, ShieldCheck, Star } from 'lucide-react';
 
@@ -14,7 +14,7 @@ const ProductDetail = () => {
     useEffect(() => {
         const fetchProduct = async () => {
             try {
-                const response = await api.get(`/products/${id}`);
+                const response = await api.get(`/products/${id}?expand=images`);
                 setProduct(response.data);
             } catch (error) {
                 console.error("Error fetching product:", error);
@@ -28,14 +28,11 @@ const ProductDetail = () => {
     if (loading) return <div className="text-center py-20">Loading...</div>;
     if (!product) return <div className="text-center py-20">Product not found</div>;
 
-    // Parse image
-    let imageUrl = "https://images.unsplash.com/photo-1555529733-4917a94b581b?auto=format&fit=crop&q=80&w=1000";
-    let description = product.description || "";
-    if (description.includes("Image: ")) {
-        const parts = description.split("Image: ");
-        description = parts[0];
-        imageUrl = parts[1].trim();
-    }
+    const image = product.images?.[0];
+    const imageSrc = image
+        ? imageUrl(image)
+        : "https://images.unsplash.com/photo-1555529733-4917a94b581b?auto=format&fit=crop&q=80&w=1000";
+    const description = product.description || "";
 
     return (
         <div className="max-w-6xl mx-auto">
@@ -46,7 +43,7 @@ const ProductDetail = () => {
             <div className="grid grid-cols-1 md:grid-cols-2 gap-12 bg-white p-8 rounded-2xl shadow-sm border border-[var(--border)]">
                 {/* Image Side */}
                 <div className="aspect-square bg-gray-100 rounded-xl overflow-hidden">
-                    <img src={imageUrl} alt={product.name} className="w-full h-full object-cover" />
+                    <img src={imageSrc} alt={product.name} className="w-full h-full object-cover" />
                 </div>
 
                 {/* Info Side */}
@@ -12,14 +12,15 @@ const Shop = () => {
     const businessId = searchParams.get('business_id');
 
     const [searchTerm, setSearchTerm] = useState("");
+    const [searchResults, setSearchResults] = useState(null);
     const [priceRange, setPriceRange] = useState(10000);
 
     useEffect(() => {
         const fetchProducts = async () => {
             try {
-                let url = '/products';
+                let url = '/products?expand=images';
                 if (businessId) {
-                    url += `?business_id=${businessId}`;
+                    url += `&business_id=${businessId}`;
                 }
                 const response = await api.get(url);
                 setProducts(response.data);
@@ -33,19 +34,37 @@ const Shop = () => {
         fetchProducts();
     }, [businessId]);
 
+    // Search runs on the server (ranked full-text search); debounce typing
     useEffect(() => {
-        let result = products;
-
-        // Filter by search
-        if (searchTerm) {
-            result = result.filter(p => p.name.toLowerCase().includes(searchTerm.toLowerCase()));
+        if (!searchTerm.trim()) {
+            setSearchResults(null);
+            return;
         }
 
+        const timer = setTimeout(async () => {
+            try {
+                const params = new URLSearchParams({ q: searchTerm, max_price: priceRange, expand: 'images' });
+                if (businessId) {
+                    params.set('business_id', businessId);
+                }
+                const response = await api.get(`/products/search?${params}`);
+                setSearchResults(response.data);
+            } catch (error) {
+                console.error("Error searching products:", error);
+            }
+        }, 250);
+
+        return () => clearTimeout(timer);
+    }, [searchTerm, priceRange, businessId]);
+
+    useEffect(() => {
+        let result = searchResults ?? products;
+
         // Filter by price
         result = result.filter(p => p.price <= priceRange);
 
         setFilteredProducts(result);
-    }, [searchTerm, priceRange, products]);
+    }, [searchResults, priceRange, products]);
 
     if (loading) {
         return (
@@ -1,7 +1,6 @@
 import { useState } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
 
 const Signup = () => {
     const [formData, setFormData] = useState({
@@ -29,21 +28,7 @@ const Signup = () => {
         const result = await signup(dataToSubmit);
 
         if (result.success) {
-            // Also create a customer record for them automatically if they are a customer
-            try {
-                const userRes = await api.get('/users');
-                // This is race condition prone and bad practice but limited by API. 
-                // Assuming the user is the one just created (or we get user from signup result).
-                // Ideally signup returns the user.
-
-                // Actually AuthContext signup fetches current user.
-                // We need the ID.
-                // Let's rely on login.
-                navigate('/');
-            } catch (err) {
-                console.error("Post-signup setup failed", err);
-                navigate('/');
-            }
+            navigate('/');
         } else {
             setError(result.error);
         }
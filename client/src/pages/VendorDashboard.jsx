@@ -1,12 +1,13 @@
 import { useState, useEffect } from 'react';
 import api from '../services/api';
 import { useAuth } from '../context/AuthContext';
-import { Plus, Package } from 'lucide-react';
+import { Plus, Package, TrendingUp, ShoppingBag, AlertTriangle } from 'lucide-react';
 
 const VendorDashboard = () => {
     const { user } = useAuth();
     const [products, setProducts] = useState([]);
     const [business, setBusiness] = useState(null);
+    const [summary, setSummary] = useState(null);
     const [loading, setLoading] = useState(true);
 
     // Form state for new product
@@ -17,22 +18,28 @@ const VendorDashboard = () => {
         price: '',
         stock_quantity: '',
         category_id: 1, // Default
-        image_url: '' // Will append to description
+        image_url: '' // Linked as the product's first image
     });
 
     useEffect(() => {
         const fetchVendorData = async () => {
             try {
-                // Find vendor's business first (assuming one business per vendor)
-                // This is tricky because the backend Business model links to user_id.
-                // We'll fetch all businesses and find match.
-                const businessesRes = await api.get('/businesses');
-                const myBusiness = businessesRes.data.find(b => b.user_id === user.user_id);
+                // Find vendor's business first (one business per vendor)
+                const myBusiness = await api.get(`/users/${user.user_id}/business`)
+                    .then(res => res.data)
+                    .catch(error => {
+                        if (error.response?.status === 404) return null;
+                        throw error;
+                    });
 
                 if (myBusiness) {
                     setBusiness(myBusiness);
-                    const productsRes = await api.get(`/products?business_id=${myBusiness.vendor_id}`);
+                    const [productsRes, dashboardRes] = await Promise.all([
+                        api.get(`/products?business_id=${myBusiness.vendor_id}`),
+                        api.get(`/businesses/${myBusiness.vendor_id}/dashboard`)
+                    ]);
                     setProducts(productsRes.data);
+                    setSummary(dashboardRes.data);
                 }
             } catch (error) {
                 console.error("Error fetching vendor data:", error);
@@ -48,15 +55,18 @@ const VendorDashboard = () => {
         if (!business) return;
 
         try {
+            const { image_url, ...fields } = newProduct;
             const productData = {
-                ...newProduct,
+                ...fields,
                 price: parseFloat(newProduct.price),
                 stock_quantity: parseInt(newProduct.stock_quantity),
-                business_id: business.vendor_id,
-                description: `${newProduct.description}${newProduct.image_url ? ` Image: ${newProduct.image_url}` : ''}`
+                business_id: business.vendor_id
             };
 
             const res = await api.post('/products', productData);
+            if (image_url) {
+                await api.post(`/products/${res.data.product_id}/images`, { url: image_url });
+            }
             setProducts([...products, res.data]);
             setShowAddModal(false);
             setNewProduct({ name: '', description: '', price: '', stock_quantity: '', category_id: 1, image_url: '' });
@@ -92,6 +102,36 @@ const VendorDashboard = () => {
                 </button>
             </div>
 
+            {summary && (
+                <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-8">
+                    <div className="bg-white rounded-lg border border-[var(--border)] p-5">
+                        <div className="flex items-center gap-2 text-[var(--text-muted)] mb-2">
+                            <TrendingUp className="w-4 h-4" /> Revenue (last 7 days)
+                        </div>
+                        <p className="text-2xl font-bold">
+                            KES {summary.revenue_by_day.slice(-7).reduce((total, day) => total + Number(day.revenue), 0).toLocaleString()}
+                        </p>
+                        <p className="text-sm text-[var(--text-muted)]">KES {Number(summary.sales.total_revenue).toLocaleString()} all time</p>
+                    </div>
+                    <div className="bg-white rounded-lg border border-[var(--border)] p-5">
+                        <div className="flex items-center gap-2 text-[var(--text-muted)] mb-2">
+                            <ShoppingBag className="w-4 h-4" /> Open Orders
+                        </div>
+                        <p className="text-2xl font-bold">{summary.open_order_count}</p>
+                        <p className="text-sm text-[var(--text-muted)]">{summary.sales.order_count} orders in total</p>
+                    </div>
+                    <div className="bg-white rounded-lg border border-[var(--border)] p-5">
+                        <div className="flex items-center gap-2 text-[var(--text-muted)] mb-2">
+                            <AlertTriangle className="w-4 h-4" /> Low Stock
+                        </div>
+                        <p className="text-2xl font-bold">{summary.products.low_stock_count}</p>
+                        <p className="text-sm text-[var(--text-muted)]">
+                            {summary.products.low_stock.slice(0, 3).map(product => product.name).join(', ') || 'All products in stock'}
+                        </p>
+                    </div>
+                </div>
+            )}
+
             <div className="bg-white rounded-lg border border-[var(--border)] overflow-hidden">
                 <table className="w-full text-left">
                     <thead className="bg-gray-50 border-b border-[var(--border)]">
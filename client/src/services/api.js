@@ -20,4 +20,13 @@ api.interceptors.request.use(
     (error) => Promise.reject(error)
 );
 
+// Uploaded images are served by content hash (optionally as a resized
+// "thumb" or "medium" copy); linked images keep their own URL.
+export const imageUrl = (image, size) => {
+    if (image.sha256) {
+        return `${api.defaults.baseURL}/images/${image.sha256}${size ? `/${size}` : ''}`;
+    }
+    return image.source_url;
+};
+
 export default api;
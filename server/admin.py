@@ -0,0 +1,35 @@
+# server/admin.py
+
+import hmac
+from functools import wraps
+
+from flask import current_app, request, make_response
+
+
+def admin_denied():
+    """The 403 response for a request without the configured
+    ``ADMIN_TOKEN``, or ``None`` when it may see admin data.
+
+    The token goes in the ``X-Admin-Token`` header. Without a configured
+    token admin access is closed, except under ``TESTING``.
+    """
+    token = current_app.config.get("ADMIN_TOKEN")
+    if token is None:
+        if not current_app.testing:
+            return make_response({"error": "Admin endpoints are disabled"}, 403)
+    elif not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), token.encode()):
+        return make_response({"error": "Admin token required"}, 403)
+    return None
+
+
+def admin_required(fn):
+    """Only let through requests that pass :func:`admin_denied`."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        denied = admin_denied()
+        if denied is not None:
+            return denied
+        return fn(*args, **kwargs)
+
+    return wrapper
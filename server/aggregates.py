@@ -0,0 +1,377 @@
+# server/aggregates.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, inspect, select, func, delete, update, case, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, Order, OrderItem, Product, Business, ProductSales, BusinessSales
+from caching import bump_versions
+from jobs import task, enqueue
+from analytics import apply_rollups, order_details
+
+REVENUE_TOLERANCE = Decimal("0.01")
+
+product_sales = ProductSales.__table__
+business_sales = BusinessSales.__table__
+
+
+def sale_line(order_id, product_id, quantity, unit_price, sign=1):
+    return {
+        "order_id": order_id,
+        "product_id": product_id,
+        "quantity": quantity,
+        "unit_price": Decimal(str(unit_price)),
+        "sign": sign,
+    }
+
+
+# ============================================
+# Incremental maintenance
+# ============================================
+def _upsert(connection, table, key, rows):
+    dialects = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+    stmt = dialects[connection.dialect.name](table)
+    excluded = stmt.excluded
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={
+            "units_sold": table.c.units_sold + excluded.units_sold,
+            "revenue": table.c.revenue + excluded.revenue,
+            "order_count": table.c.order_count + excluded.order_count,
+            "last_sale_at": case(
+                (and_(excluded.last_sale_at.is_not(None),
+                      or_(table.c.last_sale_at.is_(None), excluded.last_sale_at > table.c.last_sale_at)),
+                 excluded.last_sale_at),
+                else_=table.c.last_sale_at,
+            ),
+        },
+    )
+    connection.execute(stmt, rows)
+
+
+def _order_transitions(connection, line_deltas, group_column, join_products):
+    # line_deltas maps (order_id, group_id) to the net number of order item
+    # rows added for that pair; comparing with the post-write row count tells
+    # whether the order started (+1) or stopped (-1) containing the
+    # product/business
+    order_ids = {order_id for order_id, _ in line_deltas}
+    query = select(OrderItem.order_id, group_column, func.count()).where(OrderItem.order_id.in_(order_ids))
+    if join_products:
+        query = query.join(Product, Product.product_id == OrderItem.product_id)
+    query = query.group_by(OrderItem.order_id, group_column)
+    counts = {(order_id, group_id): count for order_id, group_id, count in connection.execute(query)}
+
+    return {pair: (counts.get(pair, 0) > 0) - (counts.get(pair, 0) - added > 0)
+            for pair, added in line_deltas.items()}
+
+
+def _order_counts(transitions):
+    deltas = defaultdict(int)
+    for (_, key), change in transitions.items():
+        deltas[key] += change
+    return deltas
+
+
+def apply_sales(connection, lines, business_ids=None, skip_products=(), skip_businesses=(), session=None,
+                orders=None):
+    """Fold order item changes into ``product_sales``, ``business_sales``
+    and the sales rollups.
+
+    Runs on ``connection`` so the aggregates commit or roll back together
+    with the order items themselves.  ``lines`` are :func:`sale_line` dicts
+    with ``sign`` -1 for removed rows and +1 for added rows.  ``orders``
+    supplies ``(order_date, customer_type)`` for orders that may already be
+    gone.  Given a ``session``, the ``last_sale_at`` of keys that lost rows
+    is refreshed by a background job instead of inside the write.
+    """
+    if not lines:
+        return
+
+    product_ids = {line["product_id"] for line in lines}
+    business_ids = dict(business_ids or {})
+    business_ids.update(connection.execute(
+        select(Product.product_id, Product.business_id).where(Product.product_id.in_(product_ids))
+    ).all())
+
+    orders = dict(orders or {})
+    orders.update(order_details(connection, {line["order_id"] for line in lines} - set(orders)))
+
+    totals = {"product": {}, "business": {}}
+    product_lines = defaultdict(int)
+    business_lines = defaultdict(int)
+
+    for line in lines:
+        product_id = line["product_id"]
+        business_id = business_ids.get(product_id)
+        sign = line["sign"]
+        sold_at = orders.get(line["order_id"], (None, None))[0] if sign > 0 else None
+
+        for kind, key in (("product", product_id), ("business", business_id)):
+            if key is None:
+                continue
+            entry = totals[kind].setdefault(key, {"units_sold": 0, "revenue": Decimal("0"), "last_sale_at": None})
+            entry["units_sold"] += sign * line["quantity"]
+            entry["revenue"] += sign * line["quantity"] * line["unit_price"]
+            if sold_at is not None and (entry["last_sale_at"] is None or sold_at > entry["last_sale_at"]):
+                entry["last_sale_at"] = sold_at
+
+        product_lines[(line["order_id"], product_id)] += sign
+        if business_id is not None:
+            business_lines[(line["order_id"], business_id)] += sign
+
+    # only rows that were taken away (not an update's remove-and-add) can
+    # take the latest sale with them
+    removed = {
+        "product": {key for (_, key), added in product_lines.items() if added < 0},
+        "business": {key for (_, key), added in business_lines.items() if added < 0},
+    }
+
+    product_transitions = _order_transitions(connection, product_lines, OrderItem.product_id, False)
+    business_transitions = _order_transitions(connection, business_lines, Product.business_id, True)
+    product_orders = _order_counts(product_transitions)
+    business_orders = _order_counts(business_transitions)
+
+    product_rows = [
+        dict(entry, product_id=product_id, business_id=business_ids[product_id],
+             order_count=product_orders[product_id])
+        for product_id, entry in totals["product"].items()
+        if product_id not in skip_products
+    ]
+    business_rows = [
+        dict(entry, business_id=business_id, order_count=business_orders[business_id])
+        for business_id, entry in totals["business"].items()
+        if business_id not in skip_businesses
+    ]
+
+    if product_rows:
+        _upsert(connection, product_sales, "product_id", product_rows)
+    if business_rows:
+        _upsert(connection, business_sales, "business_id", business_rows)
+    # sales of deleted products leave the rollups too, so nothing is skipped
+    apply_rollups(connection, lines, business_ids, orders, product_transitions, business_transitions)
+
+    product_ids = removed["product"] - set(skip_products)
+    business_ids = removed["business"] - set(skip_businesses)
+    if session is None:
+        _refresh_last_sale(connection, product_ids, business_ids)
+    elif product_ids or business_ids:
+        enqueue(session, "refresh_last_sale",
+                {"product_ids": sorted(product_ids), "business_ids": sorted(business_ids)})
+
+
+def _refresh_last_sale(connection, product_ids, business_ids):
+    # removals can take away the latest sale, which cannot be undone
+    # incrementally; re-read the max for just the affected keys
+    if product_ids:
+        latest = (
+            select(func.max(Order.order_date))
+            .join(OrderItem, OrderItem.order_id == Order.order_id)
+            .where(OrderItem.product_id == product_sales.c.product_id)
+            .scalar_subquery()
+        )
+        connection.execute(
+            update(product_sales).where(product_sales.c.product_id.in_(product_ids)).values(last_sale_at=latest)
+        )
+    if business_ids:
+        latest = (
+            select(func.max(Order.order_date))
+            .join(OrderItem, OrderItem.order_id == Order.order_id)
+            .join(Product, Product.product_id == OrderItem.product_id)
+            .where(Product.business_id == business_sales.c.business_id)
+            .scalar_subquery()
+        )
+        connection.execute(
+            update(business_sales).where(business_sales.c.business_id.in_(business_ids)).values(last_sale_at=latest)
+        )
+
+
+@task("refresh_last_sale")
+def refresh_last_sale(product_ids=(), business_ids=()):
+    _refresh_last_sale(db.session.connection(), product_ids, business_ids)
+    bump_versions(db.session, [product_sales.name, business_sales.name])
+
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return state.attrs[attr].loaded_value
+
+
+def _new_value(state, attr):
+    history = state.attrs[attr].history
+    if history.added:
+        return history.added[0]
+    return state.attrs[attr].value
+
+
+SALE_ATTRS = ("order_id", "product_id", "quantity", "unit_price")
+
+
+@event.listens_for(Session, "before_flush")
+def _drop_deleted_aggregates(session, flush_context, instances):
+    products = {obj.product_id: obj.business_id for obj in session.deleted if isinstance(obj, Product)}
+    businesses = {obj.vendor_id for obj in session.deleted if isinstance(obj, Business)}
+    if not products and not businesses:
+        return
+
+    session.info["sales_deleted_products"] = products
+    session.info["sales_deleted_businesses"] = businesses
+
+    # delete before the parent rows go so the foreign keys stay valid
+    connection = session.connection()
+    connection.execute(delete(product_sales).where(or_(
+        product_sales.c.product_id.in_(products),
+        product_sales.c.business_id.in_(businesses),
+    )))
+    if businesses:
+        connection.execute(delete(business_sales).where(business_sales.c.business_id.in_(businesses)))
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_sales(session, flush_context):
+    lines = []
+
+    for obj in session.new:
+        if isinstance(obj, OrderItem):
+            lines.append(sale_line(obj.order_id, obj.product_id, obj.quantity, obj.unit_price))
+
+    for obj in session.deleted:
+        if isinstance(obj, OrderItem):
+            state = inspect(obj)
+            lines.append(sale_line(*(_old_value(state, attr) for attr in SALE_ATTRS), sign=-1))
+
+    for obj in session.dirty:
+        if isinstance(obj, OrderItem) and session.is_modified(obj, include_collections=False):
+            state = inspect(obj)
+            old = [_old_value(state, attr) for attr in SALE_ATTRS]
+            new = [_new_value(state, attr) for attr in SALE_ATTRS]
+            if old != new:
+                lines.append(sale_line(*old, sign=-1))
+                lines.append(sale_line(*new))
+
+    deleted_products = session.info.pop("sales_deleted_products", {})
+    deleted_businesses = session.info.pop("sales_deleted_businesses", set())
+
+    apply_sales(
+        session.connection(), lines,
+        business_ids=deleted_products,
+        skip_products=set(deleted_products),
+        skip_businesses=deleted_businesses,
+        session=session,
+        orders=session.info.pop("sale_orders", None),
+    )
+
+
+# ============================================
+# Rebuild and consistency check
+# ============================================
+def _product_totals():
+    return (
+        select(
+            Product.product_id,
+            Product.business_id,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * OrderItem.unit_price),
+            func.count(func.distinct(OrderItem.order_id)),
+            func.max(Order.order_date),
+        )
+        .select_from(OrderItem)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .group_by(Product.product_id, Product.business_id)
+    )
+
+
+def _business_totals():
+    return (
+        select(
+            Product.business_id,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * OrderItem.unit_price),
+            func.count(func.distinct(OrderItem.order_id)),
+            func.max(Order.order_date),
+        )
+        .select_from(OrderItem)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .group_by(Product.business_id)
+    )
+
+
+AGGREGATE_COLUMNS = ("units_sold", "revenue", "order_count", "last_sale_at")
+
+
+def rebuild(connection):
+    connection.execute(delete(product_sales))
+    connection.execute(delete(business_sales))
+    connection.execute(product_sales.insert().from_select(
+        ("product_id", "business_id") + AGGREGATE_COLUMNS, _product_totals()
+    ))
+    connection.execute(business_sales.insert().from_select(
+        ("business_id",) + AGGREGATE_COLUMNS, _business_totals()
+    ))
+
+
+def _differences(kind, expected, actual):
+    problems = []
+    empty = (0, Decimal("0"), 0, None)
+    for key in sorted(set(expected) | set(actual)):
+        want = expected.get(key, empty)
+        have = actual.get(key, empty)
+        for column, wanted, had in zip(AGGREGATE_COLUMNS, want, have):
+            if column == "revenue":
+                mismatch = abs(Decimal(str(wanted or 0)) - Decimal(str(had or 0))) > REVENUE_TOLERANCE
+            else:
+                mismatch = (wanted or 0) != (had or 0)
+            if mismatch:
+                problems.append(f"{kind} {key}: {column} is {had}, expected {wanted}")
+    return problems
+
+
+def check(connection):
+    """Return a list of differences between the aggregates and order_items."""
+    expected_products = {row[0]: tuple(row[2:]) for row in connection.execute(_product_totals())}
+    actual_products = {
+        row[0]: tuple(row[1:]) for row in connection.execute(
+            select(product_sales.c.product_id, *(product_sales.c[c] for c in AGGREGATE_COLUMNS))
+        )
+    }
+    expected_businesses = {row[0]: tuple(row[1:]) for row in connection.execute(_business_totals())}
+    actual_businesses = {
+        row[0]: tuple(row[1:]) for row in connection.execute(
+            select(business_sales.c.business_id, *(business_sales.c[c] for c in AGGREGATE_COLUMNS))
+        )
+    }
+    return (_differences("product", expected_products, actual_products)
+            + _differences("business", expected_businesses, actual_businesses))
+
+
+sales_cli = AppGroup("sales", help="Maintain the materialized sales aggregates.")
+
+
+@sales_cli.command("rebuild")
+def rebuild_command():
+    """Recompute product_sales and business_sales from order_items."""
+    rebuild(db.session.connection())
+    db.session.commit()
+    click.echo("Sales aggregates rebuilt.")
+
+
+@sales_cli.command("check")
+def check_command():
+    """Compare the aggregates against order_items."""
+    problems = check(db.session.connection())
+    for problem in problems:
+        click.echo(problem)
+    if problems:
+        raise SystemExit(1)
+    click.echo("Sales aggregates are consistent.")
@@ -0,0 +1,418 @@
+# server/analytics.py
+
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, inspect, select, delete, insert, func, cast, or_, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, Order, OrderItem, Product, Customer, SalesRollup
+from caching import bump_versions, current_versions
+
+HOUR = "hour"
+DAY = "day"
+GRANULARITIES = (HOUR, DAY)
+
+TOTAL = "total"
+BUSINESS = "business"
+PRODUCT = "product"
+CUSTOMER_TYPE = "customer_type"
+DIMENSIONS = (TOTAL, BUSINESS, PRODUCT, CUSTOMER_TYPE)
+
+# table_versions entry bumped by every full rebuild; until the first one
+# the rollups do not cover history and reports scan the order tables
+ROLLUPS_BUILT = "sales_rollups_built"
+
+STEP = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+DEFAULT_RANGE = {HOUR: timedelta(hours=48), DAY: timedelta(days=30)}
+MAX_RANGE = {HOUR: timedelta(days=31), DAY: timedelta(days=731)}
+SCAN_BATCH = 10000
+INSERT_BATCH = 5000
+CENTS = Decimal("0.01")
+
+rollups = SalesRollup.__table__
+
+
+class AnalyticsError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def bucket_start(moment, granularity):
+    if granularity == HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _line_keys(dimensions, product_id, business_id, customer_type):
+    # (dimension, key, owning business) of every rollup an order item counts in
+    for dimension in dimensions:
+        if dimension == TOTAL:
+            yield TOTAL, "", None
+        elif dimension == BUSINESS and business_id is not None:
+            yield BUSINESS, str(business_id), business_id
+        elif dimension == PRODUCT:
+            yield PRODUCT, str(product_id), business_id
+        elif dimension == CUSTOMER_TYPE and customer_type is not None:
+            yield CUSTOMER_TYPE, customer_type, None
+
+
+def order_details(connection, order_ids):
+    """Return ``{order_id: (order_date, customer_type)}``."""
+    if not order_ids:
+        return {}
+    return {order_id: (order_date, customer_type) for order_id, order_date, customer_type in connection.execute(
+        select(Order.order_id, Order.order_date, Customer.customer_type)
+        .join(Customer, Customer.customer_id == Order.customer_id)
+        .where(Order.order_id.in_(order_ids))
+    )}
+
+
+# ============================================
+# Incremental maintenance
+# ============================================
+@event.listens_for(Session, "before_flush")
+def _remember_removed_orders(session, flush_context, instances):
+    # a removed item's order may be deleted in the same flush; read its date
+    # and customer type while the rows are still there
+    order_ids = {obj.order_id for obj in session.deleted if isinstance(obj, OrderItem) and obj.order_id}
+    if order_ids:
+        session.info.setdefault("sale_orders", {}).update(order_details(session.connection(), order_ids))
+
+    for obj in session.dirty:
+        if isinstance(obj, Customer):
+            history = inspect(obj).attrs.customer_type.history
+            if history.deleted and history.added and history.deleted[0] != history.added[0]:
+                session.info.setdefault("sale_customers", {}).setdefault(obj.customer_id, history.deleted[0])
+
+
+@event.listens_for(Session, "after_flush")
+def _move_customer_sales(session, flush_context):
+    for customer_id, old_type in session.info.pop("sale_customers", {}).items():
+        move_customer(session.connection(), customer_id, old_type)
+
+
+def _upsert(connection, rows):
+    dialects = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+    stmt = dialects[connection.dialect.name](rollups)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["granularity", "dimension", "key", "bucket"],
+        set_={
+            "orders": rollups.c.orders + excluded.orders,
+            "units_sold": rollups.c.units_sold + excluded.units_sold,
+            "revenue": rollups.c.revenue + excluded.revenue,
+        },
+    )
+    connection.execute(stmt, rows)
+
+
+def apply_rollups(connection, lines, business_ids, orders, product_transitions, business_transitions):
+    """Fold order item changes into the hourly and daily rollups.
+
+    Called by :func:`aggregates.apply_sales` in the same transaction.
+    ``orders`` maps order ids to ``(order_date, customer_type)``; the
+    transitions map ``(order_id, product_id)`` / ``(order_id, business_id)``
+    to +1 when the order started containing the key and -1 when it stopped.
+    """
+    order_lines = defaultdict(int)
+    for line in lines:
+        order_lines[line["order_id"]] += line["sign"]
+    counts = dict(connection.execute(
+        select(OrderItem.order_id, func.count()).where(OrderItem.order_id.in_(order_lines))
+        .group_by(OrderItem.order_id)
+    ).all())
+
+    deltas = {}
+
+    def add(order_id, dimension, key, business_id, order_count, units, revenue):
+        order_date = orders.get(order_id, (None, None))[0]
+        if order_date is None:
+            return
+        for granularity in GRANULARITIES:
+            entry = deltas.setdefault((granularity, dimension, key, bucket_start(order_date, granularity)),
+                                      [business_id, 0, 0, Decimal(0)])
+            entry[1] += order_count
+            entry[2] += units
+            entry[3] += revenue
+
+    for line in lines:
+        customer_type = orders.get(line["order_id"], (None, None))[1]
+        units = line["sign"] * line["quantity"]
+        revenue = line["sign"] * line["quantity"] * line["unit_price"]
+        for dimension, key, owner in _line_keys(DIMENSIONS, line["product_id"],
+                                                business_ids.get(line["product_id"]), customer_type):
+            add(line["order_id"], dimension, key, owner, 0, units, revenue)
+
+    for (order_id, product_id), change in product_transitions.items():
+        if change:
+            add(order_id, PRODUCT, str(product_id), business_ids.get(product_id), change, 0, 0)
+    for (order_id, business_id), change in business_transitions.items():
+        if change:
+            add(order_id, BUSINESS, str(business_id), business_id, change, 0, 0)
+    for order_id, added in order_lines.items():
+        now = counts.get(order_id, 0)
+        change = (now > 0) - (now - added > 0)
+        if change:
+            add(order_id, TOTAL, "", None, change, 0, 0)
+            customer_type = orders.get(order_id, (None, None))[1]
+            if customer_type is not None:
+                add(order_id, CUSTOMER_TYPE, customer_type, None, change, 0, 0)
+
+    rows = [
+        {"granularity": granularity, "dimension": dimension, "key": key, "bucket": bucket,
+         "business_id": business_id, "orders": order_count, "units_sold": units, "revenue": revenue}
+        for (granularity, dimension, key, bucket), (business_id, order_count, units, revenue) in deltas.items()
+        if order_count or units or revenue
+    ]
+    if rows:
+        _upsert(connection, rows)
+
+
+def move_customer(connection, customer_id, old_type):
+    """Move a customer's past sales from ``old_type`` to their current type."""
+    rows = []
+    for row in scan(connection, dimensions=[CUSTOMER_TYPE], customer_id=customer_id).rows():
+        if row["key"] == old_type:
+            continue
+        rows.append(row)
+        rows.append(dict(row, key=old_type, orders=-row["orders"], units_sold=-row["units_sold"],
+                         revenue=-row["revenue"]))
+    if rows:
+        _upsert(connection, rows)
+
+
+# ============================================
+# Scanning the order tables
+# ============================================
+class Rollup:
+    """Sums per (granularity, dimension, key, bucket), kept in flat typed
+    arrays (revenue in cents) so a scan over years of orders stays small."""
+
+    def __init__(self):
+        self.slots = {}
+        self.owners = []
+        self.orders = array("q")
+        self.units = array("q")
+        self.cents = array("q")
+
+    def slot(self, group, business_id):
+        index = self.slots.get(group)
+        if index is None:
+            index = self.slots[group] = len(self.orders)
+            self.owners.append(business_id)
+            self.orders.append(0)
+            self.units.append(0)
+            self.cents.append(0)
+        return index
+
+    def rows(self):
+        for (granularity, dimension, key, bucket), index in self.slots.items():
+            yield {"granularity": granularity, "dimension": dimension, "key": key, "bucket": bucket,
+                   "business_id": self.owners[index], "orders": self.orders[index],
+                   "units_sold": self.units[index], "revenue": (Decimal(self.cents[index]) * CENTS)}
+
+
+def scan(connection, granularities=GRANULARITIES, dimensions=DIMENSIONS, start=None, end=None,
+         business_id=None, product_id=None, customer_type=None, customer_id=None):
+    """Aggregate order items straight from the order tables into a :class:`Rollup`.
+
+    Rows are streamed in order id order, so each order's distinct keys are
+    counted once without remembering every order seen.
+    """
+    query = (
+        select(OrderItem.order_id, Order.order_date, Customer.customer_type, OrderItem.product_id,
+               Product.business_id, OrderItem.quantity,
+               cast(func.round(OrderItem.quantity * OrderItem.unit_price * 100), Integer))
+        .select_from(OrderItem)
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .join(Customer, Customer.customer_id == Order.customer_id)
+        .order_by(OrderItem.order_id)
+    )
+    if start is not None:
+        query = query.where(Order.order_date >= start)
+    if end is not None:
+        query = query.where(Order.order_date < end)
+    if business_id is not None:
+        query = query.where(Product.business_id == business_id)
+    if product_id is not None:
+        query = query.where(OrderItem.product_id == product_id)
+    if customer_type is not None:
+        query = query.where(Customer.customer_type == customer_type)
+    if customer_id is not None:
+        query = query.where(Order.customer_id == customer_id)
+
+    rollup = Rollup()
+    current_order = None
+    counted = set()
+    for order_id, order_date, row_customer_type, row_product_id, row_business_id, quantity, cents in \
+            connection.execution_options(yield_per=SCAN_BATCH).execute(query):
+        if order_date is None:
+            continue
+        if order_id != current_order:
+            current_order = order_id
+            counted = set()
+        buckets = [(granularity, bucket_start(order_date, granularity)) for granularity in granularities]
+        for dimension, key, owner in _line_keys(dimensions, row_product_id, row_business_id, row_customer_type):
+            for granularity, bucket in buckets:
+                index = rollup.slot((granularity, dimension, key, bucket), owner)
+                if index not in counted:
+                    counted.add(index)
+                    rollup.orders[index] += 1
+                rollup.units[index] += quantity
+                rollup.cents[index] += cents or 0
+    return rollup
+
+
+def rebuild(connection):
+    """Recompute every rollup from the order tables."""
+    connection.execute(delete(rollups))
+    batch = []
+    for row in scan(connection).rows():
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            connection.execute(insert(rollups), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(rollups), batch)
+
+
+def check(connection):
+    """Return the differences between the stored rollups and a fresh scan."""
+    expected = {(row["granularity"], row["dimension"], row["key"], row["bucket"]):
+                (row["orders"], row["units_sold"], row["revenue"]) for row in scan(connection).rows()}
+    actual = {(granularity, dimension, key, bucket): (orders, units, Decimal(revenue).quantize(CENTS))
+              for granularity, dimension, key, bucket, orders, units, revenue in connection.execute(
+                  select(rollups.c.granularity, rollups.c.dimension, rollups.c.key, rollups.c.bucket,
+                         rollups.c.orders, rollups.c.units_sold, rollups.c.revenue))
+              if orders or units or revenue}
+    empty = (0, 0, Decimal("0.00"))
+    return [f"{group}: {actual.get(group, empty)} stored, {expected.get(group, empty)} expected"
+            for group in sorted(set(expected) | set(actual), key=str)
+            if actual.get(group, empty) != expected.get(group, empty)]
+
+
+# ============================================
+# Reports
+# ============================================
+def rollups_built():
+    return current_versions([ROLLUPS_BUILT])[ROLLUPS_BUILT][0] > 0
+
+
+def _moment(value, name):
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise AnalyticsError(f"{name} must be an ISO 8601 date or datetime")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def report_range(start, end, granularity, now=None):
+    """Turn the ``from``/``to`` query values into a half-open ``[start, end)``.
+
+    A date-only ``to`` includes that whole day.  Without them the report
+    covers the last ``DEFAULT_RANGE`` up to the current bucket.
+    """
+    if granularity not in GRANULARITIES:
+        raise AnalyticsError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if end:
+        end_at = _moment(end, "to")
+        if len(end) == 10:
+            end_at += timedelta(days=1)
+    else:
+        end_at = bucket_start(now or datetime.utcnow(), granularity) + STEP[granularity]
+    start_at = _moment(start, "from") if start else end_at - DEFAULT_RANGE[granularity]
+    return start_at, end_at
+
+
+def _key_value(dimension, key):
+    if dimension in (BUSINESS, PRODUCT):
+        return int(key)
+    return key if dimension == CUSTOMER_TYPE else None
+
+
+def sales_series(group_by, granularity, start, end, business_id=None, product_id=None, customer_type=None):
+    """Orders, units and revenue per ``granularity`` bucket and ``group_by`` key
+    in ``[start, end)``.
+
+    Returns ``(source, rows)``: read from the rollups once they are built
+    (cost proportional to the buckets asked for), otherwise aggregated by
+    scanning the order tables.
+    """
+    if group_by not in DIMENSIONS:
+        raise AnalyticsError(f"group_by must be one of: {', '.join(DIMENSIONS)}")
+    if granularity not in GRANULARITIES:
+        raise AnalyticsError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if business_id is not None and group_by not in (BUSINESS, PRODUCT):
+        raise AnalyticsError("business_id only applies to group_by=business or product")
+    if product_id is not None and group_by != PRODUCT:
+        raise AnalyticsError("product_id only applies to group_by=product")
+    if customer_type is not None and group_by != CUSTOMER_TYPE:
+        raise AnalyticsError("customer_type only applies to group_by=customer_type")
+    if end <= start:
+        raise AnalyticsError("from must be before to")
+    # whole buckets only, so both sources agree on partial ones
+    start = bucket_start(start, granularity)
+    if bucket_start(end, granularity) != end:
+        end = bucket_start(end, granularity) + STEP[granularity]
+    if end - start > MAX_RANGE[granularity]:
+        raise AnalyticsError(f"{granularity} reports cover at most {MAX_RANGE[granularity].days} days")
+
+    if rollups_built():
+        source = "rollups"
+        query = select(rollups.c.key, rollups.c.bucket, rollups.c.orders, rollups.c.units_sold,
+                       rollups.c.revenue).where(
+            rollups.c.granularity == granularity, rollups.c.dimension == group_by,
+            rollups.c.bucket >= start, rollups.c.bucket < end,
+            or_(rollups.c.orders != 0, rollups.c.units_sold != 0),
+        )
+        if business_id is not None:
+            query = query.where(rollups.c.business_id == business_id)
+        if product_id is not None:
+            query = query.where(rollups.c.key == str(product_id))
+        if customer_type is not None:
+            query = query.where(rollups.c.key == customer_type)
+        rows = db.session.execute(query).all()
+    else:
+        source = "scan"
+        rollup = scan(db.session.connection(), [granularity], [group_by], start, end,
+                      business_id=business_id, product_id=product_id, customer_type=customer_type)
+        rows = [(row["key"], row["bucket"], row["orders"], row["units_sold"], row["revenue"])
+                for row in rollup.rows()]
+
+    series = [{"key": _key_value(group_by, key), "bucket": bucket, "orders": orders, "units_sold": units,
+               "revenue": Decimal(revenue).quantize(CENTS)} for key, bucket, orders, units, revenue in rows]
+    series.sort(key=lambda entry: (entry["key"] is not None and entry["key"], entry["bucket"]))
+    return source, series
+
+
+analytics_cli = AppGroup("analytics", help="Maintain the sales rollups.")
+
+
+@analytics_cli.command("rebuild")
+def rebuild_command():
+    """Recompute the hourly and daily rollups from the order tables (backfill)."""
+    rebuild(db.session.connection())
+    bump_versions(db.session, [ROLLUPS_BUILT])
+    db.session.commit()
+    click.echo("Sales rollups rebuilt.")
+
+
+@analytics_cli.command("check")
+def check_command():
+    """Compare the rollups against the order tables."""
+    problems = check(db.session.connection())
+    for problem in problems:
+        click.echo(problem)
+    if problems:
+        raise SystemExit(1)
+    click.echo("Sales rollups are consistent.")
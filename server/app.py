@@ -1,24 +1,73 @@
 #!/usr/bin/env python3
 # server/app.py
 
-from flask import Flask, request, make_response, jsonify
+import hmac
+import os
+from decimal import Decimal
+from flask import Flask, Response, current_app, request, make_response, jsonify, send_file, stream_with_context
 from flask_migrate import Migrate
 from flask_restful import Api, Resource
 from flask_cors import CORS
-from models import db, User, Customer, Order, Product, Business, OrderItem
+from models import db, User, Customer, Order, Product, Business, OrderItem, ProductSales, BusinessSales, ProductImage
 from sqlalchemy.exc import IntegrityError
+from pagination import paginate, wants_stream, NDJSON_MIMETYPE
+from serializers import Serialization, serialize
+from loaders import with_loaders, loader_options, init_statement_budget
+from checkout import place_order, parse_items, refresh_total, CheckoutError
+from pricing import quote, unit_price, customer_type_for, PricingError
+from aggregates import sales_cli
+from search import search_products, DEFAULT_LIMIT as SEARCH_LIMIT, MAX_LIMIT as MAX_SEARCH_LIMIT
+from caching import conditional_get, init_response_cache
+from bulk_load import data_cli
+from inventory import (inventory_cli, reserve, release, sync_order, queue_reconcile, InsufficientStock,
+                       OrderClosed)
+from jobs import jobs_cli
+from notifications import mail, queue_order_notifications
+from order_status import record_transitions, transition_orders, TransitionError, STATUS_FIELDS
+from dashboard import vendor_dashboard, DEFAULT_LOW_STOCK
+from product_import import create_products, update_products, parse_csv, BulkProductError
+from events import (events_cli, poll_events, stream_events, check_cursor, EventsError, DEFAULT_LIMIT as EVENTS_LIMIT,
+                    MAX_LIMIT as MAX_EVENTS_LIMIT, DEFAULT_MAX_WAIT_SECONDS)
+from analytics import analytics_cli, sales_series, report_range, AnalyticsError, DAY, TOTAL
+from metrics import init_metrics, render_metrics, PROMETHEUS_MIMETYPE
+from slow_queries import init_slow_query_log, read_entries
+from admin import admin_required
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.json.compact = False
+from config import get_config
+from database import init_database
+from json_provider import init_json, output_json
+from images import (images_cli, store, remove_files, queue_thumbnails, original_path, thumbnail_path,
+                    image_sizes, ImageError, SHA256_PATTERN)
 
-CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:5173"]}})
+migrate = Migrate()
+api = Api()
+api.representation("application/json")(output_json)
 
-migrate = Migrate(app, db)
-db.init_app(app)
 
-api = Api(app)
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_object(get_config(config))
+    init_json(app)
+
+    CORS(app, resources={r"/*": {"origins": app.config["CORS_ORIGINS"]}})
+
+    init_database(app)
+    migrate.init_app(app, db)
+    init_statement_budget(app)
+    init_metrics(app)
+    init_slow_query_log(app)
+    init_response_cache(app)
+    mail.init_app(app)
+    app.cli.add_command(sales_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(inventory_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(events_cli)
+
+    api.init_app(app)
+    return app
 
 # ============================================
 # Index Route
@@ -32,20 +81,48 @@ class Index(Resource):
 
 api.add_resource(Index, '/')
 
+# ============================================
+# Metrics Route
+# ============================================
+class Metrics(Resource):
+    def get(self):
+        return Response(render_metrics(), content_type=PROMETHEUS_MIMETYPE)
+
+api.add_resource(Metrics, '/metrics')
+
+class SlowQueries(Resource):
+    @admin_required
+    def get(self):
+        path = current_app.config.get("SLOW_QUERY_LOG")
+        if not path:
+            return make_response({"error": "Slow query log is disabled"}, 404)
+
+        limit = request.args.get('limit', 100, type=int)
+        min_ms = request.args.get('min_ms', type=float)
+        endpoint = request.args.get('endpoint')
+
+        entries = read_entries(path, max(1, min(limit, 1000)), endpoint, min_ms)
+        return make_response(entries, 200)
+
+api.add_resource(SlowQueries, '/admin/slow_queries')
+
 # ============================================
 # User Routes
 # ============================================
 class Users(Resource):
     def get(self):
         role = request.args.get('role')
+        email = request.args.get('email')
+        
+        query = User.query
         
         if role:
-            users = User.query.filter_by(role=role).all()
-        else:
-            users = User.query.all()
+            query = query.filter_by(role=role)
+        if email:
+            query = query.filter_by(email=email)
         
-        response_dict_list = [user.to_dict() for user in users]
-        return make_response(response_dict_list, 200)
+        serializer = Serialization.from_request(User)
+        return paginate(with_loaders(query, serializer), User.user_id, serializer)
     
     def post(self):
         data = request.get_json()
@@ -74,18 +151,19 @@ class Users(Resource):
         db.session.add(new_user)
         db.session.commit()
         
-        return make_response(new_user.to_dict(), 201)
+        return make_response(serialize(new_user), 201)
 
 api.add_resource(Users, '/users')
 
 class UserByID(Resource):
     def get(self, id):
-        user = User.query.filter_by(user_id=id).first()
+        serializer = Serialization.from_request(User, "detail")
+        user = with_loaders(User.query, serializer).filter_by(user_id=id).first()
         
         if not user:
             return make_response({"error": "User not found"}, 404)
         
-        return make_response(user.to_dict(), 200)
+        return make_response(serializer(user), 200)
     
     def patch(self, id):
         user = User.query.filter_by(user_id=id).first()
@@ -107,7 +185,7 @@ class UserByID(Resource):
         db.session.add(user)
         db.session.commit()
         
-        return make_response(user.to_dict(), 200)
+        return make_response(serialize(user), 200)
     
     def delete(self, id):
         user = User.query.filter_by(user_id=id).first()
@@ -122,6 +200,52 @@ class UserByID(Resource):
 
 api.add_resource(UserByID, '/users/<int:id>')
 
+class UserCustomer(Resource):
+    def get(self, id):
+        serializer = Serialization.from_request(Customer, "detail")
+        customer = with_loaders(Customer.query, serializer).filter_by(user_id=id).first()
+        
+        if not customer:
+            return make_response({"error": "Customer not found"}, 404)
+        
+        return make_response(serializer(customer), 200)
+
+api.add_resource(UserCustomer, '/users/<int:id>/customer')
+
+class UserBusiness(Resource):
+    def get(self, id):
+        serializer = Serialization.from_request(Business, "detail")
+        business = with_loaders(Business.query, serializer).filter_by(user_id=id).first()
+        
+        if not business:
+            return make_response({"error": "Business not found"}, 404)
+        
+        return make_response(serializer(business), 200)
+
+api.add_resource(UserBusiness, '/users/<int:id>/business')
+
+class Login(Resource):
+    def post(self):
+        data = request.get_json()
+        
+        if not data:
+            return make_response({"error": "No data provided"}, 400)
+        
+        email = data.get('email')
+        password = data.get('password')
+        
+        if not email or not password:
+            return make_response({"error": "email and password are required"}, 400)
+        
+        user = User.query.filter_by(email=email).first()
+        
+        if not user or not hmac.compare_digest(user.password.encode(), str(password).encode()):
+            return make_response({"error": "Invalid email or password"}, 401)
+        
+        return make_response(serialize(user), 200)
+
+api.add_resource(Login, '/login')
+
 # ============================================
 # Customer Routes
 # ============================================
@@ -129,8 +253,8 @@ VALID_CUSTOMER_TYPES = ["WHOLESALER", "RETAILER"]
 
 class Customers(Resource):
     def get(self):
-        customers = Customer.query.all()
-        return make_response([customer.to_dict() for customer in customers], 200)
+        serializer = Serialization.from_request(Customer)
+        return paginate(with_loaders(Customer.query, serializer), Customer.customer_id, serializer)
     
     def post(self):
         data = request.get_json()
@@ -159,18 +283,19 @@ class Customers(Resource):
         db.session.add(new_customer)
         db.session.commit()
         
-        return make_response(new_customer.to_dict(), 201)
+        return make_response(serialize(new_customer), 201)
 
 api.add_resource(Customers, '/customers')
 
 class CustomerById(Resource):
     def get(self, id):
-        customer = Customer.query.filter_by(customer_id=id).first()
+        serializer = Serialization.from_request(Customer, "detail")
+        customer = with_loaders(Customer.query, serializer).filter_by(customer_id=id).first()
         
         if not customer:
             return make_response({"error": "Customer not found"}, 404)
         
-        return make_response(customer.to_dict(), 200)
+        return make_response(serializer(customer), 200)
     
     def patch(self, id):
         customer = Customer.query.filter_by(customer_id=id).first()
@@ -199,7 +324,7 @@ class CustomerById(Resource):
         
         db.session.commit()
         
-        return make_response(customer.to_dict(), 200)
+        return make_response(serialize(customer), 200)
     
     def delete(self, id):
         customer = Customer.query.filter_by(customer_id=id).first()
@@ -218,15 +343,17 @@ api.add_resource(CustomerById, '/customers/<int:id>')
 # Product Routes
 # ============================================
 class Products(Resource):
+    @conditional_get(Product)
     def get(self):
         business_id = request.args.get('business_id')
         
+        query = Product.query
+        
         if business_id:
-            products = Product.query.filter_by(business_id=business_id).all()
-        else:
-            products = Product.query.all()
+            query = query.filter_by(business_id=business_id)
         
-        return make_response([product.to_dict() for product in products], 200)
+        serializer = Serialization.from_request(Product)
+        return paginate(with_loaders(query, serializer), Product.product_id, serializer)
     
     def post(self):
         data = request.get_json()
@@ -252,21 +379,54 @@ class Products(Resource):
             )
             db.session.add(new_product)
             db.session.commit()
-            return make_response(new_product.to_dict(), 201)
+            return make_response(serialize(new_product), 201)
         except IntegrityError:
             db.session.rollback()
             return make_response({"error": "Invalid business_id or product data"}, 400)
 
 api.add_resource(Products, '/products')
 
+def bulk_rows():
+    # a CSV upload ("file"), a text/csv body or a JSON array
+    upload = request.files.get('file')
+    if upload is not None:
+        return parse_csv(upload.read())
+    if request.mimetype == 'text/csv':
+        return parse_csv(request.get_data())
+    data = request.get_json(silent=True)
+    return data.get('products') if isinstance(data, dict) else data
+
+class ProductsBulk(Resource):
+    def post(self):
+        try:
+            product_ids = create_products(db.session, bulk_rows())
+            db.session.commit()
+        except BulkProductError as e:
+            db.session.rollback()
+            return make_response(e.report(), e.status)
+        return make_response({"created": len(product_ids), "product_ids": product_ids}, 201)
+
+    def patch(self):
+        try:
+            count = update_products(db.session, bulk_rows())
+            db.session.commit()
+        except BulkProductError as e:
+            db.session.rollback()
+            return make_response(e.report(), e.status)
+        return make_response({"updated": count}, 200)
+
+api.add_resource(ProductsBulk, '/products/bulk')
+
 class ProductByID(Resource):
+    @conditional_get(Product)
     def get(self, id):
-        product = Product.query.filter_by(product_id=id).first()
+        serializer = Serialization.from_request(Product, "detail")
+        product = with_loaders(Product.query, serializer).filter_by(product_id=id).first()
         
         if not product:
             return make_response({"error": "Product not found"}, 404)
         
-        return make_response(product.to_dict(), 200)
+        return make_response(serializer(product), 200)
     
     def patch(self, id):
         product = Product.query.filter_by(product_id=id).first()
@@ -288,7 +448,7 @@ class ProductByID(Resource):
         
         db.session.commit()
         
-        return make_response(product.to_dict(), 200)
+        return make_response(serialize(product), 200)
     
     def delete(self, id):
         product = Product.query.filter_by(product_id=id).first()
@@ -296,26 +456,172 @@ class ProductByID(Resource):
         if not product:
             return make_response({"error": "Product not found"}, 404)
         
+        hashes = {image.sha256 for image in product.images if image.sha256}
         db.session.delete(product)
         db.session.commit()
+        for sha256 in hashes:
+            remove_files(sha256)
         
         return make_response({"message": "Product deleted successfully"}, 200)
 
 api.add_resource(ProductByID, '/products/<int:id>')
 
+class ProductTotalSold(Resource):
+    def get(self, id):
+        if not Product.query.filter_by(product_id=id).first():
+            return make_response({"error": "Product not found"}, 404)
+        
+        sales = ProductSales.query.filter_by(product_id=id).first()
+        
+        return make_response({
+            "product_id": id,
+            "total_units_sold": sales.units_sold if sales else 0,
+            "total_revenue": sales.revenue if sales else Decimal("0.00"),
+            "order_count": sales.order_count if sales else 0,
+            "last_sale_at": sales.last_sale_at if sales else None,
+        }, 200)
+
+api.add_resource(ProductTotalSold, '/products/<int:id>/total_sold')
+
+class ProductSearch(Resource):
+    def get(self):
+        q = request.args.get('q', '').strip()
+        
+        if not q:
+            return make_response({"error": "q is required"}, 400)
+        
+        limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        
+        serializer = Serialization.from_request(Product)
+        products = search_products(
+            db.session,
+            q,
+            business_id=request.args.get('business_id', type=int),
+            category_id=request.args.get('category_id', type=int),
+            min_price=request.args.get('min_price', type=float),
+            max_price=request.args.get('max_price', type=float),
+            limit=max(1, min(limit, MAX_SEARCH_LIMIT)),
+            offset=max(0, offset),
+            options=loader_options(serializer),
+        )
+        
+        return make_response([serializer(product) for product in products], 200)
+
+api.add_resource(ProductSearch, '/products/search')
+
+# ============================================
+# Product Image Routes
+# ============================================
+class ProductImages(Resource):
+    def get(self, id):
+        if not db.session.query(Product.product_id).filter_by(product_id=id).first():
+            return make_response({"error": "Product not found"}, 404)
+
+        serializer = Serialization.from_request(ProductImage)
+        images = ProductImage.query.filter_by(product_id=id).order_by(ProductImage.position, ProductImage.image_id)
+        return make_response([serializer(image) for image in images], 200)
+
+    def post(self, id):
+        product = Product.query.filter_by(product_id=id).first()
+        if not product:
+            return make_response({"error": "Product not found"}, 404)
+
+        position = len(product.images)
+        upload = request.files.get('image')
+        try:
+            if upload is not None:
+                sha256, content_type, byte_size = store(upload.stream)
+                image = ProductImage(product_id=id, sha256=sha256, content_type=content_type,
+                                     byte_size=byte_size, position=position)
+            else:
+                # images hosted elsewhere are only linked
+                data = request.get_json(silent=True) or {}
+                if not data.get('url'):
+                    return make_response({"error": "Upload a file as 'image' or send a JSON 'url'"}, 400)
+                image = ProductImage(product_id=id, source_url=data['url'], position=position,
+                                     thumbnail_status="unavailable")
+            db.session.add(image)
+            db.session.commit()
+        except ImageError as e:
+            return make_response({"error": str(e)}, e.status)
+        except Exception as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, 400)
+
+        if image.sha256:
+            queue_thumbnails(image.image_id)
+        return make_response(serialize(image), 201)
+
+api.add_resource(ProductImages, '/products/<int:id>/images')
+
+class ProductImageById(Resource):
+    def delete(self, id, image_id):
+        image = ProductImage.query.filter_by(product_id=id, image_id=image_id).first()
+
+        if not image:
+            return make_response({"error": "Image not found"}, 404)
+
+        sha256 = image.sha256
+        db.session.delete(image)
+        db.session.commit()
+        if sha256:
+            remove_files(sha256)
+
+        return make_response({"message": "Image deleted successfully"}, 200)
+
+api.add_resource(ProductImageById, '/products/<int:id>/images/<int:image_id>')
+
+class ImageFile(Resource):
+    """Serves stored images by content hash.
+
+    A hash never changes content, so responses are cacheable for a year
+    (immutable) by browsers and CDNs; Range requests are answered with 206.
+    """
+
+    def get(self, sha256, size=None):
+        if not SHA256_PATTERN.fullmatch(sha256):
+            return make_response({"error": "Image not found"}, 404)
+        if size is not None and size not in image_sizes():
+            return make_response({"error": f"size must be one of: {', '.join(image_sizes())}"}, 404)
+
+        path = thumbnail_path(sha256, size) if size else original_path(sha256)
+        immutable = True
+        if size and not os.path.exists(path):
+            # thumbnail not made yet (or no image library): send the original,
+            # but do not let it be cached as the thumbnail
+            path = original_path(sha256)
+            immutable = False
+        if not os.path.exists(path):
+            return make_response({"error": "Image not found"}, 404)
+
+        image = db.session.query(ProductImage.content_type).filter_by(sha256=sha256).first()
+        mimetype = "image/jpeg" if size and immutable else (image.content_type if image else None)
+        response = send_file(path, mimetype=mimetype or "application/octet-stream", conditional=True,
+                             etag=f"{sha256}-{size or 'original'}" if immutable else False,
+                             max_age=current_app.config.get("IMAGE_MAX_AGE", 31536000) if immutable else 0)
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+api.add_resource(ImageFile, '/images/<string:sha256>', '/images/<string:sha256>/<string:size>')
+
 # ============================================
 # Business Routes
 # ============================================
 class Businesses(Resource):
+    @conditional_get(Business)
     def get(self):
         verification_status = request.args.get('verification_status')
         
+        query = Business.query
+        
         if verification_status:
-            businesses = Business.query.filter_by(verification_status=verification_status).all()
-        else:
-            businesses = Business.query.all()
+            query = query.filter_by(verification_status=verification_status)
         
-        return make_response([business.to_dict() for business in businesses], 200)
+        serializer = Serialization.from_request(Business)
+        return paginate(with_loaders(query, serializer), Business.vendor_id, serializer)
     
     def post(self):
         data = request.get_json()
@@ -338,7 +644,7 @@ class Businesses(Resource):
             )
             db.session.add(new_business)
             db.session.commit()
-            return make_response(new_business.to_dict(), 201)
+            return make_response(serialize(new_business), 201)
         except IntegrityError:
             db.session.rollback()
             return make_response({"error": "Invalid user_id or duplicate business"}, 400)
@@ -346,13 +652,15 @@ class Businesses(Resource):
 api.add_resource(Businesses, '/businesses')
 
 class BusinessById(Resource):
+    @conditional_get(Business)
     def get(self, id):
-        business = Business.query.filter_by(vendor_id=id).first()
+        serializer = Serialization.from_request(Business, "detail")
+        business = with_loaders(Business.query, serializer).filter_by(vendor_id=id).first()
         
         if not business:
             return make_response({"error": "Business not found"}, 404)
         
-        return make_response(business.to_dict(), 200)
+        return make_response(serializer(business), 200)
     
     def patch(self, id):
         business = Business.query.filter_by(vendor_id=id).first()
@@ -373,7 +681,7 @@ class BusinessById(Resource):
         
         db.session.commit()
         
-        return make_response(business.to_dict(), 200)
+        return make_response(serialize(business), 200)
     
     def delete(self, id):
         business = Business.query.filter_by(vendor_id=id).first()
@@ -388,6 +696,39 @@ class BusinessById(Resource):
 
 api.add_resource(BusinessById, '/businesses/<int:id>')
 
+class BusinessTotalRevenue(Resource):
+    def get(self, id):
+        if not Business.query.filter_by(vendor_id=id).first():
+            return make_response({"error": "Business not found"}, 404)
+        
+        sales = BusinessSales.query.filter_by(business_id=id).first()
+        
+        return make_response({
+            "business_id": id,
+            "total_revenue": sales.revenue if sales else Decimal("0.00"),
+            "total_units_sold": sales.units_sold if sales else 0,
+            "order_count": sales.order_count if sales else 0,
+            "last_sale_at": sales.last_sale_at if sales else None,
+        }, 200)
+
+api.add_resource(BusinessTotalRevenue, '/businesses/<int:id>/total_revenue')
+
+class BusinessDashboard(Resource):
+    def get(self, id):
+        if not Business.query.filter_by(vendor_id=id).first():
+            return make_response({"error": "Business not found"}, 404)
+
+        low_stock = request.args.get('low_stock', DEFAULT_LOW_STOCK, type=int)
+        if low_stock < 0:
+            return make_response({"error": "low_stock must be non-negative"}, 400)
+
+        response = make_response(vendor_dashboard(id, low_stock), 200)
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config.get("DASHBOARD_TTL_SECONDS", 30)
+        return response
+
+api.add_resource(BusinessDashboard, '/businesses/<int:id>/dashboard')
+
 # ============================================
 # Order Routes
 # ============================================
@@ -403,7 +744,8 @@ class Orders(Resource):
         if order_status:
             query = query.filter_by(order_status=order_status)
         
-        return make_response([order.to_dict() for order in query.all()], 200)
+        serializer = Serialization.from_request(Order)
+        return paginate(with_loaders(query, serializer), Order.order_id, serializer)
     
     def post(self):
         data = request.get_json()
@@ -412,14 +754,10 @@ class Orders(Resource):
             return make_response({"error": "No data provided"}, 400)
         
         customer_id = data.get('customer_id')
-        total_amount = data.get('total_amount')
         
         if not customer_id:
             return make_response({"error": "customer_id is required"}, 400)
         
-        if not total_amount:
-            return make_response({"error": "total_amount is required"}, 400)
-        
         customer = Customer.query.filter_by(customer_id=customer_id).first()
         if not customer:
             return make_response({"error": "Customer not found"}, 404)
@@ -427,7 +765,8 @@ class Orders(Resource):
         try:
             new_order = Order(
                 customer_id=customer_id,
-                total_amount=total_amount,
+                # the total follows the items added through /order_items
+                total_amount=0,
                 order_type=data.get('order_type'),
                 order_status=data.get('order_status', 'pending'),
                 payment_status=data.get('payment_status', 'unpaid'),
@@ -438,7 +777,7 @@ class Orders(Resource):
             )
             db.session.add(new_order)
             db.session.commit()
-            return make_response(new_order.to_dict(), 201)
+            return make_response(serialize(new_order), 201)
         except Exception as e:
             db.session.rollback()
             return make_response({"error": str(e)}, 400)
@@ -447,12 +786,13 @@ api.add_resource(Orders, '/orders')
 
 class OrderById(Resource):
     def get(self, id):
-        order = Order.query.filter_by(order_id=id).first()
+        serializer = Serialization.from_request(Order, "detail")
+        order = with_loaders(Order.query, serializer).filter_by(order_id=id).first()
         
         if not order:
             return make_response({"error": "Order not found"}, 404)
         
-        return make_response(order.to_dict(), 200)
+        return make_response(serializer(order), 200)
     
     def patch(self, id):
         order = Order.query.filter_by(order_id=id).first()
@@ -467,15 +807,21 @@ class OrderById(Resource):
         
         allowed_fields = ['order_status', 'payment_status', 'payment_method', 
                          'transaction_reference', 'delivery_address', 'delivery_status',
-                         'total_amount', 'order_type']
+                         'order_type']
         
         for key, value in data.items():
             if key in allowed_fields:
                 setattr(order, key, value)
         
         try:
+            record_transitions(db.session, order)
+            queue_order_notifications(db.session, order)
+            sync_order(db.session, order)
             db.session.commit()
-            return make_response(order.to_dict(), 200)
+            return make_response(serialize(order), 200)
+        except TransitionError as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, e.status)
         except Exception as e:
             db.session.rollback()
             return make_response({"error": str(e)}, 400)
@@ -487,6 +833,9 @@ class OrderById(Resource):
             return make_response({"error": "Order not found"}, 404)
         
         try:
+            # stock of an order that never completed goes back on the shelf
+            if order.order_status != "completed":
+                release(db.session, [order.order_id])
             db.session.delete(order)
             db.session.commit()
             return make_response({"message": "Order successfully deleted"}, 200)
@@ -496,6 +845,24 @@ class OrderById(Resource):
 
 api.add_resource(OrderById, '/orders/<int:id>')
 
+class OrdersStatus(Resource):
+    def patch(self):
+        data = request.get_json()
+
+        if not data:
+            return make_response({"error": "No data provided"}, 400)
+
+        changes = {field: data[field] for field in STATUS_FIELDS if field in data}
+        try:
+            result = transition_orders(db.session, changes, data.get('order_ids'), data.get('filter'))
+            db.session.commit()
+        except TransitionError as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, e.status)
+        return make_response(result, 200)
+
+api.add_resource(OrdersStatus, '/orders/status')
+
 # ============================================
 # OrderItem Routes 
 # ============================================
@@ -511,7 +878,8 @@ class OrderItems(Resource):
         if product_id:
             query = query.filter_by(product_id=product_id)
         
-        return make_response([item.to_dict() for item in query.all()], 200)
+        serializer = Serialization.from_request(OrderItem)
+        return paginate(with_loaders(query, serializer), OrderItem.order_item_id, serializer)
     
     def post(self):
         data = request.get_json()
@@ -519,7 +887,7 @@ class OrderItems(Resource):
         if not data:
             return make_response({"error": "No data provided"}, 400)
         
-        required_fields = ["order_id", "product_id", "quantity", "unit_price"]
+        required_fields = ["order_id", "product_id", "quantity"]
         for field in required_fields:
             if field not in data or data[field] is None:
                 return make_response({"error": f"{field} is required"}, 400)
@@ -536,12 +904,19 @@ class OrderItems(Resource):
             new_order_item = OrderItem(
                 order_id=data['order_id'],
                 product_id=data['product_id'],
-                quantity=data['quantity'],
-                unit_price=data['unit_price']
+                quantity=data['quantity']
             )
+            new_order_item.unit_price = unit_price(product.product_id, new_order_item.quantity,
+                                                   order.customer.customer_type)
             db.session.add(new_order_item)
+            db.session.flush()
+            reserve(db.session, order, {new_order_item.product_id: new_order_item.quantity})
+            refresh_total(order)
             db.session.commit()
-            return make_response(new_order_item.to_dict(), 201)
+            return make_response(serialize(new_order_item), 201)
+        except (InsufficientStock, OrderClosed) as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, e.status)
         except Exception as e:
             db.session.rollback()
             return make_response({"error": str(e)}, 400)
@@ -550,12 +925,13 @@ api.add_resource(OrderItems, '/order_items')
 
 class OrderItemById(Resource):
     def get(self, id):
-        order_item = OrderItem.query.filter_by(order_item_id=id).first()
+        serializer = Serialization.from_request(OrderItem, "detail")
+        order_item = with_loaders(OrderItem.query, serializer).filter_by(order_item_id=id).first()
         
         if not order_item:
             return make_response({"error": "Order item not found"}, 404)
         
-        return make_response(order_item.to_dict(), 200)
+        return make_response(serializer(order_item), 200)
     
     def patch(self, id):
         order_item = OrderItem.query.filter_by(order_item_id=id).first()
@@ -568,15 +944,29 @@ class OrderItemById(Resource):
         if not data:
             return make_response({"error": "No data provided"}, 400)
         
-        allowed_fields = ['quantity', 'unit_price']
-        
-        for key, value in data.items():
-            if key in allowed_fields:
-                setattr(order_item, key, value)
+        allowed_fields = ['quantity']
+        old_quantity = order_item.quantity
         
         try:
+            for key, value in data.items():
+                if key in allowed_fields:
+                    setattr(order_item, key, value)
+
+            order = order_item.order
+            # take the extra units now, in this transaction, as checkout does
+            added = order_item.quantity - old_quantity
+            if added > 0:
+                reserve(db.session, order, {order_item.product_id: added})
+            order_item.unit_price = unit_price(order_item.product_id, order_item.quantity,
+                                               order.customer.customer_type)
+            refresh_total(order)
+            if added < 0:
+                queue_reconcile(db.session, order.order_id)
             db.session.commit()
-            return make_response(order_item.to_dict(), 200)
+            return make_response(serialize(order_item), 200)
+        except (InsufficientStock, OrderClosed) as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, e.status)
         except Exception as e:
             db.session.rollback()
             return make_response({"error": str(e)}, 400)
@@ -588,7 +978,10 @@ class OrderItemById(Resource):
             return make_response({"error": "Order item not found"}, 404)
         
         try:
+            order = order_item.order
             db.session.delete(order_item)
+            refresh_total(order)
+            queue_reconcile(db.session, order.order_id)
             db.session.commit()
             return make_response({"message": "Order item successfully deleted"}, 200)
         except Exception as e:
@@ -604,14 +997,134 @@ class OrderItemsByOrder(Resource):
         if not order:
             return make_response({"error": "Order not found"}, 404)
         
-        order_items = OrderItem.query.filter_by(order_id=order_id).all()
+        serializer = Serialization.from_request(OrderItem)
+        order_items = with_loaders(OrderItem.query, serializer).filter_by(order_id=order_id).all()
         
-        return make_response([item.to_dict() for item in order_items], 200)
+        return make_response([serializer(item) for item in order_items], 200)
 
 api.add_resource(OrderItemsByOrder, '/orders/<int:order_id>/items')
 
+# ============================================
+# Checkout Route
+# ============================================
+class Checkout(Resource):
+    def post(self):
+        data = request.get_json()
+
+        if not data:
+            return make_response({"error": "No data provided"}, 400)
+
+        customer_id = data.get('customer_id')
+
+        if not customer_id:
+            return make_response({"error": "customer_id is required"}, 400)
+
+        customer = Customer.query.filter_by(customer_id=customer_id).first()
+        if not customer:
+            return make_response({"error": "Customer not found"}, 404)
+
+        try:
+            order = place_order(customer, data.get('items'), data)
+        except CheckoutError as e:
+            return make_response({"error": str(e)}, e.status)
+        except Exception as e:
+            return make_response({"error": str(e)}, 400)
+
+        serializer = Serialization(Order, "detail", expand=("order_items",))
+        order = with_loaders(Order.query, serializer).filter_by(order_id=order.order_id).first()
+
+        return make_response(serializer(order), 201)
+
+api.add_resource(Checkout, '/checkout')
+
+# ============================================
+# Pricing Route
+# ============================================
+class PricingQuote(Resource):
+    def post(self):
+        data = request.get_json()
+
+        if not data:
+            return make_response({"error": "No data provided"}, 400)
+
+        try:
+            quantities = parse_items(data.get('items'))
+            customer_type = customer_type_for(data.get('customer_id'), data.get('customer_type'))
+            lines = quote(quantities, customer_type)
+        except (CheckoutError, PricingError) as e:
+            return make_response({"error": str(e)}, e.status)
+
+        return make_response({
+            "customer_type": customer_type,
+            "items": lines,
+            "total_amount": sum((line["line_total"] for line in lines), Decimal("0.00")),
+        }, 200)
+
+api.add_resource(PricingQuote, '/pricing/quote')
+
+# ============================================
+# Analytics Route
+# ============================================
+class SalesAnalytics(Resource):
+    def get(self):
+        group_by = request.args.get('group_by', TOTAL)
+        granularity = request.args.get('granularity', DAY)
+
+        try:
+            start, end = report_range(request.args.get('from'), request.args.get('to'), granularity)
+            source, series = sales_series(
+                group_by, granularity, start, end,
+                business_id=request.args.get('business_id', type=int),
+                product_id=request.args.get('product_id', type=int),
+                customer_type=request.args.get('customer_type'),
+            )
+        except AnalyticsError as e:
+            return make_response({"error": str(e)}, e.status)
+
+        return make_response({
+            "group_by": group_by,
+            "granularity": granularity,
+            "from": start,
+            "to": end,
+            "source": source,
+            "series": series,
+        }, 200)
+
+api.add_resource(SalesAnalytics, '/analytics/sales')
+
+# ============================================
+# Events Route
+# ============================================
+class Events(Resource):
+    def get(self):
+        after = request.args.get('after', 0, type=int)
+        limit = request.args.get('limit', EVENTS_LIMIT, type=int)
+        wait = request.args.get('wait', 0, type=float)
+        order_id = request.args.get('order_id', type=int)
+        if after < 0:
+            return make_response({"error": "after must be a sequence number"}, 400)
+
+        limit = max(1, min(limit, MAX_EVENTS_LIMIT))
+        wait = max(0, min(wait, current_app.config.get("EVENTS_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS)))
+        try:
+            if wants_stream():
+                # a stale cursor fails before the 200 goes out
+                check_cursor(after)
+                return Response(stream_with_context(stream_events(after, limit, wait, order_id)),
+                                mimetype=NDJSON_MIMETYPE)
+            events = poll_events(after, limit, wait, order_id)
+        except EventsError as e:
+            return make_response(e.report(), e.status)
+
+        return make_response({
+            "events": events,
+            "next": events[-1]["seq"] if events else after,
+        }, 200)
+
+api.add_resource(Events, '/events')
+
 # ============================================
 # Run Application
 # ============================================
 if __name__ == '__main__':
-    app.run(port=5555, debug=True)
\ No newline at end of file
+    create_app().run(port=5555, debug=True)
\ No newline at end of file
@@ -0,0 +1 @@
+# server/benchmarks/__init__.py
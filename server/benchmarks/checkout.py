@@ -0,0 +1,156 @@
+# server/benchmarks/checkout.py
+#
+# Concurrent checkout benchmark: many clients buy the same few "hot"
+# products at once, then the stock is audited. Every unit must be either
+# still on the shelf or held by exactly one order; stock never goes negative
+# and no update is lost.
+#
+#   cd server
+#   python -m benchmarks.checkout --concurrency 8 --orders 2000 --hot 5 --stock 1000
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import func, select, update
+
+from benchmarks import datagen, report
+from benchmarks.scenarios import sample_ids
+from benchmarks.suite import benchmark_app
+from models import db, Order, OrderItem, Product, StockReservation
+
+
+def worker(app, ids, hot, count, seed, samples, statuses, lock):
+    rng = random.Random(seed)
+    client = app.test_client()
+    local_samples = []
+    local_statuses = Counter()
+    for _ in range(count):
+        body = {"customer_id": rng.choice(ids["customer_id"]),
+                "items": [{"product_id": product_id, "quantity": rng.randint(1, 3)}
+                          for product_id in rng.sample(hot, rng.randint(1, min(3, len(hot))))],
+                "order_type": "retail", "payment_method": "mpesa"}
+        start = time.perf_counter()
+        response = client.post("/checkout", json=body)
+        local_samples.append((time.perf_counter() - start) * 1000)
+        local_statuses[response.status_code] += 1
+    with lock:
+        samples.extend(local_samples)
+        statuses.update(local_statuses)
+
+
+def audit(hot, stock):
+    """Return a list of problems with the stock of the ``hot`` products."""
+    reserved = dict(db.session.execute(
+        select(StockReservation.product_id, func.sum(StockReservation.quantity))
+        .where(StockReservation.product_id.in_(hot), StockReservation.status.in_(("held", "committed")))
+        .group_by(StockReservation.product_id)
+    ).all())
+    sold = dict(db.session.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .join(StockReservation, (StockReservation.order_id == OrderItem.order_id)
+              & (StockReservation.product_id == OrderItem.product_id))
+        .where(OrderItem.product_id.in_(hot))
+        .group_by(OrderItem.product_id)
+    ).all())
+    remaining = dict(db.session.execute(
+        select(Product.product_id, Product.stock_quantity).where(Product.product_id.in_(hot))
+    ).all())
+
+    problems = []
+    for product_id in hot:
+        left, held = remaining[product_id], reserved.get(product_id, 0)
+        if left < 0:
+            problems.append(f"product {product_id}: negative stock {left}")
+        if left + held != stock:
+            problems.append(f"product {product_id}: {left} left + {held} reserved != {stock}")
+        if sold.get(product_id, 0) != held:
+            problems.append(f"product {product_id}: {sold.get(product_id, 0)} ordered but {held} reserved")
+    return problems, remaining, reserved
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="mtaani-checkout-")
+    path = os.path.join(workdir, "bench.db")
+    if args.database:
+        shutil.copyfile(args.database, path)
+    else:
+        datagen.build(path, args.scale, args.seed, vendors=args.vendors, customers=args.customers,
+                      products=args.products, order_items=args.order_items)
+
+    app, _ = benchmark_app(path)
+    with app.app_context():
+        ids = sample_ids(db.session.connection(), args.seed)
+        hot = random.Random(args.seed).sample(ids["product_id"], args.hot)
+        db.session.execute(update(Product).where(Product.product_id.in_(hot)).values(stock_quantity=args.stock))
+        db.session.commit()
+        orders_before = db.session.scalar(select(func.count(Order.order_id)))
+
+    samples = []
+    statuses = Counter()
+    lock = threading.Lock()
+    per_thread = args.orders // args.concurrency
+    threads = [
+        threading.Thread(target=worker, args=(app, ids, hot, per_thread, args.seed + n, samples, statuses, lock))
+        for n in range(args.concurrency)
+    ]
+
+    print(f"Placing {per_thread * args.concurrency} orders for {args.hot} products "
+          f"({args.stock} each) from {args.concurrency} clients ...")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # 201 placed, 409 refused for lack of stock; anything else (on SQLite
+    # usually a writer that waited past busy_timeout) is counted as an error
+    failures = sum(count for status, count in statuses.items() if status not in (201, 409))
+    results = {"POST /checkout (contended)": report.summarize(samples, elapsed, errors=failures)}
+    print()
+    report.print_table(results)
+    print(f"\nstatuses: {dict(sorted(statuses.items()))}")
+
+    with app.app_context():
+        problems, remaining, reserved = audit(hot, args.stock)
+        placed = db.session.scalar(select(func.count(Order.order_id))) - orders_before
+        db.session.rollback()
+        db.engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"orders placed: {placed}")
+    for product_id in hot:
+        print(f"  product {product_id}: {remaining[product_id]} left, {reserved.get(product_id, 0)} reserved")
+    if placed != statuses[201]:
+        problems.append(f"{statuses[201]} checkouts succeeded but {placed} orders exist")
+    for problem in problems:
+        print(f"FAIL {problem}")
+
+    if args.save:
+        report.save(args.save, "checkout", {"concurrency": args.concurrency, "hot": args.hot,
+                                            "stock": args.stock, "seed": args.seed}, results)
+    if problems:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit stock under concurrent checkouts of the same products")
+    datagen.add_size_arguments(parser)
+    parser.add_argument("--database", help="Existing database made by benchmarks.datagen (used read-only)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=2000, help="Checkouts across all clients")
+    parser.add_argument("--hot", type=int, default=5, help="Number of products every client buys from")
+    parser.add_argument("--stock", type=int, default=1000, help="Starting stock of each hot product")
+    parser.add_argument("--save", help="Write the results as JSON to this path")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
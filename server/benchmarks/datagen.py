@@ -0,0 +1,250 @@
+# server/benchmarks/datagen.py
+#
+# Generates a synthetic marketplace database at production-like volume.
+# Popularity is skewed the way real traffic is: a few vendors own most of
+# the catalogue, a few products take most of the sales and a few customers
+# place most of the orders.
+#
+#   cd server
+#   python -m benchmarks.datagen --scale large --output /tmp/mtaani-large.db
+
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from faker import Faker
+from sqlalchemy import create_engine, insert
+
+import search  # noqa: F401  registers the products_fts DDL on create_all
+from aggregates import rebuild
+from models import db, User, Business, Customer, Product, Order, OrderItem
+from benchmarks.query_plans import _batches
+
+SCALES = {
+    "small": {"vendors": 100, "customers": 2000, "products": 10000, "order_items": 50000},
+    "medium": {"vendors": 1000, "customers": 20000, "products": 100000, "order_items": 500000},
+    "large": {"vendors": 10000, "customers": 200000, "products": 1000000, "order_items": 5000000},
+}
+
+ITEMS_PER_ORDER = 3
+ZIPF_EXPONENT = 1.1
+POOL_SIZE = 2000
+
+CATEGORIES = {
+    1: ["Dress", "Abaya", "Kaftan", "Skirt", "Blouse"],
+    2: ["Hijab", "Scarf", "Shawl", "Headwrap"],
+    3: ["Sandals", "Heels", "Sneakers", "Loafers", "Slippers"],
+    4: ["Perfume", "Oud", "Musk", "Body Mist", "Incense"],
+    5: ["Earrings", "Necklace", "Bangle", "Ring", "Anklet"],
+    6: ["Handbag", "Wallet", "Clutch", "Backpack"],
+    7: ["Shirt", "Kanzu", "Trousers", "Jacket", "Jeans"],
+    8: ["Bedsheet", "Curtain", "Towel", "Carpet", "Cushion"],
+}
+MATERIALS = ["Cotton", "Silk", "Leather", "Linen", "Chiffon", "Gold", "Silver", "Wool", "Denim", "Satin"]
+STYLES = ["Evening", "Casual", "Wedding", "Classic", "Embroidered", "Printed", "Plain", "Luxury", "Kids"]
+
+ORDER_STATUSES = (["completed"] * 6 + ["pending", "confirmed", "processing", "cancelled"])
+PAYMENT_METHODS = ["mpesa", "mpesa", "mpesa", "cash", "bank_transfer"]
+DELIVERY_STATUS = {"completed": "delivered", "processing": "in_transit", "confirmed": "not_shipped",
+                   "pending": "not_shipped", "cancelled": "not_shipped"}
+
+
+def zipf_picker(rng, ids, exponent=ZIPF_EXPONENT):
+    """Return a function drawing ``k`` ids with Zipf-distributed popularity.
+
+    Popularity rank is shuffled against id order so that hot rows are spread
+    across the table instead of being the lowest ids.
+    """
+    ranked = list(ids)
+    rng.shuffle(ranked)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** exponent for rank in range(len(ranked))))
+    return lambda k=1: rng.choices(ranked, cum_weights=cum_weights, k=k)
+
+
+def _pools(fake):
+    return {
+        "names": [fake.name() for _ in range(POOL_SIZE)],
+        "companies": [fake.company() for _ in range(POOL_SIZE)],
+        "streets": [fake.street_name() for _ in range(POOL_SIZE)],
+        "sentences": [fake.sentence(nb_words=12) for _ in range(POOL_SIZE)],
+    }
+
+
+def _users(rng, pools, vendors, customers):
+    for user_id in range(1, vendors + customers + 1):
+        name = rng.choice(pools["names"])
+        yield {
+            "user_id": user_id,
+            "full_name": name,
+            "email": f"{name.split()[0].lower()}.{user_id}@example.com",
+            "password": "password123",
+            "phone": f"07{rng.randint(10000000, 99999999)}",
+            "role": "vendor" if user_id <= vendors else "customer",
+            "status": "active" if rng.random() < 0.95 else "inactive",
+        }
+
+
+def _businesses(rng, pools, vendors):
+    for vendor_id in range(1, vendors + 1):
+        yield {
+            "vendor_id": vendor_id,
+            "user_id": vendor_id,
+            "business_name": f"{rng.choice(pools['companies'])} {vendor_id}",
+            "verification_status": rng.choices(["verified", "pending", "rejected"], weights=[80, 15, 5])[0],
+            "rating": Decimal(str(round(min(5.0, max(1.0, rng.gauss(4.1, 0.6))), 2))),
+        }
+
+
+def _customers(rng, pools, vendors, customers):
+    for customer_id in range(1, customers + 1):
+        wholesaler = rng.random() < 0.15
+        yield {
+            "customer_id": customer_id,
+            "user_id": vendors + customer_id,
+            "customer_type": "WHOLESALER" if wholesaler else "RETAILER",
+            "business_name": rng.choice(pools["companies"]) if wholesaler else None,
+        }
+
+
+def _products(rng, pools, products, pick_vendor):
+    vendors = iter(pick_vendor(products))
+    for product_id in range(1, products + 1):
+        category_id = rng.choice(list(CATEGORIES))
+        # log-normal prices: most items a few thousand shillings, a long tail above
+        price = round(min(250000.0, max(50.0, rng.lognormvariate(7.5, 0.9))), 2)
+        bulk = rng.random() < 0.4
+        yield {
+            "product_id": product_id,
+            "business_id": next(vendors),
+            "category_id": category_id,
+            "name": f"{rng.choice(STYLES)} {rng.choice(MATERIALS)} {rng.choice(CATEGORIES[category_id])}",
+            "description": rng.choice(pools["sentences"]),
+            "price": Decimal(str(price)),
+            "bulk_price": Decimal(str(round(price * 0.85, 2))) if bulk else None,
+            "min_bulk_quantity": rng.choice([10, 20, 50]) if bulk else None,
+            "stock_quantity": rng.randint(0, 500),
+        }
+
+
+def _orders(rng, pools, order_items, pick_customer, pick_product, prices, now):
+    """Yield (order, items) pairs until ``order_items`` items have been made."""
+    made = 0
+    order_id = 0
+    customer_ids = iter(())
+    while made < order_items:
+        order_id += 1
+        count = min(order_items - made, 1 + int(rng.expovariate(1.0 / (ITEMS_PER_ORDER - 1))))
+
+        customer_id = next(customer_ids, None)
+        if customer_id is None:
+            customer_ids = iter(pick_customer(10000))
+            customer_id = next(customer_ids)
+
+        items = []
+        for product_id in set(pick_product(count)):
+            price, bulk_price, min_bulk = prices[product_id]
+            quantity = rng.choice([1, 1, 1, 2, 2, 3, 5]) if rng.random() < 0.9 else rng.choice([10, 20, 50, 100])
+            unit_price = bulk_price if bulk_price is not None and quantity >= min_bulk else price
+            items.append({"order_id": order_id, "product_id": product_id,
+                          "quantity": quantity, "unit_price": unit_price})
+        made += len(items)
+
+        status = rng.choice(ORDER_STATUSES)
+        order = {
+            "order_id": order_id,
+            "customer_id": customer_id,
+            "order_type": "wholesale" if sum(item["quantity"] for item in items) >= 10 else "retail",
+            "total_amount": sum(item["quantity"] * item["unit_price"] for item in items),
+            "order_status": status,
+            "payment_status": "paid" if status in ("completed", "processing") else "unpaid",
+            "payment_method": rng.choice(PAYMENT_METHODS),
+            "delivery_address": f"{rng.choice(pools['streets'])}, Eastleigh",
+            "delivery_status": DELIVERY_STATUS[status],
+            # recent days are busier: exponential age, capped at a year
+            "order_date": now - timedelta(minutes=min(525600, int(rng.expovariate(1.0 / 43200)))),
+        }
+        yield order, items
+
+
+def generate(engine, vendors, customers, products, order_items, seed=42, log=print):
+    rng = random.Random(seed)
+    fake = Faker()
+    Faker.seed(seed)
+    pools = _pools(fake)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        for model, rows in (
+            (User, _users(rng, pools, vendors, customers)),
+            (Business, _businesses(rng, pools, vendors)),
+            (Customer, _customers(rng, pools, vendors, customers)),
+        ):
+            start = time.perf_counter()
+            for batch in _batches(rows):
+                conn.execute(insert(model.__table__), batch)
+            log(f"  {model.__tablename__:<12} {time.perf_counter() - start:8.1f}s")
+
+        start = time.perf_counter()
+        prices = {}
+        for batch in _batches(_products(rng, pools, products, zipf_picker(rng, range(1, vendors + 1)))):
+            conn.execute(insert(Product.__table__), batch)
+            prices.update((row["product_id"], (row["price"], row["bulk_price"], row["min_bulk_quantity"]))
+                          for row in batch)
+        log(f"  {'products':<12} {time.perf_counter() - start:8.1f}s")
+
+        start = time.perf_counter()
+        pick_customer = zipf_picker(rng, range(1, customers + 1), exponent=0.8)
+        pick_product = zipf_picker(rng, range(1, products + 1))
+        orders = _orders(rng, pools, order_items, pick_customer, pick_product, prices, now)
+        for batch in _batches(orders):
+            conn.execute(insert(Order.__table__), [order for order, _ in batch])
+            conn.execute(insert(OrderItem.__table__), [item for _, items in batch for item in items])
+        log(f"  {'orders':<12} {time.perf_counter() - start:8.1f}s")
+
+        start = time.perf_counter()
+        rebuild(conn)
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+        log(f"  {'aggregates':<12} {time.perf_counter() - start:8.1f}s")
+
+
+def build(path, scale="small", seed=42, log=print, **sizes):
+    """Create a fresh SQLite database at ``path`` and fill it; returns the sizes used."""
+    sizes = dict(SCALES[scale], **{key: value for key, value in sizes.items() if value})
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    log(f"Generating {sizes} into {path} ...")
+    generate(engine, seed=seed, log=log, **sizes)
+    engine.dispose()
+    return sizes
+
+
+def add_size_arguments(parser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--vendors", type=int)
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--order-items", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Market Mtaani database")
+    add_size_arguments(parser)
+    parser.add_argument("--output", default="benchmark.db")
+    args = parser.parse_args()
+    build(os.path.abspath(args.output), args.scale, args.seed, vendors=args.vendors, customers=args.customers,
+          products=args.products, order_items=args.order_items)
+
+
+if __name__ == "__main__":
+    main()
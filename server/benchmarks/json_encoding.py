@@ -0,0 +1,87 @@
+# server/benchmarks/json_encoding.py
+#
+# Compares the stdlib and orjson JSON providers on a large product list,
+# both as the to_dict() output list routes send and as raw SQLAlchemy Rows
+# (Decimal and datetime values), reporting encode time and peak memory
+# allocated while encoding.
+#
+#   cd server
+#   python -m benchmarks.json_encoding --rows 50000
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from json_provider import PROVIDERS, orjson
+from models import db, User, Business, Product
+from serializers import Serialization
+
+
+def populate(engine, rows, seed=42):
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"user_id": 1, "full_name": "Vendor", "email": "v@example.com",
+                                                "password": "password123", "role": "vendor"}])
+        conn.execute(insert(Business.__table__), [{"vendor_id": 1, "user_id": 1, "business_name": "Vendor"}])
+        conn.execute(insert(Product.__table__), [
+            {"product_id": i, "business_id": 1, "category_id": rng.randint(1, 20), "name": f"Product {i}",
+             "description": "Hand-stitched cotton kanzu with embroidered collar",
+             "price": Decimal(str(round(rng.uniform(50, 20000), 2))),
+             "bulk_price": Decimal(str(round(rng.uniform(40, 15000), 2))) if rng.random() < 0.4 else None,
+             "min_bulk_quantity": rng.choice([10, 20, 50]), "stock_quantity": rng.randint(0, 500),
+             "created_at": now - timedelta(minutes=i)}
+            for i in range(1, rows + 1)
+        ])
+
+
+def measure(dumps, payload, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dumps(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    dumps(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON providers on a large list response")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    populate(engine, args.rows)
+    with engine.connect() as conn:
+        rows = conn.execute(select(*Product.__table__.columns)).all()
+    serializer = Serialization(Product, "detail")
+    with Session(engine) as session:
+        dicts = [serializer(product) for product in session.scalars(select(Product))]
+
+    app = Flask(__name__)
+    names = [name for name in PROVIDERS if name != "orjson" or orjson is not None]
+    print(f"{'provider':<10} {'payload':<8} {'ms':>10} {'peak MB':>10}")
+    for name in names:
+        provider = PROVIDERS[name](app)
+        provider.compact = True
+        with app.app_context():
+            for label, payload in (("to_dict", dicts), ("rows", rows)):
+                elapsed, peak = measure(provider.response, payload, args.repeat)
+                print(f"{name:<10} {label:<8} {elapsed:>10.1f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
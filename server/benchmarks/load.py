@@ -0,0 +1,156 @@
+# server/benchmarks/load.py
+#
+# HTTP load generator: runs a weighted mix of the route scenarios against a
+# running server from several concurrent clients and reports per-endpoint
+# latency percentiles and throughput.
+#
+#   cd server
+#   gunicorn -w 4 -b 127.0.0.1:5555 wsgi:app &
+#   python -m benchmarks.load --url http://127.0.0.1:5555 --concurrency 16 --duration 60
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from benchmarks import report
+from benchmarks.scenarios import scenarios, new_state
+
+DISCOVERY_LIMIT = 500
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def discover_ids(base_url):
+    """Collect ids for the scenarios through the API itself."""
+    def column(path, field):
+        return [row[field] for row in _get(f"{base_url}{path}?limit={DISCOVERY_LIMIT}&fields={field}")["data"]]
+
+    users = _get(f"{base_url}/users?limit={DISCOVERY_LIMIT}&fields=user_id,email,role")["data"]
+    businesses = _get(f"{base_url}/businesses?limit={DISCOVERY_LIMIT}&fields=vendor_id,user_id")["data"]
+    customers = _get(f"{base_url}/customers?limit={DISCOVERY_LIMIT}&fields=customer_id,user_id")["data"]
+    return {
+        "user_id": [user["user_id"] for user in users],
+        "email": [user["email"] for user in users],
+        "vendor_id": [business["vendor_id"] for business in businesses],
+        "vendor_user_id": [business["user_id"] for business in businesses],
+        "customer_id": [customer["customer_id"] for customer in customers],
+        "customer_user_id": [customer["user_id"] for customer in customers],
+        "product_id": column("/products", "product_id"),
+        "order_id": column("/orders", "order_id"),
+        "order_item_id": column("/order_items", "order_item_id"),
+    }
+
+
+def send(base_url, method, path, body):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def worker(base_url, mix, ids, deadline, seed, samples, errors, lock):
+    rng = random.Random(seed)
+    state = new_state()
+    names = list(mix)
+    weights = [scenario.weight for scenario in mix]
+    local_samples = defaultdict(list)
+    local_errors = defaultdict(int)
+
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights=weights)[0]
+        request = scenario.request(rng, ids, state)
+        if request is None:
+            continue
+
+        start = time.perf_counter()
+        try:
+            status, payload = send(base_url, *request)
+        except OSError:
+            status, payload = 599, b""
+        local_samples[scenario.name].append((time.perf_counter() - start) * 1000)
+
+        if status >= 400:
+            local_errors[scenario.name] += 1
+        elif scenario.created:
+            try:
+                scenario.record(state, status, json.loads(payload))
+            except ValueError:
+                pass
+
+    with lock:
+        for name, values in local_samples.items():
+            samples[name].extend(values)
+        for name, count in local_errors.items():
+            errors[name] += count
+
+
+def run(args):
+    base_url = args.url.rstrip("/")
+    ids = discover_ids(base_url)
+    mix = [scenario for scenario in scenarios()
+           if (args.writes or scenario.method == "GET") and (not args.only or args.only in scenario.name)]
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, mix, ids, deadline, args.seed + n, samples, errors, lock))
+        for n in range(args.concurrency)
+    ]
+
+    print(f"Running {len(mix)} endpoints against {base_url} with {args.concurrency} clients for {args.duration}s ...")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {scenario.name: report.summarize(samples[scenario.name], elapsed, errors=errors[scenario.name])
+               for scenario in mix if samples[scenario.name]}
+    total = sum(len(values) for values in samples.values())
+    results["TOTAL"] = report.summarize([value for values in samples.values() for value in values], elapsed,
+                                        errors=sum(errors.values()))
+
+    print()
+    report.print_table(results)
+    print(f"\n{total} requests in {elapsed:.1f}s")
+
+    parameters = {"url": base_url, "concurrency": args.concurrency, "duration": args.duration,
+                  "writes": args.writes, "seed": args.seed}
+    if args.save:
+        report.save(args.save, "load", parameters, results)
+    if args.compare and report.compare(args.compare, results, args.threshold):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate HTTP load against a running Market Mtaani server")
+    parser.add_argument("--url", default="http://127.0.0.1:5555")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--writes", action="store_true", help="Include POST/PATCH/DELETE routes in the mix")
+    parser.add_argument("--only", help="Only run endpoints whose name contains this text")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Write the results as JSON to this path")
+    parser.add_argument("--compare", help="Compare with a saved run; exits 1 on regression")
+    parser.add_argument("--threshold", type=float, default=report.REGRESSION_THRESHOLD)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
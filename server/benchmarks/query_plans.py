@@ -0,0 +1,158 @@
+# server/benchmarks/query_plans.py
+#
+# Compares SQLite query plans and timings for the API's filter queries with
+# and without the secondary indexes declared in models.py.
+#
+#   cd server
+#   python -m benchmarks.query_plans --products 200000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, text
+
+from models import db, User, Business, Product, Customer, Order, OrderItem
+
+BATCH_SIZE = 10000
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(engine, vendors, products, customers, orders, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    statuses = ["pending", "confirmed", "processing", "completed", "cancelled"]
+
+    users = (
+        {"user_id": i, "full_name": f"User {i}", "email": f"user{i}@example.com",
+         "password": "password123", "role": "vendor" if i <= vendors else "customer",
+         "status": "active"}
+        for i in range(1, vendors + customers + 1)
+    )
+    tables = [
+        (User, users),
+        (Business, (
+            {"vendor_id": i, "user_id": i, "business_name": f"Business {i}",
+             "verification_status": rng.choice(["pending", "verified", "verified", "rejected"])}
+            for i in range(1, vendors + 1)
+        )),
+        (Customer, (
+            {"customer_id": i, "user_id": vendors + i,
+             "customer_type": rng.choice(["WHOLESALER", "RETAILER"])}
+            for i in range(1, customers + 1)
+        )),
+        (Product, (
+            {"product_id": i, "business_id": rng.randint(1, vendors), "name": f"Product {i}",
+             "price": round(rng.uniform(50, 20000), 2), "stock_quantity": rng.randint(0, 500)}
+            for i in range(1, products + 1)
+        )),
+        (Order, (
+            {"order_id": i, "customer_id": rng.randint(1, customers),
+             "total_amount": 0, "order_status": rng.choice(statuses),
+             "order_date": now - timedelta(minutes=rng.randint(0, 525600))}
+            for i in range(1, orders + 1)
+        )),
+        (OrderItem, (
+            {"order_id": rng.randint(1, orders), "product_id": rng.randint(1, products),
+             "quantity": rng.randint(1, 10), "unit_price": round(rng.uniform(50, 20000), 2)}
+            for _ in range(orders * 3)
+        )),
+    ]
+
+    with engine.begin() as conn:
+        for model, rows in tables:
+            for batch in _batches(rows):
+                conn.execute(insert(model.__table__), batch)
+
+
+def queries(vendors, customers):
+    return {
+        "GET /products?business_id=": select(Product).where(Product.business_id == vendors // 2),
+        "products price range": select(Product).where(Product.price >= 1000, Product.price <= 1010),
+        "vendor products by price": select(Product).where(
+            Product.business_id == vendors // 2, Product.price <= 5000),
+        "GET /orders?customer_id=": select(Order).where(Order.customer_id == customers // 2)
+            .order_by(Order.order_date),
+        "GET /orders?order_status=": select(Order).where(Order.order_status == "cancelled"),
+        "GET /order_items?order_id=": select(OrderItem).where(OrderItem.order_id == 1),
+        "GET /order_items?product_id=": select(OrderItem).where(OrderItem.product_id == 1),
+        "GET /businesses?verification_status=": select(Business)
+            .where(Business.verification_status == "rejected"),
+        "GET /users?role=": select(User).where(User.role == "vendor"),
+    }
+
+
+def explain(conn, statement):
+    compiled = statement.compile(conn, compile_kwargs={"literal_binds": True})
+    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+    return "; ".join(row[-1] for row in plan)
+
+
+def measure(conn, statement, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(statement).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="mtaani-bench-")
+    path = os.path.join(workdir, "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+
+    db.metadata.create_all(engine)
+    print(f"Populating {path} ...")
+    populate(engine, args.vendors, args.products, args.customers, args.orders)
+
+    index_names = [index.name for table in db.metadata.sorted_tables for index in table.indexes]
+    report = {}
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        for label, statement in queries(args.vendors, args.customers).items():
+            report[label] = {"indexed": (explain(conn, statement), measure(conn, statement, args.repeat))}
+
+        for name in index_names:
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.exec_driver_sql("ANALYZE")
+        for label, statement in queries(args.vendors, args.customers).items():
+            report[label]["scan"] = (explain(conn, statement), measure(conn, statement, args.repeat))
+        conn.commit()
+
+    for label, results in report.items():
+        scan_plan, scan_ms = results["scan"]
+        index_plan, index_ms = results["indexed"]
+        print(f"\n{label}")
+        print(f"  without indexes {scan_ms:9.3f} ms  {scan_plan}")
+        print(f"  with indexes    {index_ms:9.3f} ms  {index_plan}")
+
+    engine.dispose()
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query plans with and without secondary indexes")
+    parser.add_argument("--vendors", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
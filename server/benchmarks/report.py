@@ -0,0 +1,102 @@
+# server/benchmarks/report.py
+#
+# Summaries, storage and regression comparison shared by the benchmark suite
+# and the HTTP load generator.
+
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+# a route regresses when its p95 grows by more than this fraction
+REGRESSION_THRESHOLD = 0.20
+
+
+def percentile(sorted_values, fraction):
+    # nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+def summarize(latencies_ms, elapsed_s, statements=None, errors=0):
+    latencies = sorted(latencies_ms)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed_s, 1) if elapsed_s else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+    for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        if summary[key] is not None:
+            summary[key] = round(summary[key], 3)
+    if statements:
+        summary["sql_statements"] = round(sum(statements) / len(statements), 1)
+        summary["sql_statements_max"] = max(statements)
+    return summary
+
+
+def print_table(results):
+    header = f"{'endpoint':<44} {'req':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'sql':>6} {'err':>5}"
+    print(header)
+    print("-" * len(header))
+    for name, summary in results.items():
+        sql = summary.get("sql_statements")
+        print(f"{name:<44} {summary['requests']:>6} {summary['throughput_rps'] or 0:>8.1f} "
+              f"{summary['p50_ms'] or 0:>9.2f} {summary['p95_ms'] or 0:>9.2f} {summary['p99_ms'] or 0:>9.2f} "
+              f"{'' if sql is None else sql:>6} {summary['errors']:>5}")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(path, kind, parameters, results):
+    document = {
+        "kind": kind,
+        "created_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"\nResults written to {path}")
+
+
+def compare(baseline_path, results, threshold=REGRESSION_THRESHOLD):
+    """Print the change against a saved run; return the names of regressed routes."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\nCompared with {baseline_path} (revision {baseline.get('revision')}, {baseline.get('created_at')})")
+    regressions = []
+    for name, summary in results.items():
+        before = baseline["results"].get(name)
+        if not before or not before.get("p95_ms") or summary.get("p95_ms") is None:
+            continue
+        change = summary["p95_ms"] / before["p95_ms"] - 1
+        sql_before, sql_now = before.get("sql_statements"), summary.get("sql_statements")
+        more_sql = sql_before is not None and sql_now is not None and sql_now > sql_before
+        flag = ""
+        if change > threshold or more_sql:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        sql_note = f"  sql {sql_before} -> {sql_now}" if more_sql else ""
+        print(f"  {name:<44} p95 {before['p95_ms']:>9.2f} -> {summary['p95_ms']:>9.2f} ms "
+              f"({change:+.0%}){sql_note}{flag}")
+    return regressions
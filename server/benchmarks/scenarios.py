@@ -0,0 +1,176 @@
+# server/benchmarks/scenarios.py
+#
+# One request template per API route, shared by the in-process suite and the
+# HTTP load generator. Each scenario turns a random generator plus a pool of
+# existing ids into a concrete request.
+
+import random
+from collections import deque
+from urllib.parse import quote
+
+from sqlalchemy import func, select
+
+from models import User, Business, Customer, Product, Order, OrderItem
+
+SAMPLE_SIZE = 1000
+SEARCH_TERMS = ["silk", "dress", "leather san", "gold ear", "oud", "evening abaya", "cot"]
+
+
+class Scenario:
+    def __init__(self, name, method, path, body=None, created=None, consumes=None, weight=1):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        # key in the shared state to push the new row's id to, or pop one from
+        self.created = created
+        self.consumes = consumes
+        self.weight = weight
+
+    def request(self, rng, ids, state):
+        """Return (method, path, json body) or None when nothing is available."""
+        target = None
+        if self.consumes:
+            if not state[self.consumes]:
+                return None
+            target = state[self.consumes].popleft()
+        path = self.path(rng, ids, target) if callable(self.path) else self.path
+        body = self.body(rng, ids) if self.body else None
+        return self.method, path, body
+
+    def record(self, state, status, payload):
+        if self.created and status in (200, 201) and isinstance(payload, dict):
+            state[self.created].append(payload[self.created])
+
+
+def new_state():
+    return {"product_id": deque(), "user_id": deque()}
+
+
+def _product_body(rng, ids):
+    price = rng.randint(100, 20000)
+    return {"name": f"Benchmark Item {rng.randint(1, 10 ** 9)}", "price": price, "bulk_price": price * 0.9,
+            "min_bulk_quantity": 10, "stock_quantity": 100, "business_id": rng.choice(ids["vendor_id"]),
+            "category_id": rng.randint(1, 8), "description": "Generated by the benchmark suite"}
+
+
+def _price_list_body(rows):
+    def body(rng, ids):
+        return [{"product_id": product_id, "price": rng.randint(100, 20000)}
+                for product_id in rng.sample(ids["product_id"], min(rows, len(ids["product_id"])))]
+    return body
+
+
+def _user_body(rng, ids):
+    n = rng.randint(1, 10 ** 9)
+    return {"full_name": f"Bench User {n}", "email": f"bench{n}@example.com", "password": "password123",
+            "phone": "0700000000", "role": "customer"}
+
+
+def _checkout_body(rng, ids):
+    return {"customer_id": rng.choice(ids["customer_id"]),
+            "items": [{"product_id": product_id, "quantity": rng.choice([1, 2, 3, 12])}
+                      for product_id in set(rng.sample(ids["product_id"], rng.randint(1, 4)))],
+            "order_type": "retail", "payment_method": "mpesa", "delivery_address": "Eastleigh 1st Avenue"}
+
+
+def _quote_body(lines):
+    def body(rng, ids):
+        return {"customer_id": rng.choice(ids["customer_id"]),
+                "items": [{"product_id": product_id, "quantity": rng.randint(1, 60)}
+                          for product_id in rng.sample(ids["product_id"], min(lines, len(ids["product_id"])))]}
+    return body
+
+
+def scenarios():
+    return [
+        Scenario("GET /", "GET", "/", weight=1),
+        Scenario("GET /users?limit=50", "GET", "/users?limit=50", weight=2),
+        Scenario("GET /users?email=", "GET", lambda rng, ids, _: f"/users?email={quote(rng.choice(ids['email']))}"),
+        Scenario("GET /users/:id", "GET", lambda rng, ids, _: f"/users/{rng.choice(ids['user_id'])}", weight=3),
+        Scenario("GET /users/:id/customer", "GET",
+                 lambda rng, ids, _: f"/users/{rng.choice(ids['customer_user_id'])}/customer", weight=3),
+        Scenario("GET /users/:id/business", "GET",
+                 lambda rng, ids, _: f"/users/{rng.choice(ids['vendor_user_id'])}/business", weight=2),
+        Scenario("POST /login", "POST", "/login",
+                 lambda rng, ids: {"email": rng.choice(ids["email"]), "password": "password123"}, weight=2),
+        Scenario("GET /customers?limit=50", "GET", "/customers?limit=50"),
+        Scenario("GET /customers/:id", "GET", lambda rng, ids, _: f"/customers/{rng.choice(ids['customer_id'])}"),
+        Scenario("GET /products?limit=50", "GET", "/products?limit=50", weight=10),
+        Scenario("GET /products?business_id=", "GET",
+                 lambda rng, ids, _: f"/products?business_id={rng.choice(ids['vendor_id'])}&limit=50", weight=8),
+        Scenario("GET /products/:id", "GET", lambda rng, ids, _: f"/products/{rng.choice(ids['product_id'])}",
+                 weight=20),
+        Scenario("GET /products/:id?expand=business", "GET",
+                 lambda rng, ids, _: f"/products/{rng.choice(ids['product_id'])}?expand=business", weight=5),
+        Scenario("GET /products/search", "GET",
+                 lambda rng, ids, _: f"/products/search?q={quote(rng.choice(SEARCH_TERMS))}&limit=20", weight=10),
+        Scenario("GET /products/:id/total_sold", "GET",
+                 lambda rng, ids, _: f"/products/{rng.choice(ids['product_id'])}/total_sold", weight=2),
+        Scenario("GET /businesses?limit=50", "GET", "/businesses?limit=50", weight=4),
+        Scenario("GET /businesses/:id", "GET", lambda rng, ids, _: f"/businesses/{rng.choice(ids['vendor_id'])}",
+                 weight=5),
+        Scenario("GET /businesses/:id/total_revenue", "GET",
+                 lambda rng, ids, _: f"/businesses/{rng.choice(ids['vendor_id'])}/total_revenue", weight=2),
+        Scenario("GET /businesses/:id/dashboard", "GET",
+                 lambda rng, ids, _: f"/businesses/{rng.choice(ids['vendor_id'])}/dashboard", weight=2),
+        Scenario("GET /orders?customer_id=", "GET",
+                 lambda rng, ids, _: f"/orders?customer_id={rng.choice(ids['customer_id'])}&limit=50", weight=3),
+        Scenario("GET /orders/:id", "GET", lambda rng, ids, _: f"/orders/{rng.choice(ids['order_id'])}", weight=3),
+        Scenario("GET /orders/:id/items", "GET",
+                 lambda rng, ids, _: f"/orders/{rng.choice(ids['order_id'])}/items", weight=3),
+        Scenario("GET /order_items?order_id=", "GET",
+                 lambda rng, ids, _: f"/order_items?order_id={rng.choice(ids['order_id'])}"),
+        Scenario("GET /order_items/:id", "GET",
+                 lambda rng, ids, _: f"/order_items/{rng.choice(ids['order_item_id'])}"),
+        Scenario("POST /checkout", "POST", "/checkout", _checkout_body, weight=3),
+        Scenario("POST /pricing/quote (5 lines)", "POST", "/pricing/quote", _quote_body(5), weight=3),
+        Scenario("POST /pricing/quote (500 lines)", "POST", "/pricing/quote", _quote_body(500)),
+        Scenario("POST /products", "POST", "/products", _product_body, created="product_id"),
+        Scenario("PATCH /products/:id", "PATCH", lambda rng, ids, _: f"/products/{rng.choice(ids['product_id'])}",
+                 lambda rng, ids: {"stock_quantity": rng.randint(0, 500)}),
+        Scenario("PATCH /products/bulk (1000 prices)", "PATCH", "/products/bulk", _price_list_body(1000)),
+        Scenario("DELETE /products/:id", "DELETE", lambda rng, ids, target: f"/products/{target}",
+                 consumes="product_id"),
+        Scenario("POST /users", "POST", "/users", _user_body, created="user_id"),
+        Scenario("PATCH /users/:id", "PATCH", lambda rng, ids, _: f"/users/{rng.choice(ids['user_id'])}",
+                 lambda rng, ids: {"phone": f"07{rng.randint(10000000, 99999999)}"}),
+        Scenario("DELETE /users/:id", "DELETE", lambda rng, ids, target: f"/users/{target}", consumes="user_id"),
+        Scenario("PATCH /orders/:id", "PATCH", lambda rng, ids, _: f"/orders/{rng.choice(ids['order_id'])}",
+                 lambda rng, ids: {"delivery_address": f"Eastleigh {rng.randint(1, 12)}th Street"}),
+        Scenario("PATCH /orders/status (100 orders)", "PATCH", "/orders/status",
+                 lambda rng, ids: {"order_ids": rng.sample(ids["order_id"], min(100, len(ids["order_id"]))),
+                                   "delivery_status": rng.choice(["shipped", "in_transit", "delivered"])}),
+    ]
+
+
+def _sample(connection, column, count, rng):
+    # ids are mostly dense, so draw random values between min and max and
+    # keep the ones that exist; much cheaper than ORDER BY RANDOM() on big tables
+    low, high = connection.execute(select(func.min(column), func.max(column))).one()
+    if low is None:
+        return []
+    candidates = {rng.randint(low, high) for _ in range(count * 2)}
+    found = [row[0] for row in connection.execute(select(column).where(column.in_(candidates)))]
+    return found[:count] or [row[0] for row in connection.execute(select(column).limit(count))]
+
+
+def sample_ids(connection, seed=42, count=SAMPLE_SIZE):
+    """Pick existing ids for every scenario straight from the database."""
+    rng = random.Random(seed)
+    user_ids = _sample(connection, User.user_id, count, rng)
+    vendor_ids = _sample(connection, Business.vendor_id, count, rng)
+    customer_ids = _sample(connection, Customer.customer_id, count, rng)
+    return {
+        "user_id": user_ids,
+        "email": [row[0] for row in connection.execute(select(User.email).where(User.user_id.in_(user_ids)))],
+        "vendor_id": vendor_ids,
+        "vendor_user_id": [row[0] for row in connection.execute(
+            select(Business.user_id).where(Business.vendor_id.in_(vendor_ids)))],
+        "customer_id": customer_ids,
+        "customer_user_id": [row[0] for row in connection.execute(
+            select(Customer.user_id).where(Customer.customer_id.in_(customer_ids)))],
+        "product_id": _sample(connection, Product.product_id, count, rng),
+        "order_id": _sample(connection, Order.order_id, count, rng),
+        "order_item_id": _sample(connection, OrderItem.order_item_id, count, rng),
+    }
@@ -0,0 +1,102 @@
+# server/benchmarks/search.py
+#
+# Times /products/search queries against a large synthetic catalogue.
+#
+#   cd server
+#   python -m benchmarks.search --products 1000000
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from models import db, User, Business, Product
+from search import search_products
+from benchmarks.query_plans import _batches
+
+WORDS = [
+    "dress", "abaya", "hijab", "scarf", "shoes", "sandals", "heels", "perfume", "oud", "musk",
+    "earrings", "necklace", "bangle", "handbag", "wallet", "shirt", "kanzu", "jeans", "jacket",
+    "cotton", "silk", "leather", "gold", "silver", "evening", "casual", "wedding", "classic",
+]
+QUERIES = ["dress", "silk sca", "leather sh", "oud", "gold ear", "evening dress", "wed"]
+
+
+def vocabulary(rng, size=20000):
+    # catalogue words plus a long tail of rarer ones, drawn with a Zipf-like
+    # skew so common terms match many products and most terms match few
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    tail = {"".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)}
+    words = WORDS + sorted(tail - set(WORDS))
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 10) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def populate(engine, vendors, products, seed=42):
+    rng = random.Random(seed)
+    words, cum_weights = vocabulary(rng)
+
+    def description():
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(8, 20)))
+
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {"user_id": i, "full_name": f"Vendor {i}", "email": f"vendor{i}@example.com",
+             "password": "password123", "role": "vendor"}
+            for i in range(1, vendors + 1)
+        ])
+        conn.execute(insert(Business.__table__), [
+            {"vendor_id": i, "user_id": i, "business_name": f"Business {i}"}
+            for i in range(1, vendors + 1)
+        ])
+        rows = (
+            {"product_id": i, "business_id": rng.randint(1, vendors),
+             "name": " ".join(rng.choices(words, cum_weights=cum_weights, k=3)).title(), "description": description(),
+             "price": round(rng.uniform(50, 20000), 2), "category_id": rng.randint(1, 20)}
+            for i in range(1, products + 1)
+        )
+        for batch in _batches(rows):
+            conn.execute(insert(Product.__table__), batch)
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="mtaani-bench-")
+    path = os.path.join(workdir, "search.db")
+    engine = create_engine(f"sqlite:///{path}")
+
+    db.metadata.create_all(engine)
+    print(f"Populating {args.products} products in {path} ...")
+    populate(engine, args.vendors, args.products)
+
+    filters = [{}, {"max_price": 2000}, {"business_id": args.vendors // 2}, {"category_id": 3, "min_price": 500}]
+    with Session(engine) as session:
+        for q in QUERIES:
+            for extra in filters:
+                search_products(session, q, **extra)
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    results = search_products(session, q, limit=args.limit, **extra)
+                elapsed = (time.perf_counter() - start) / args.repeat * 1000
+                print(f"{q!r:16} {str(extra):40} {elapsed:8.2f} ms  {len(results)} results")
+
+    engine.dispose()
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time product full-text search")
+    parser.add_argument("--vendors", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# server/benchmarks/suite.py
+#
+# Drives every API route through the Flask test client against a synthetic
+# database and reports latency percentiles, throughput and SQL statements per
+# request for each endpoint.
+#
+#   cd server
+#   python -m benchmarks.suite --scale medium --save benchmarks/results/baseline.json
+#   python -m benchmarks.suite --scale medium --compare benchmarks/results/baseline.json
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from app import create_app
+from config import ProductionConfig
+from loaders import statement_count
+from models import db
+from benchmarks import datagen, report
+from benchmarks.scenarios import scenarios, new_state, sample_ids
+
+
+def benchmark_app(path):
+    # queued jobs are left in the database; their workers would only compete
+    # with the requests being measured. Dashboards are measured uncached.
+    config = type("BenchmarkConfig", (ProductionConfig,),
+                  {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "JOB_WORKERS": 0, "DASHBOARD_TTL_SECONDS": 0})
+    app = create_app(config)
+    statements = []
+
+    @app.after_request
+    def record_statements(response):
+        statements.append(statement_count())
+        return response
+
+    return app, statements
+
+
+def run_scenario(client, scenario, ids, state, rng, iterations, statements):
+    latencies = []
+    counts = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request = scenario.request(rng, ids, state)
+        if request is None:
+            break
+        method, path, body = request
+        del statements[:]
+
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        counts.extend(statements)
+        if response.status_code >= 400:
+            errors += 1
+        scenario.record(state, response.status_code, response.get_json(silent=True))
+    return report.summarize(latencies, time.perf_counter() - started, counts, errors)
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="mtaani-bench-")
+    path = os.path.join(workdir, "bench.db")
+    if args.database:
+        # work on a copy so the writes below never change the source dataset
+        shutil.copyfile(args.database, path)
+        parameters = {"database": args.database}
+    else:
+        parameters = datagen.build(path, args.scale, args.seed, vendors=args.vendors, customers=args.customers,
+                                   products=args.products, order_items=args.order_items)
+        parameters["scale"] = args.scale
+    parameters.update(iterations=args.iterations, seed=args.seed)
+
+    app, statements = benchmark_app(path)
+    with app.app_context():
+        ids = sample_ids(db.session.connection(), args.seed)
+        db.session.rollback()
+
+    rng = random.Random(args.seed)
+    state = new_state()
+    results = {}
+    client = app.test_client()
+    selected = [scenario for scenario in scenarios() if not args.only or args.only in scenario.name]
+
+    for scenario in selected:
+        run_scenario(client, scenario, ids, state, rng, args.warmup, statements)
+    for scenario in selected:
+        results[scenario.name] = run_scenario(client, scenario, ids, state, rng, args.iterations, statements)
+
+    print()
+    report.print_table(results)
+
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        report.save(args.save, "suite", parameters, results)
+    if args.compare and report.compare(args.compare, results, args.threshold):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API route through the Flask test client")
+    datagen.add_size_arguments(parser)
+    parser.add_argument("--database", help="Existing database made by benchmarks.datagen (used read-only)")
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", help="Only run endpoints whose name contains this text")
+    parser.add_argument("--save", help="Write the results as JSON to this path")
+    parser.add_argument("--compare", help="Compare with a saved run; exits 1 on regression")
+    parser.add_argument("--threshold", type=float, default=report.REGRESSION_THRESHOLD,
+                        help="Allowed p95 slowdown before a route counts as regressed (0.2 = 20%%)")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# server/bulk_load.py
+
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, Integer, Numeric, DateTime, Boolean
+
+from models import (db, User, Business, Customer, Product, Order, OrderItem, ProductSales, BusinessSales,
+                    StockReservation, ProductImage, SalesRollup, OrderStatusChange)
+from aggregates import rebuild as rebuild_sales
+from analytics import rebuild as rebuild_rollups, ROLLUPS_BUILT
+from caching import bump_versions, write_versions
+from pricing import PRICES_VERSION
+
+try:
+    import pyarrow.parquet as parquet
+except ImportError:  # Parquet import is optional
+    parquet = None
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+
+# parents before children, so foreign keys always point at loaded rows
+LOAD_ORDER = [User, Business, Customer, Product, Order, OrderItem]
+MODELS = {model.__tablename__: model for model in LOAD_ORDER}
+
+# derived tables, emptied with the rest and rebuilt after a load
+DERIVED = [ProductSales, BusinessSales, SalesRollup]
+# never loaded, but they reference loaded rows, so a clear empties them first
+DEPENDENT = [StockReservation, ProductImage, OrderStatusChange]
+
+
+class BulkLoadError(ValueError):
+    def __init__(self, table, errors):
+        shown = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(shown)
+        message = f"{table}: " + "; ".join(shown) + (f" (and {more} more)" if more else "")
+        super().__init__(message)
+        self.table = table
+        self.errors = errors
+
+
+# ============================================
+# Readers
+# ============================================
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_parquet(path):
+    if parquet is None:
+        raise click.ClickException("Reading Parquet files requires pyarrow (pip install pyarrow)")
+    for batch in parquet.ParquetFile(path).iter_batches(batch_size=BATCH_SIZE):
+        yield from batch.to_pylist()
+
+
+READERS = {".csv": read_csv, ".ndjson": read_ndjson, ".jsonl": read_ndjson, ".parquet": read_parquet}
+
+
+def read_file(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise click.ClickException(f"Unsupported file type {extension!r} (use {', '.join(READERS)})")
+    return READERS[extension](path)
+
+
+# ============================================
+# Column-wise conversion and validation
+# ============================================
+def _converter(column):
+    # file formats like CSV give strings; turn them into the column's type
+    kind = column.type
+    if isinstance(kind, Boolean):
+        return lambda value: value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes")
+    if isinstance(kind, Integer):
+        return int
+    if isinstance(kind, Numeric):
+        return lambda value: value if isinstance(value, Decimal) else Decimal(str(value))
+    if isinstance(kind, DateTime):
+        return lambda value: value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return lambda value: value if isinstance(value, str) else str(value)
+
+
+def _required(column):
+    return (not column.nullable and column.default is None and column.server_default is None
+            and not (column.primary_key and column.autoincrement in (True, "auto")))
+
+
+def validate_rows(model, rows, numbers, partial=False):
+    """Convert and validate dicts for ``model`` a column at a time.
+
+    Every value of a column goes through its type conversion and the
+    model's ``@validates`` hook in one tight loop, instead of building an
+    ORM object per row. ``numbers`` are the row numbers used in errors.
+    With ``partial`` only the keys each row has are checked (updates), so
+    required columns may be left out. Returns the cleaned rows and a list
+    of ``(row_number, message)`` errors; the number is ``None`` for errors
+    about a whole column.
+    """
+    table = model.__table__
+    validators = model.__mapper__.validators
+    unknown = {key for row in rows for key in row} - set(table.c.keys())
+    errors = [(None, f"unknown column {name!r}") for name in sorted(unknown)]
+
+    cleaned = [{} for _ in rows]
+    for column in table.columns:
+        if not any(column.key in row for row in rows):
+            if _required(column) and not partial:
+                errors.append((None, f"missing required column {column.key!r}"))
+            continue
+
+        convert = _converter(column)
+        validate = validators[column.key][0] if column.key in validators else None
+        for number, row, clean in zip(numbers, rows, cleaned):
+            if partial and column.key not in row:
+                continue
+            value = row.get(column.key)
+            if value == "" or value is None:
+                value = None
+            else:
+                try:
+                    value = convert(value)
+                except (ValueError, TypeError, InvalidOperation):
+                    errors.append((number, f"{column.key} has invalid value {value!r}"))
+                    continue
+            if value is None and _required(column):
+                errors.append((number, f"{column.key} is required"))
+            elif validate is not None:
+                try:
+                    value = validate(None, column.key, value)
+                except ValueError as e:
+                    errors.append((number, str(e)))
+            clean[column.key] = value
+    return cleaned, errors
+
+
+def prepare(model, rows, offset=0):
+    """Convert and validate a batch of dicts for ``model`` with :func:`validate_rows`.
+
+    Returns the cleaned rows and a list of error messages (row numbers
+    count from ``offset``).
+    """
+    cleaned, errors = validate_rows(model, rows, range(offset + 1, offset + len(rows) + 1))
+    return cleaned, [message if number is None else f"row {number}: {message}" for number, message in errors]
+
+
+# ============================================
+# Loading
+# ============================================
+@contextmanager
+def relaxed_pragmas(connection):
+    # durability is not needed while a whole refresh sits in one transaction:
+    # if it fails the load is simply run again. SQLite only accepts these
+    # outside a transaction, so they wrap connection.begin()
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    previous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+    connection.exec_driver_sql("PRAGMA synchronous=OFF")
+    connection.commit()
+    try:
+        yield
+    finally:
+        connection.exec_driver_sql(f"PRAGMA synchronous={previous}")
+        connection.commit()
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_rows(connection, model, rows, batch_size=BATCH_SIZE):
+    """Insert an iterable of dicts into ``model``'s table with executemany batches.
+
+    Every batch is validated before anything is written; the first invalid
+    batch raises :class:`BulkLoadError`. Returns the number of rows inserted.
+    """
+    table = model.__table__
+    count = 0
+    for batch in _batches(rows, batch_size):
+        cleaned, errors = prepare(model, batch, count)
+        if errors:
+            raise BulkLoadError(table.name, errors)
+        connection.execute(insert(table), cleaned)
+        count += len(cleaned)
+    return count
+
+
+def clear(connection, models=LOAD_ORDER):
+    """Delete every row of ``models`` (and the derived tables) with Core DELETEs."""
+    for model in DEPENDENT + DERIVED + list(reversed(models)):
+        connection.execute(delete(model.__table__))
+
+
+def finish_load(connection, tables):
+    # Core inserts skip the ORM hooks: rebuild the sales aggregates and
+    # rollups and bump the cache versions of everything that changed
+    if {"orders", "order_items", "products", "businesses", "customers"} & set(tables):
+        rebuild_sales(connection)
+        rebuild_rollups(connection)
+        tables = list(tables) + [ROLLUPS_BUILT]
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("ANALYZE")
+    if "products" in tables:
+        tables = list(tables) + [PRICES_VERSION]
+    # the load commits on this connection, not through a session
+    write_versions(connection, tables)
+
+
+def table_for(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name not in MODELS:
+        raise click.ClickException(f"Cannot tell the table for {path}; name it after one of: {', '.join(MODELS)}")
+    return name
+
+
+def load_files(paths, replace=False, batch_size=BATCH_SIZE, log=click.echo):
+    """Load files named after their tables (``users.csv``, ``products.parquet``...)
+    in dependency order, all in one transaction."""
+    by_table = {}
+    for path in paths:
+        by_table.setdefault(table_for(path), []).append(path)
+
+    with db.engine.connect() as connection, relaxed_pragmas(connection):
+        with connection.begin():
+            if replace:
+                clear(connection)
+            for model in LOAD_ORDER:
+                for path in by_table.get(model.__tablename__, []):
+                    start = time.perf_counter()
+                    count = load_rows(connection, model, read_file(path), batch_size)
+                    log(f"{model.__tablename__}: {count} rows from {path} in {time.perf_counter() - start:.2f}s")
+            finish_load(connection, list(MODELS) if replace else list(by_table))
+
+
+data_cli = AppGroup("data", help="Bulk load and clear the database.")
+
+
+@data_cli.command("load")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=True))
+@click.option("--replace", is_flag=True, help="Empty all tables before loading.")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True)
+def load_command(paths, replace, batch_size):
+    """Load CSV, NDJSON or Parquet files named after their tables.
+
+    A directory loads every supported file inside it.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if os.path.splitext(name)[1].lower() in READERS)
+        else:
+            files.append(path)
+    try:
+        load_files(files, replace, batch_size)
+    except BulkLoadError as e:
+        raise click.ClickException(str(e))
+
+
+@data_cli.command("clear")
+def clear_command():
+    """Delete all rows from every table."""
+    clear(db.session.connection())
+    bump_versions(db.session, list(MODELS) + [PRICES_VERSION])
+    db.session.commit()
+    click.echo("All tables cleared.")
@@ -0,0 +1,249 @@
+# server/caching.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, has_app_context, request, Response
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, TableVersion
+from pagination import wants_stream
+from serializers import expansion_tree, SerializationError
+
+DEFAULT_CACHE_SIZE = 256
+
+table_versions = TableVersion.__table__
+
+
+# ============================================
+# Table versions
+# ============================================
+def write_versions(connection, tables):
+    """Increment the version of each table in ``tables`` on ``connection``."""
+    tables = sorted(set(tables) - {table_versions.name})
+    if not tables:
+        return
+    dialects = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+    now = datetime.utcnow()
+    stmt = dialects[connection.dialect.name](table_versions)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["table_name"],
+        set_={"version": table_versions.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    connection.execute(stmt, [{"table_name": name, "version": 1, "updated_at": now} for name in tables])
+
+
+def bump_versions(session, tables):
+    """Bump the version of each table in ``tables`` once ``session``'s
+    transaction commits.
+
+    The versions are written after the commit in a short transaction of
+    their own, so concurrent writers never queue on the shared
+    ``table_versions`` rows for the length of their transactions. A reader
+    can see the new data under the old version for that moment.
+
+    ORM flushes are handled by the hook below; code that writes with Core
+    statements must call this itself.
+    """
+    tables = set(tables) - {table_versions.name}
+    if tables:
+        session.info.setdefault("bumped_tables", set()).update(tables)
+
+
+def current_versions(tables):
+    rows = db.session.execute(
+        select(table_versions.c.table_name, table_versions.c.version, table_versions.c.updated_at)
+        .where(table_versions.c.table_name.in_(tables))
+    ).all()
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+    return {name: found.get(name, (0, None)) for name in tables}
+
+
+def _changed_tables(session):
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(obj.__table__.name)
+    return tables
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session, flush_context):
+    bump_versions(session, _changed_tables(session))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_tables(session):
+    tables = session.info.pop("bumped_tables", None)
+    if not tables:
+        return
+    try:
+        with session.get_bind().begin() as connection:
+            write_versions(connection, tables)
+    except SQLAlchemyError:
+        # the write itself is committed; its ETags catch up with the next
+        # write to the same tables
+        if has_app_context():
+            current_app.logger.exception("Could not bump table versions of %s", ", ".join(sorted(tables)))
+    response_cache.invalidate(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_tables(session):
+    session.info.pop("bumped_tables", None)
+
+
+# ============================================
+# Response cache
+# ============================================
+class ResponseCache:
+    """Thread-safe LRU of rendered responses tagged with their source tables."""
+
+    def __init__(self, size=DEFAULT_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, tables, response):
+        entry = (frozenset(tables), response.get_data(), response.status_code, response.mimetype)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] & set(tables)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+class TTLCache:
+    """Thread-safe LRU whose entries expire ``ttl`` seconds after being set.
+
+    For computed summaries that may be a few seconds stale, where tracking
+    every table they read is not worth it.
+    """
+
+    def __init__(self, ttl, size=DEFAULT_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def dependent_tables(model, expand):
+    tables = {model.__table__.name}
+
+    def walk(model, tree):
+        relationships = model.__mapper__.relationships
+        for name, subtree in tree.items():
+            if name not in relationships:
+                raise SerializationError(name)
+            target = relationships[name].mapper.class_
+            tables.add(target.__table__.name)
+            walk(target, subtree)
+
+    walk(model, expansion_tree([part for part in (expand or "").split(",") if part.strip()]))
+    return tables
+
+
+def conditional_get(model):
+    """Add ETag/Last-Modified validation and response caching to a GET.
+
+    The ETag is derived from the URL and the versions of every table the
+    response reads (``model`` plus anything in ``?expand=``), so any write
+    to those tables changes it. Matching ``If-None-Match`` or
+    ``If-Modified-Since`` headers get a 304 without running the handler.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            # admin responses must not be served from the shared cache
+            if wants_stream() or request.args.get("profile") == "admin":
+                return fn(*args, **kwargs)
+
+            try:
+                tables = dependent_tables(model, request.args.get("expand"))
+            except SerializationError:
+                return fn(*args, **kwargs)
+
+            versions = current_versions(tables)
+            fingerprint = request.full_path + "|" + ",".join(
+                f"{name}:{version}" for name, (version, _) in sorted(versions.items())
+            )
+            etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+            modified = [updated_at for _, updated_at in versions.values() if updated_at]
+
+            cached = response_cache.get(etag)
+            if cached is not None:
+                _, body, status, mimetype = cached
+                response = Response(body, status=status, mimetype=mimetype)
+            else:
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response_cache.set(etag, tables, response)
+
+            response.set_etag(etag)
+            if modified:
+                response.last_modified = max(modified)
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config.get("CATALOGUE_MAX_AGE", 0)
+            response.cache_control.must_revalidate = True
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
+
+
+def init_response_cache(app):
+    response_cache.size = app.config.get("RESPONSE_CACHE_SIZE", DEFAULT_CACHE_SIZE)
@@ -0,0 +1,109 @@
+# server/checkout.py
+
+from sqlalchemy import insert, select, func
+from models import db, Order, OrderItem
+from aggregates import apply_sales, sale_line
+from caching import bump_versions
+from events import journal_created
+from inventory import reserve, InsufficientStock
+from notifications import queue_order_confirmation
+from pricing import quote, PricingError
+
+ORDER_FIELDS = ["order_type", "payment_method", "transaction_reference", "delivery_address"]
+
+
+class CheckoutError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_items(items):
+    if not isinstance(items, list) or not items:
+        raise CheckoutError("items must be a non-empty list")
+
+    # repeated cart lines for the same product collapse into one order item
+    quantities = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise CheckoutError("each item must be an object")
+
+        product_id = item.get("product_id")
+        quantity = item.get("quantity")
+
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            raise CheckoutError("product_id is required for every item")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise CheckoutError("Quantity must be greater than zero")
+
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def place_order(customer, items, order_fields=None):
+    """Create an order and all of its items in a single transaction.
+
+    Line prices come from the pricing engine (not the client) and the items
+    are written with one executemany INSERT.  Stock for every line is
+    reserved with one conditional UPDATE; nothing is committed if any line
+    is invalid or any product is out of stock.
+    """
+    quantities = parse_items(items)
+    order_fields = order_fields or {}
+
+    try:
+        lines = quote(quantities, customer.customer_type)
+    except PricingError as e:
+        raise CheckoutError(str(e), e.status)
+    for line in lines:
+        del line["line_total"]
+
+    total_amount = sum(line["unit_price"] * line["quantity"] for line in lines)
+
+    try:
+        order = Order(
+            customer_id=customer.customer_id,
+            total_amount=total_amount,
+            order_status="pending",
+            payment_status="unpaid",
+            delivery_status="not_shipped",
+            **{field: order_fields.get(field) for field in ORDER_FIELDS}
+        )
+        db.session.add(order)
+        db.session.flush()
+        # reserve first so an out-of-stock order gives up its write lock early
+        reserve(db.session, order, quantities)
+
+        for line in lines:
+            line["order_id"] = order.order_id
+        db.session.execute(insert(OrderItem), lines)
+
+        # bulk INSERTs skip the ORM flush hooks, so update the sales
+        # aggregates explicitly in the same transaction
+        apply_sales(db.session.connection(), [
+            sale_line(order.order_id, line["product_id"], line["quantity"], line["unit_price"])
+            for line in lines
+        ])
+        bump_versions(db.session, [OrderItem.__tablename__])
+        journal_created(db.session, OrderItem, OrderItem.order_id == order.order_id)
+        # the email goes out from the job queue once this commits
+        queue_order_confirmation(db.session, order.order_id)
+
+        db.session.commit()
+    except InsufficientStock as e:
+        db.session.rollback()
+        raise CheckoutError(str(e), e.status)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return order
+
+
+def refresh_total(order):
+    """Set ``order.total_amount`` to the sum of its items as stored."""
+    db.session.flush()
+    order.total_amount = db.session.scalar(
+        select(func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0))
+        .where(OrderItem.order_id == order.order_id)
+    )
@@ -2,7 +2,122 @@
 
 import os
 
+
+def _optional_float(name, default):
+    # an empty value or "off" in the environment gives None
+    value = os.environ.get(name, default)
+    if value is None or str(value).strip().lower() in ("", "off", "none"):
+        return None
+    return float(value)
+
+
 class Config:
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///market_mtaani.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JSON_COMPACT = False
\ No newline at end of file
+    JSON_COMPACT = False
+    # 'orjson' (falls back to 'stdlib' when orjson is not installed)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    DEBUG = False
+    CORS_ORIGINS = ["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:5173"]
+    # Max SQL statements per request; exceeding it raises (set in tests)
+    SQL_STATEMENT_BUDGET = None
+    # Rendered catalogue responses kept in memory, keyed by ETag
+    RESPONSE_CACHE_SIZE = 256
+    CATALOGUE_MAX_AGE = 0
+    # Add a Server-Timing header (db, serialize, total) to every response
+    SERVER_TIMING = True
+    # Sent as X-Admin-Token to reach /admin routes; unset closes them except
+    # in tests
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    # Vendor dashboards are recomputed at most this often per vendor
+    DASHBOARD_TTL_SECONDS = int(os.environ.get('DASHBOARD_TTL_SECONDS', 30))
+    # Stock held for an unpaid pending order is returned after this long
+    # (flask inventory release-expired)
+    RESERVATION_TIMEOUT_MINUTES = int(os.environ.get('RESERVATION_TIMEOUT_MINUTES', 30))
+
+    # Uploaded product images are stored by SHA-256 under IMAGE_STORAGE
+    # (default instance/images); thumbnails (longest side in pixels) are made
+    # by IMAGE_WORKERS background threads when Pillow is installed
+    IMAGE_STORAGE = os.environ.get('IMAGE_STORAGE')
+    MAX_IMAGE_BYTES = 10 * 1024 * 1024
+    IMAGE_SIZES = {'thumb': 200, 'medium': 600}
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    IMAGE_MAX_AGE = 365 * 24 * 3600
+
+    # Order emails, delivery notifications and stock reconciliation run as
+    # jobs queued in the database, on JOB_WORKERS threads per process (0
+    # leaves them to `flask jobs work`). Failed jobs are retried after
+    # JOB_BACKOFF_SECONDS, doubling up to JOB_BACKOFF_MAX_SECONDS.
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_POLL_SECONDS = 5
+    JOB_LEASE_SECONDS = 300
+    JOB_MAX_ATTEMPTS = 5
+    JOB_BACKOFF_SECONDS = 10
+    JOB_BACKOFF_MAX_SECONDS = 3600
+
+    # GET /events waits at most EVENTS_MAX_WAIT_SECONDS for new order events,
+    # looking for events committed by other processes every
+    # EVENTS_POLL_SECONDS; `flask events compact` keeps EVENTS_RETENTION_DAYS
+    EVENTS_MAX_WAIT_SECONDS = 25
+    EVENTS_POLL_SECONDS = 1
+    EVENTS_RETENTION_DAYS = 14
+
+    # Outgoing mail (Flask-Mail); without MAIL_SERVER messages are only logged
+    MAIL_SERVER = os.environ.get('MAIL_SERVER')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', '1') == '1'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'orders@marketmtaani.co.ke')
+
+    # Statements slower than this are written with their query plan to
+    # SLOW_QUERY_LOG (default instance/slow_queries.log); None (an empty
+    # or "off" SLOW_QUERY_THRESHOLD_MS) turns it off
+    SLOW_QUERY_THRESHOLD_MS = _optional_float('SLOW_QUERY_THRESHOLD_MS', 100)
+    SLOW_QUERY_EXPLAIN = True
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')
+    SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 5
+
+    # Applied to every new SQLite connection. WAL lets readers run alongside
+    # a writer, and busy_timeout makes writers wait for the lock instead of
+    # failing straight away with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+        'temp_store': 'MEMORY',
+    }
+
+    # Connection pool for server databases (PostgreSQL); ignored for SQLite.
+    # Size it so workers * (pool_size + max_overflow) stays under the
+    # server's max_connections.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    JSON_COMPACT = True
+    CORS_ORIGINS = [origin for origin in os.environ.get('CORS_ORIGINS', '').split(',') if origin] \
+        or Config.CORS_ORIGINS
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
+
+
+def get_config(config=None):
+    config = config or os.environ.get('FLASK_CONFIG') or 'development'
+    if isinstance(config, str):
+        return CONFIGS[config]
+    return config
@@ -0,0 +1,179 @@
+# server/dashboard.py
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import select, func, case
+
+from models import db, Order, OrderItem, Product, ProductSales, BusinessSales
+from caching import TTLCache
+from analytics import rollups, rollups_built, DAY, BUSINESS
+from pricing import CENTS
+
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_LOW_STOCK = 10
+DAYS = 30
+WEEKS = 12
+TOP_PRODUCTS = 5
+LIST_LIMIT = 20
+OPEN_ORDER_STATUSES = ("pending", "confirmed", "processing")
+
+dashboard_cache = TTLCache(DEFAULT_TTL_SECONDS)
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENTS)
+
+
+def _stock(business_id, low_stock):
+    count, units, value, low, out = db.session.execute(
+        select(
+            func.count(),
+            func.sum(Product.stock_quantity),
+            func.sum(Product.stock_quantity * Product.price),
+            func.sum(case((Product.stock_quantity <= low_stock, 1), else_=0)),
+            func.sum(case((Product.stock_quantity == 0, 1), else_=0)),
+        ).where(Product.business_id == business_id)
+    ).one()
+    low_products = db.session.execute(
+        select(Product.product_id, Product.name, Product.stock_quantity)
+        .where(Product.business_id == business_id, Product.stock_quantity <= low_stock)
+        .order_by(Product.stock_quantity, Product.product_id)
+        .limit(LIST_LIMIT)
+    ).all()
+    return {
+        "product_count": count,
+        "units_in_stock": units or 0,
+        "stock_value": _money(value),
+        "low_stock_count": low or 0,
+        "out_of_stock_count": out or 0,
+        "low_stock_threshold": low_stock,
+        "low_stock": [{"product_id": product_id, "name": name, "stock_quantity": stock}
+                      for product_id, name, stock in low_products],
+    }
+
+
+def _revenue(business_id, today):
+    # the vendor's sales of the last WEEKS weeks by day, from the daily
+    # rollups once they are built, otherwise in one grouped pass over the
+    # order items; the daily and weekly series are both cut from it
+    first_week = today - timedelta(days=today.weekday() + 7 * (WEEKS - 1))
+    since = datetime.combine(first_week, datetime.min.time())
+    if rollups_built():
+        rows = db.session.execute(
+            select(rollups.c.bucket, rollups.c.revenue, rollups.c.units_sold, rollups.c.orders)
+            .where(rollups.c.granularity == DAY, rollups.c.dimension == BUSINESS,
+                   rollups.c.key == str(business_id), rollups.c.bucket >= since)
+        ).all()
+    else:
+        day = func.date(Order.order_date)
+        rows = db.session.execute(
+            select(
+                day,
+                func.sum(OrderItem.quantity * OrderItem.unit_price),
+                func.sum(OrderItem.quantity),
+                func.count(OrderItem.order_id.distinct()),
+            )
+            .select_from(OrderItem)
+            .join(Product, Product.product_id == OrderItem.product_id)
+            .join(Order, Order.order_id == OrderItem.order_id)
+            .where(Product.business_id == business_id, Order.order_date >= since)
+            .group_by(day)
+        ).all()
+    by_day = {str(date)[:10]: (revenue, units, orders) for date, revenue, units, orders in rows}
+
+    def entry(start, length):
+        revenue, units, orders = Decimal(0), 0, 0
+        for offset in range(length):
+            found = by_day.get((start + timedelta(days=offset)).isoformat())
+            if found:
+                revenue += Decimal(found[0] or 0)
+                units += found[1] or 0
+                orders += found[2]
+        return {"revenue": _money(revenue), "units_sold": units, "order_count": orders}
+
+    days = [today - timedelta(days=offset) for offset in range(DAYS - 1, -1, -1)]
+    weeks = [first_week + timedelta(weeks=week) for week in range(WEEKS)]
+    daily = [{"date": day.isoformat(), **entry(day, 1)} for day in days]
+    weekly = [{"week_start": week.isoformat(), **entry(week, 7)} for week in weeks]
+    return daily, weekly
+
+
+def _sales(business_id):
+    totals = db.session.execute(
+        select(BusinessSales.revenue, BusinessSales.units_sold, BusinessSales.order_count,
+               BusinessSales.last_sale_at).where(BusinessSales.business_id == business_id)
+    ).first()
+    top = db.session.execute(
+        select(ProductSales.product_id, Product.name, ProductSales.units_sold, ProductSales.revenue,
+               ProductSales.order_count)
+        .join(Product, Product.product_id == ProductSales.product_id)
+        .where(ProductSales.business_id == business_id)
+        .order_by(ProductSales.revenue.desc(), ProductSales.product_id)
+        .limit(TOP_PRODUCTS)
+    ).all()
+    revenue, units, orders, last_sale_at = totals or (0, 0, 0, None)
+    return {
+        "total_revenue": _money(revenue),
+        "total_units_sold": units,
+        "order_count": orders,
+        "last_sale_at": last_sale_at,
+    }, [{"product_id": product_id, "name": name, "units_sold": units, "revenue": _money(revenue),
+         "order_count": orders} for product_id, name, units, revenue, orders in top]
+
+
+def _open_orders(business_id):
+    # count() over () is the number of groups, so the total comes with the
+    # first page instead of needing its own query
+    rows = db.session.execute(
+        select(
+            Order.order_id, Order.order_date, Order.order_status, Order.payment_status, Order.delivery_status,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * OrderItem.unit_price),
+            func.count().over(),
+        )
+        .select_from(OrderItem)
+        .join(Product, Product.product_id == OrderItem.product_id)
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .where(Product.business_id == business_id, Order.order_status.in_(OPEN_ORDER_STATUSES))
+        .group_by(Order.order_id, Order.order_date, Order.order_status, Order.payment_status,
+                  Order.delivery_status)
+        .order_by(Order.order_date.desc(), Order.order_id.desc())
+        .limit(LIST_LIMIT)
+    ).all()
+    total = rows[0][-1] if rows else 0
+    return total, [
+        {"order_id": order_id, "order_date": order_date, "order_status": order_status,
+         "payment_status": payment_status, "delivery_status": delivery_status, "units": units,
+         "vendor_total": _money(amount)}
+        for order_id, order_date, order_status, payment_status, delivery_status, units, amount, _ in rows
+    ]
+
+
+def build_dashboard(business_id, low_stock=DEFAULT_LOW_STOCK, now=None):
+    now = now or datetime.utcnow()
+    daily, weekly = _revenue(business_id, now.date())
+    sales, top_products = _sales(business_id)
+    open_count, open_orders = _open_orders(business_id)
+    return {
+        "business_id": business_id,
+        "generated_at": now,
+        "products": _stock(business_id, low_stock),
+        "sales": sales,
+        "revenue_by_day": daily,
+        "revenue_by_week": weekly,
+        "top_products": top_products,
+        "open_order_count": open_count,
+        "open_orders": open_orders,
+    }
+
+
+def vendor_dashboard(business_id, low_stock=DEFAULT_LOW_STOCK):
+    """The dashboard of ``business_id``, at most ``DASHBOARD_TTL_SECONDS`` old."""
+    key = (business_id, low_stock)
+    dashboard = dashboard_cache.get(key)
+    if dashboard is None:
+        dashboard = build_dashboard(business_id, low_stock)
+        dashboard_cache.set(key, dashboard, current_app.config.get("DASHBOARD_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    return dashboard
@@ -0,0 +1,38 @@
+# server/database.py
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+
+def engine_options(config):
+    if make_url(config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": True,
+    }
+
+
+def init_database(app):
+    """Bind ``db`` to ``app`` with pool settings and SQLite pragmas from its config."""
+    options = engine_options(app.config)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            pragmas = app.config.get("SQLITE_PRAGMAS", {})
+
+            @event.listens_for(db.engine, "connect")
+            def apply_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+                cursor.close()
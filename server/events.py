@@ -0,0 +1,283 @@
+# server/events.py
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import Numeric, event, inspect, insert, select, delete, func, text
+from sqlalchemy.orm import Session
+
+from models import db, Order, OrderItem, OrderEvent
+from json_provider import _default as json_default
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DEFAULT_MAX_WAIT_SECONDS = 25
+DEFAULT_POLL_SECONDS = 1
+DEFAULT_RETENTION_DAYS = 14
+
+# any constant works; every transaction that writes events takes this
+# PostgreSQL advisory lock just before it commits
+ADVISORY_LOCK_KEY = 0x6F726465
+
+events = OrderEvent.__table__
+# journaled model -> the entity name stored with its events
+ENTITIES = {Order: "order", OrderItem: "order_item"}
+
+
+class EventsError(ValueError):
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+    def report(self):
+        return {"error": str(self), **self.details}
+
+
+# ============================================
+# Writing
+# ============================================
+def order_event(entity, entity_id, order_id, action, data=None):
+    """One ``order_events`` row; ``data`` may hold Decimals and datetimes."""
+    return {
+        "order_id": order_id,
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "data": json.dumps(data or {}, default=json_default),
+    }
+
+
+def journal(session, rows):
+    """Add ``rows`` (from :func:`order_event`) to ``session``'s transaction.
+
+    They are inserted just before it commits, so sequence numbers follow
+    commit order: a reader that has seen ``seq`` never finds a smaller one
+    appearing later. A rollback drops them with everything else.
+    """
+    if rows:
+        session.info.setdefault("order_events", []).extend(rows)
+
+
+def journal_created(session, model, condition):
+    """Journal the ``model`` rows matching ``condition`` as created; for
+    rows written with Core inserts, which the flush hook does not see."""
+    table = model.__table__
+    key = inspect(model).primary_key[0].key
+    journal(session, [
+        order_event(ENTITIES[model], row[key], row["order_id"], CREATED, dict(row))
+        for row in session.connection().execute(select(table).where(condition).order_by(table.c[key])).mappings()
+    ])
+
+
+def _stored(attr, value):
+    # the value as the column gives it back, so an event written from the
+    # ORM (where total_amount may still be the client's 7200) looks the same
+    # as one read back with Core ("7200.00")
+    column_type = attr.columns[0].type
+    if value is not None and isinstance(column_type, Numeric) and column_type.asdecimal:
+        value = Decimal(str(value))
+        if column_type.scale is not None:
+            value = value.quantize(Decimal(1).scaleb(-column_type.scale))
+    return value
+
+
+def _columns(state):
+    return {attr.key: _stored(attr, state.dict.get(attr.key)) for attr in state.mapper.column_attrs}
+
+
+def _changed_columns(state):
+    changed = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.added and history.added[0] not in history.deleted:
+            changed[attr.key] = _stored(attr, history.added[0])
+    return changed
+
+
+def _entity_id(state):
+    return state.identity[0] if state.identity else state.dict.get(state.mapper.primary_key[0].key)
+
+
+@event.listens_for(Session, "after_flush")
+def _journal_flushed_orders(session, flush_context):
+    # orders before their items when created, after them when deleted
+    rows = []
+    for action, objects in ((CREATED, session.new), (UPDATED, session.dirty), (DELETED, session.deleted)):
+        models = (Order, OrderItem) if action != DELETED else (OrderItem, Order)
+        for model in models:
+            states = sorted((inspect(obj) for obj in objects if type(obj) is model), key=_entity_id)
+            for state in states:
+                if action == CREATED:
+                    data = _columns(state)
+                elif action == UPDATED:
+                    data = _changed_columns(state)
+                    if not data:
+                        continue
+                else:
+                    data = {}
+                order_id = _entity_id(state) if model is Order else state.dict.get("order_id")
+                rows.append(order_event(ENTITIES[model], _entity_id(state), order_id, action, data))
+    journal(session, rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_journal(session):
+    # the commit flushes only after this hook; flush first so its changes
+    # are journaled too
+    session.flush()
+    rows = session.info.pop("order_events", None)
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        # held until the commit, so a later sequence number always commits
+        # later; SQLite's single writer gives the same order by itself
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    connection.execute(insert(events), rows)
+    session.info["order_events_written"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_readers(session):
+    if session.info.pop("order_events_written", False):
+        event_feed.publish()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_journal(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("order_events", None)
+        session.info.pop("order_events_written", None)
+
+
+# ============================================
+# Reading
+# ============================================
+class EventFeed:
+    """Wakes the long-polling readers of this process when it commits
+    events; other processes are picked up by polling."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def publish(self):
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._generation != generation, timeout)
+
+
+event_feed = EventFeed()
+
+
+def _serialize(row):
+    seq, order_id, entity, entity_id, action, data, created_at = row
+    return {"seq": seq, "order_id": order_id, "entity": entity, "entity_id": entity_id, "action": action,
+            "data": json.loads(data), "created_at": created_at}
+
+
+def check_cursor(after):
+    """Raise :class:`EventsError` (410) when events after ``after`` have
+    already been compacted away; 0 always reads from the oldest kept."""
+    if after:
+        oldest = db.session.scalar(select(func.min(events.c.seq)))
+        if oldest is not None and after < oldest - 1:
+            raise EventsError(f"Events after {after} have been compacted; the oldest kept is {oldest}",
+                              410, oldest=oldest)
+
+
+def read_events(after=0, limit=DEFAULT_LIMIT, order_id=None):
+    """Up to ``limit`` events with a sequence number above ``after``, oldest
+    first; see :func:`check_cursor`."""
+    check_cursor(after)
+    query = (
+        select(events.c.seq, events.c.order_id, events.c.entity, events.c.entity_id, events.c.action,
+               events.c.data, events.c.created_at)
+        .where(events.c.seq > after)
+        .order_by(events.c.seq)
+        .limit(limit)
+    )
+    if order_id is not None:
+        query = query.where(events.c.order_id == order_id)
+    return [_serialize(row) for row in db.session.execute(query)]
+
+
+def poll_events(after=0, limit=DEFAULT_LIMIT, wait=0, order_id=None):
+    """:func:`read_events`, waiting up to ``wait`` seconds for the first
+    event when there is none yet."""
+    deadline = time.monotonic() + wait
+    interval = current_app.config.get("EVENTS_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+    while True:
+        # read the generation first so a commit between the query and the
+        # wait still wakes us
+        generation = event_feed.generation
+        rows = read_events(after, limit, order_id)
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows
+        # end the read transaction so the next query sees newer commits
+        db.session.rollback()
+        event_feed.wait(generation, min(interval, remaining))
+
+
+def stream_events(after=0, batch=DEFAULT_LIMIT, wait=0, order_id=None):
+    """Yield every event after ``after`` as NDJSON lines, ``batch`` rows per
+    query, then the ones committed in the next ``wait`` seconds."""
+    deadline = time.monotonic() + wait
+    dumps = current_app.json.dumps
+    while True:
+        rows = poll_events(after, batch, max(deadline - time.monotonic(), 0), order_id)
+        for row in rows:
+            yield dumps(row) + "\n"
+        if not rows or (len(rows) < batch and time.monotonic() >= deadline):
+            return
+        after = rows[-1]["seq"]
+
+
+# ============================================
+# Compaction
+# ============================================
+def compact(session, days, now=None):
+    """Delete events older than ``days`` days; the newest event is always
+    kept so stale cursors can still be told apart. Returns the count."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    newest = session.scalar(select(func.max(events.c.seq)))
+    if newest is None:
+        return 0
+    return session.execute(
+        delete(events).where(events.c.created_at < cutoff, events.c.seq < newest)
+    ).rowcount
+
+
+events_cli = AppGroup("events", help="Maintain the order event journal.")
+
+
+@events_cli.command("compact")
+@click.option("--days", type=int, default=None,
+              help="Keep events this many days (default EVENTS_RETENTION_DAYS).")
+def compact_command(days):
+    """Delete old order events."""
+    if days is None:
+        days = current_app.config.get("EVENTS_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    count = compact(db.session, days)
+    db.session.commit()
+    click.echo(f"Deleted {count} event(s).")
@@ -0,0 +1,221 @@
+# server/images.py
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from models import db, ProductImage
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+DEFAULT_SIZES = {"thumb": 200, "medium": 600}
+CHUNK_SIZE = 64 * 1024
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# magic numbers of the formats we accept
+SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+class ImageError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff_content_type(head):
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+# ============================================
+# Content-addressed storage
+# ============================================
+def storage_root():
+    return current_app.config.get("IMAGE_STORAGE") or os.path.join(current_app.instance_path, "images")
+
+
+def image_sizes():
+    return current_app.config.get("IMAGE_SIZES") or DEFAULT_SIZES
+
+
+def original_path(sha256):
+    return os.path.join(storage_root(), "originals", sha256[:2], sha256[2:4], sha256)
+
+
+def thumbnail_path(sha256, size):
+    return os.path.join(storage_root(), "thumbnails", size, sha256[:2], f"{sha256}.jpg")
+
+
+def store(stream):
+    """Copy an uploaded file into storage under its SHA-256.
+
+    The file is hashed while it is streamed to a temporary file, so it is
+    never held in memory; identical uploads end up as one file. Returns
+    ``(sha256, content_type, byte_size)``.
+    """
+    limit = current_app.config.get("MAX_IMAGE_BYTES", 10 * 1024 * 1024)
+    root = storage_root()
+    os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.join(root, "tmp"))
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0:
+                    content_type = sniff_content_type(chunk[:16])
+                    if content_type is None:
+                        raise ImageError("Only JPEG, PNG, GIF and WebP images are accepted", 415)
+                size += len(chunk)
+                if size > limit:
+                    raise ImageError(f"Images may be at most {limit} bytes", 413)
+                digest.update(chunk)
+                tmp.write(chunk)
+        if size == 0:
+            raise ImageError("The image file is empty")
+
+        sha256 = digest.hexdigest()
+        path = original_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return sha256, content_type, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_files(sha256):
+    """Delete the stored file and thumbnails of ``sha256`` if no image uses it any more."""
+    if db.session.query(ProductImage.image_id).filter_by(sha256=sha256).first() is not None:
+        return
+    for path in [original_path(sha256)] + [thumbnail_path(sha256, size) for size in image_sizes()]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ============================================
+# Thumbnails
+# ============================================
+def _flatten(image):
+    # JPEG has no alpha channel: put transparent images on white
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def make_thumbnails(sha256):
+    """Write every configured thumbnail size of ``sha256``; returns (width, height)."""
+    with Image.open(original_path(sha256)) as original:
+        original.load()
+        width, height = original.size
+        for size, pixels in image_sizes().items():
+            path = thumbnail_path(sha256, size)
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            thumbnail = _flatten(original)
+            thumbnail.thumbnail((pixels, pixels))
+            # write under a temporary name so a reader never sees half a file
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            thumbnail.save(tmp_path, "JPEG", quality=85, optimize=True, progressive=True)
+            os.replace(tmp_path, path)
+    return width, height
+
+
+def process_image(image_id):
+    image = db.session.get(ProductImage, image_id)
+    if image is None or image.sha256 is None:
+        return
+    if Image is None:
+        image.thumbnail_status = "unavailable"
+    else:
+        try:
+            image.width, image.height = make_thumbnails(image.sha256)
+            image.thumbnail_status = "ready"
+        except Exception:
+            current_app.logger.exception("Thumbnails for image %s failed", image_id)
+            image.thumbnail_status = "failed"
+    db.session.commit()
+
+
+class ThumbnailWorker:
+    """Generates thumbnails on a small thread pool, off the request thread."""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, image_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=app.config.get("IMAGE_WORKERS", 2),
+                                                    thread_name_prefix="thumbnails")
+        return self._executor.submit(self._run, app, image_id)
+
+    @staticmethod
+    def _run(app, image_id):
+        with app.app_context():
+            try:
+                process_image(image_id)
+            finally:
+                db.session.remove()
+
+
+thumbnail_worker = ThumbnailWorker()
+
+
+def queue_thumbnails(image_id):
+    return thumbnail_worker.submit(current_app._get_current_object(), image_id)
+
+
+images_cli = AppGroup("images", help="Manage product images.")
+
+
+@images_cli.command("thumbnails")
+@click.option("--all", "everything", is_flag=True, help="Rebuild thumbnails of every stored image.")
+def thumbnails_command(everything):
+    """Generate missing thumbnails (pending or failed images)."""
+    query = ProductImage.query.filter(ProductImage.sha256.isnot(None))
+    if not everything:
+        query = query.filter(ProductImage.thumbnail_status.in_(("pending", "failed")))
+    images = query.all()
+    if everything:
+        for image in images:
+            for size in image_sizes():
+                if os.path.exists(thumbnail_path(image.sha256, size)):
+                    os.remove(thumbnail_path(image.sha256, size))
+    image_ids = [image.image_id for image in images]
+    for image_id in image_ids:
+        process_image(image_id)
+    click.echo(f"Processed {len(image_ids)} image(s).")
@@ -0,0 +1,269 @@
+# server/inventory.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import case, insert, select, update, func
+
+from models import db, Order, OrderItem, Product, StockReservation, OrderStatusChange
+from caching import bump_versions
+from events import journal, order_event, UPDATED
+from jobs import task, enqueue
+
+DEFAULT_RESERVATION_MINUTES = 30
+
+HELD = "held"
+COMMITTED = "committed"
+RELEASED = "released"
+
+# order states in which reserved stock is considered sold
+COMMITTED_ORDER_STATUSES = ("confirmed", "processing", "completed")
+# order states whose reservations are settled: released on cancel, sold on
+# completion, so nothing new may be reserved for them
+CLOSED_ORDER_STATUSES = ("cancelled", "completed")
+
+products = Product.__table__
+reservations = StockReservation.__table__
+status_changes = OrderStatusChange.__table__
+
+
+class InsufficientStock(ValueError):
+    status = 409
+
+    def __init__(self, shortages):
+        # shortages: list of (product_id, name, available, requested)
+        details = ", ".join(f"{name} (id {product_id}): {available or 0} available, {requested} requested"
+                            for product_id, name, available, requested in shortages)
+        super().__init__(f"Insufficient stock for {details}")
+        self.shortages = shortages
+
+
+class OrderClosed(ValueError):
+    status = 409
+
+    def __init__(self, order):
+        super().__init__(f"Order {order.order_id} is {order.order_status}; no more stock can be reserved for it")
+
+
+def _adjust_stock(connection, quantities, sign):
+    # one UPDATE for every product in the order; the amount per row comes
+    # from a CASE on product_id
+    amount = case(quantities, value=products.c.product_id)
+    stmt = update(products).where(products.c.product_id.in_(quantities))
+    if sign < 0:
+        stmt = stmt.where(products.c.stock_quantity >= amount)
+        return connection.execute(stmt.values(stock_quantity=products.c.stock_quantity - amount)).rowcount
+    stock = func.coalesce(products.c.stock_quantity, 0)
+    return connection.execute(stmt.values(stock_quantity=stock + amount)).rowcount
+
+
+def reservation_status(order):
+    if order.payment_status == "paid" or order.order_status in COMMITTED_ORDER_STATUSES:
+        return COMMITTED
+    return HELD
+
+
+def reserve(session, order, quantities):
+    """Take ``quantities`` ({product_id: quantity}) out of stock for ``order``.
+
+    The decrement is a single conditional UPDATE
+    (``stock_quantity >= quantity``), so concurrent orders can never drive
+    stock negative or lose an update. If any product is short nothing is
+    kept: :class:`InsufficientStock` is raised and the caller rolls back.
+    A cancelled or completed order raises :class:`OrderClosed`.
+    """
+    if order.order_status in CLOSED_ORDER_STATUSES:
+        raise OrderClosed(order)
+    if not quantities:
+        return
+    connection = session.connection()
+
+    if _adjust_stock(connection, quantities, -1) != len(quantities):
+        rows = connection.execute(
+            select(products.c.product_id, products.c.name, products.c.stock_quantity)
+            .where(products.c.product_id.in_(quantities))
+        ).all()
+        # the UPDATE above already skipped the short rows, so the stock read
+        # here is still the stock the request was refused against
+        shortages = [(product_id, name, stock, quantities[product_id]) for product_id, name, stock in rows
+                     if (stock or 0) < quantities[product_id]]
+        raise InsufficientStock(shortages or [(product_id, str(product_id), 0, quantity)
+                                              for product_id, quantity in quantities.items()])
+
+    status = reservation_status(order)
+    now = datetime.utcnow()
+    minutes = current_app.config.get("RESERVATION_TIMEOUT_MINUTES", DEFAULT_RESERVATION_MINUTES)
+    expires_at = now + timedelta(minutes=minutes) if status == HELD else None
+    connection.execute(insert(reservations), [
+        {"order_id": order.order_id, "product_id": product_id, "quantity": quantity,
+         "status": status, "created_at": now, "expires_at": expires_at}
+        for product_id, quantity in quantities.items()
+    ])
+    bump_versions(session, [products.name, reservations.name])
+
+
+def release(session, order_ids):
+    """Return the stock of every open reservation of ``order_ids``."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+    connection = session.connection()
+    open_reservations = connection.execute(
+        select(reservations.c.reservation_id, reservations.c.product_id, reservations.c.quantity)
+        .where(reservations.c.order_id.in_(order_ids), reservations.c.status.in_((HELD, COMMITTED)))
+    ).all()
+    if not open_reservations:
+        return 0
+
+    quantities = defaultdict(int)
+    for _, product_id, quantity in open_reservations:
+        quantities[product_id] += quantity
+    _adjust_stock(connection, dict(quantities), 1)
+
+    connection.execute(
+        update(reservations)
+        .where(reservations.c.reservation_id.in_([row[0] for row in open_reservations]))
+        .values(status=RELEASED, expires_at=None)
+    )
+    bump_versions(session, [products.name, reservations.name])
+    return len(open_reservations)
+
+
+def commit(session, order_ids):
+    """Stop held reservations of ``order_ids`` from timing out."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+    count = session.connection().execute(
+        update(reservations)
+        .where(reservations.c.order_id.in_(order_ids), reservations.c.status == HELD)
+        .values(status=COMMITTED, expires_at=None)
+    ).rowcount
+    if count:
+        bump_versions(session, [reservations.name])
+    return count
+
+
+def sync_order(session, order):
+    """Release or commit ``order``'s reservations after its status changed."""
+    if order.order_status == "cancelled":
+        release(session, [order.order_id])
+    elif reservation_status(order) == COMMITTED:
+        commit(session, [order.order_id])
+
+
+def _shrink(session, order_id, surplus):
+    # give back ``surplus`` ({product_id: quantity}) from the newest open
+    # reservations of the order
+    connection = session.connection()
+    rows = connection.execute(
+        select(reservations.c.reservation_id, reservations.c.product_id, reservations.c.quantity)
+        .where(reservations.c.order_id == order_id, reservations.c.product_id.in_(surplus),
+               reservations.c.status.in_((HELD, COMMITTED)))
+        .order_by(reservations.c.reservation_id.desc())
+    ).all()
+    remaining = dict(surplus)
+    for reservation_id, product_id, quantity in rows:
+        taken = min(quantity, remaining[product_id])
+        if not taken:
+            continue
+        remaining[product_id] -= taken
+        values = {"quantity": quantity - taken} if taken < quantity else {"status": RELEASED, "expires_at": None}
+        connection.execute(update(reservations).where(reservations.c.reservation_id == reservation_id)
+                           .values(**values))
+    _adjust_stock(connection, surplus, 1)
+    bump_versions(session, [products.name, reservations.name])
+
+
+def reconcile(session, order_id):
+    """Return the reserved stock that ``order_id``'s items no longer need.
+
+    Only surplus is handled here: requests that add units reserve them
+    themselves, so this never fails for lack of stock.
+    """
+    order = session.get(Order, order_id)
+    if order is None:
+        return
+    if order.order_status == "cancelled":
+        release(session, [order_id])
+        return
+
+    connection = session.connection()
+    # orders placed before reservations existed never took stock this way
+    if connection.execute(select(reservations.c.reservation_id)
+                          .where(reservations.c.order_id == order_id).limit(1)).first() is None:
+        return
+    wanted = dict(connection.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id == order_id).group_by(OrderItem.product_id)
+    ).all())
+    held = dict(connection.execute(
+        select(reservations.c.product_id, func.sum(reservations.c.quantity))
+        .where(reservations.c.order_id == order_id, reservations.c.status.in_((HELD, COMMITTED)))
+        .group_by(reservations.c.product_id)
+    ).all())
+
+    surplus = {product_id: quantity - wanted.get(product_id, 0) for product_id, quantity in held.items()
+               if quantity > wanted.get(product_id, 0)}
+    if surplus:
+        _shrink(session, order_id, surplus)
+
+
+@task("reconcile_stock")
+def reconcile_stock(order_id):
+    reconcile(db.session, order_id)
+
+
+def queue_reconcile(session, order_id):
+    """Return ``order_id``'s surplus reservations in the background after
+    its items shrank or were removed."""
+    enqueue(session, "reconcile_stock", {"order_id": order_id})
+
+
+def release_expired(session, now=None):
+    """Cancel unpaid pending orders whose reservations timed out and restock them.
+
+    Returns the ids of the cancelled orders.
+    """
+    now = now or datetime.utcnow()
+    connection = session.connection()
+    expired = select(reservations.c.order_id).where(
+        reservations.c.status == HELD, reservations.c.expires_at <= now
+    ).distinct()
+    order_ids = [row[0] for row in connection.execute(
+        select(Order.order_id).where(Order.order_id.in_(expired), Order.order_status == "pending",
+                                     Order.payment_status == "unpaid")
+    )]
+    if order_ids:
+        release(session, order_ids)
+        connection.execute(update(Order.__table__).where(Order.order_id.in_(order_ids))
+                           .values(order_status="cancelled"))
+        connection.execute(insert(status_changes), [
+            {"order_id": order_id, "field": "order_status", "from_status": "pending", "to_status": "cancelled",
+             "changed_at": now} for order_id in order_ids
+        ])
+        bump_versions(session, [Order.__tablename__, status_changes.name])
+        journal(session, [order_event("order", order_id, order_id, UPDATED, {"order_status": "cancelled"})
+                          for order_id in order_ids])
+
+    # anything else that expired belongs to an order that moved on without
+    # the status hook seeing it; keep that stock sold
+    connection.execute(
+        update(reservations).where(reservations.c.status == HELD, reservations.c.expires_at <= now)
+        .values(status=COMMITTED, expires_at=None)
+    )
+    return order_ids
+
+
+inventory_cli = AppGroup("inventory", help="Manage stock reservations.")
+
+
+@inventory_cli.command("release-expired")
+def release_expired_command():
+    """Cancel unpaid orders whose reservations timed out and restock them."""
+    order_ids = release_expired(db.session)
+    db.session.commit()
+    click.echo(f"Released {len(order_ids)} expired order(s).")
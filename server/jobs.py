@@ -0,0 +1,288 @@
+# server/jobs.py
+
+import json
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import event, select, update, delete, insert, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, Job
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 10
+DEFAULT_BACKOFF_MAX_SECONDS = 3600
+
+jobs = Job.__table__
+
+# task name -> (function, max_attempts or None for JOB_MAX_ATTEMPTS)
+TASKS = {}
+
+
+def task(name, max_attempts=None):
+    """Register the decorated function as the job task ``name``.
+
+    It is called with the job's payload as keyword arguments inside an app
+    context; whatever it writes to ``db.session`` is committed together
+    with the job being marked done.
+    """
+    def register(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return register
+
+
+# ============================================
+# Queueing
+# ============================================
+def enqueue(session, name, payload=None, key=None, delay=None, max_attempts=None):
+    """Queue task ``name`` in ``session``'s transaction.
+
+    Workers only see the job once the caller commits, and it disappears
+    with everything else on rollback. A job queued earlier with the same
+    ``key`` makes this a no-op, so a retried request cannot send the same
+    email twice.
+    """
+    enqueue_many(session, name, [(payload, key)], delay, max_attempts)
+
+
+def enqueue_many(session, name, items, delay=None, max_attempts=None):
+    """Queue one ``name`` job per ``(payload, key)`` pair with a single
+    executemany, with the same guarantees as :func:`enqueue`."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown task '{name}'")
+    if not items:
+        return
+    now = datetime.utcnow()
+    attempts = (max_attempts or TASKS[name][1]
+                or current_app.config.get("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    rows = [{
+        "task": name,
+        "payload": json.dumps(payload or {}),
+        "idempotency_key": key,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": attempts,
+        "run_at": now + timedelta(seconds=delay or 0),
+        "created_at": now,
+    } for payload, key in items]
+
+    connection = session.connection()
+    if all(key is None for _, key in items):
+        stmt = insert(jobs)
+    else:
+        dialects = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+        stmt = dialects[connection.dialect.name](jobs).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    connection.execute(stmt, rows)
+    session.info["jobs_queued"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session):
+    if session.info.pop("jobs_queued", False) and has_app_context():
+        job_worker.wake(current_app._get_current_object())
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_queued(session):
+    session.info.pop("jobs_queued", None)
+
+
+# ============================================
+# Running
+# ============================================
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``: doubling from
+    ``JOB_BACKOFF_SECONDS`` up to ``JOB_BACKOFF_MAX_SECONDS``, with jitter so
+    jobs that failed together do not all retry together."""
+    base = current_app.config.get("JOB_BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS)
+    cap = current_app.config.get("JOB_BACKOFF_MAX_SECONDS", DEFAULT_BACKOFF_MAX_SECONDS)
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return random.uniform(delay / 2, delay)
+
+
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim(now=None):
+    """Mark the next due job as running and return it, or ``None``.
+
+    The job is taken with a single conditional UPDATE, so two workers never
+    run the same job. Jobs left running longer than ``JOB_LEASE_SECONDS``
+    belong to a worker that died and are taken over.
+    """
+    now = now or datetime.utcnow()
+    lease = timedelta(seconds=current_app.config.get("JOB_LEASE_SECONDS", 300))
+    due = or_(and_(jobs.c.status == QUEUED, jobs.c.run_at <= now),
+              and_(jobs.c.status == RUNNING, jobs.c.locked_at <= now - lease))
+    next_job = select(jobs.c.job_id).where(due).order_by(jobs.c.run_at, jobs.c.job_id).limit(1).scalar_subquery()
+    worker = _worker_name()
+
+    connection = db.session.connection()
+    claimed = connection.execute(
+        update(jobs).where(jobs.c.job_id == next_job, due)
+        .values(status=RUNNING, locked_at=now, locked_by=worker, attempts=jobs.c.attempts + 1)
+    ).rowcount
+    job = connection.execute(
+        select(jobs).where(jobs.c.status == RUNNING, jobs.c.locked_by == worker, jobs.c.locked_at == now)
+    ).first() if claimed else None
+    db.session.commit()
+    return job
+
+
+def run(job):
+    """Run a claimed job; returns True if it succeeded."""
+    func, _ = TASKS.get(job.task, (None, None))
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task '{job.task}'")
+        func(**json.loads(job.payload))
+        # the task's own writes and the job's completion commit together
+        db.session.execute(update(jobs).where(jobs.c.job_id == job.job_id)
+                           .values(status=DONE, finished_at=datetime.utcnow(), last_error=None))
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Job %s (%s) failed on attempt %s", job.job_id, job.task, job.attempts)
+        _fail(job, f"{type(e).__name__}: {e}")
+        return False
+
+
+def _fail(job, error):
+    now = datetime.utcnow()
+    if job.attempts >= job.max_attempts:
+        values = {"status": DEAD, "finished_at": now}
+    else:
+        values = {"status": QUEUED, "run_at": now + timedelta(seconds=backoff(job.attempts))}
+    db.session.execute(update(jobs).where(jobs.c.job_id == job.job_id)
+                       .values(last_error=error[:2000], locked_at=None, locked_by=None, **values))
+    db.session.commit()
+
+
+def run_next():
+    """Claim and run one due job; returns False when nothing was due."""
+    job = claim()
+    if job is None:
+        return False
+    run(job)
+    return True
+
+
+class JobWorker:
+    """Runs queued jobs on ``JOB_WORKERS`` daemon threads of this process.
+
+    The threads start when this process first commits a job and are woken
+    by every later commit; they also poll every ``JOB_POLL_SECONDS`` for
+    retries and for jobs queued by other processes.
+    """
+
+    def __init__(self):
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def wake(self, app):
+        count = app.config.get("JOB_WORKERS", 2)
+        if not count:
+            return
+        with self._lock:
+            if not self._threads:
+                for index in range(count):
+                    thread = threading.Thread(target=self._loop, args=(app,), name=f"jobs-{index}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        self._wake.set()
+
+    def _loop(self, app):
+        poll = app.config.get("JOB_POLL_SECONDS", 5)
+        with app.app_context():
+            while True:
+                try:
+                    ran = run_next()
+                except Exception:
+                    app.logger.exception("Job worker failed")
+                    ran = False
+                finally:
+                    db.session.remove()
+                if not ran:
+                    self._wake.wait(poll)
+                    self._wake.clear()
+
+
+job_worker = JobWorker()
+
+
+# ============================================
+# CLI
+# ============================================
+jobs_cli = AppGroup("jobs", help="Run and inspect background jobs.")
+
+
+@jobs_cli.command("work")
+@click.option("--once", is_flag=True, help="Run the jobs that are due now, then exit.")
+def work_command(once):
+    """Run jobs in the foreground (for a dedicated worker process)."""
+    poll = current_app.config.get("JOB_POLL_SECONDS", 5)
+    count = 0
+    while True:
+        if run_next():
+            count += 1
+        elif once:
+            break
+        else:
+            time.sleep(poll)
+    click.echo(f"Ran {count} job(s).")
+
+
+@jobs_cli.command("list")
+@click.option("--status", type=click.Choice([QUEUED, RUNNING, DONE, DEAD]), help="Only jobs in this state.")
+@click.option("--limit", default=50, show_default=True)
+def list_command(status, limit):
+    """Show the most recent jobs."""
+    query = select(jobs).order_by(jobs.c.job_id.desc()).limit(limit)
+    if status:
+        query = query.where(jobs.c.status == status)
+    for job in db.session.execute(query):
+        click.echo(f"{job.job_id:>8} {job.task:<28} {job.status:<8} attempts={job.attempts}/{job.max_attempts} "
+                   f"run_at={job.run_at:%Y-%m-%d %H:%M:%S} {job.last_error or ''}")
+
+
+@jobs_cli.command("retry")
+@click.argument("job_ids", nargs=-1, type=int)
+@click.option("--dead", "all_dead", is_flag=True, help="Retry every dead job.")
+def retry_command(job_ids, all_dead):
+    """Queue dead jobs again with fresh attempts."""
+    stmt = update(jobs).where(jobs.c.status == DEAD)
+    if not all_dead:
+        stmt = stmt.where(jobs.c.job_id.in_(job_ids))
+    count = db.session.execute(stmt.values(status=QUEUED, attempts=0, run_at=datetime.utcnow(),
+                                           finished_at=None)).rowcount
+    db.session.commit()
+    click.echo(f"Queued {count} job(s) again.")
+
+
+@jobs_cli.command("purge")
+@click.option("--days", default=7, show_default=True, help="Delete finished jobs older than this.")
+def purge_command(days):
+    """Delete finished jobs (their idempotency keys are forgotten too)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    count = db.session.execute(
+        delete(jobs).where(jobs.c.status == DONE, jobs.c.finished_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    click.echo(f"Deleted {count} job(s).")
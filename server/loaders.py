@@ -0,0 +1,73 @@
+# server/loaders.py
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def _loader_options(model, tree, parent=None):
+    options = []
+    relationships = model.__mapper__.relationships
+    for name, subtree in tree.items():
+        relationship = relationships[name]
+        attribute = getattr(model, name)
+
+        # collections get one extra SELECT ... WHERE fk IN (...) per level,
+        # scalar relationships ride along in the parent query as a LEFT JOIN
+        if relationship.uselist:
+            strategy = parent.selectinload if parent is not None else selectinload
+        else:
+            strategy = parent.joinedload if parent is not None else joinedload
+        loader = strategy(attribute)
+
+        children = _loader_options(relationship.mapper.class_, subtree, loader)
+        options.extend(children or [loader])
+    return options
+
+
+def loader_options(serialization):
+    return _loader_options(serialization.model, serialization.tree)
+
+
+def with_loaders(query, serialization):
+    """Eager-load exactly the relationships ``serialization`` will expand."""
+    options = loader_options(serialization)
+    if options:
+        query = query.options(*options)
+    return query
+
+
+# ============================================
+# Statement budget
+# ============================================
+class StatementBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_count():
+    return g.get("sql_statement_count", 0)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statement_count = g.get("sql_statement_count", 0) + 1
+
+
+def init_statement_budget(app):
+    """Fail requests that run more SQL than ``SQL_STATEMENT_BUDGET``.
+
+    Intended for the test suite: a budget of e.g. 5 turns an N+1 regression
+    on any route into an error instead of a silent slowdown.
+    """
+
+    @app.after_request
+    def check_statement_budget(response):
+        budget = app.config.get("SQL_STATEMENT_BUDGET")
+        count = statement_count()
+        if budget is not None and count > budget:
+            raise StatementBudgetExceeded(
+                f"{request.method} {request.path} ran {count} SQL statements (budget {budget})"
+            )
+        return response
@@ -0,0 +1,150 @@
+# server/metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from loaders import statement_count
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """A Prometheus histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count])
+                            for labels, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+ROUTE_LABELS = ("method", "route", "status")
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time spent handling the request.", ROUTE_LABELS, LATENCY_BUCKETS)
+request_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", ROUTE_LABELS, STATEMENT_BUCKETS)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request.", ROUTE_LABELS, LATENCY_BUCKETS)
+request_serialization_time = Histogram(
+    "http_request_serialization_seconds", "Time spent in to_dict() per request.", ROUTE_LABELS, LATENCY_BUCKETS)
+response_bytes = Histogram(
+    "http_response_size_bytes", "Response body size.", ROUTE_LABELS, BYTES_BUCKETS)
+
+HISTOGRAMS = [request_duration, request_statements, request_db_time, request_serialization_time, response_bytes]
+
+
+# ============================================
+# Timers
+# ============================================
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    if has_request_context():
+        g.db_time = g.get("db_time", 0.0) + elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_statement_timer(context):
+    starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def add_serialization_time(elapsed):
+    if has_request_context():
+        g.serialization_time = g.get("serialization_time", 0.0) + elapsed
+
+
+# ============================================
+# Request hooks
+# ============================================
+def init_metrics(app):
+    """Record per-route latency, SQL, serialization and size metrics.
+
+    Numbers are kept per process; with several workers each one reports
+    its own series, so scrape them individually or sum in Prometheus.
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get("request_start")
+        if start is None:
+            return response
+
+        duration = time.perf_counter() - start
+        db_time = g.get("db_time", 0.0)
+        serialization_time = g.get("serialization_time", 0.0)
+        statements = statement_count()
+
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        labels = (request.method, rule, str(response.status_code))
+        request_duration.observe(labels, duration)
+        request_statements.observe(labels, statements)
+        request_db_time.observe(labels, db_time)
+        request_serialization_time.observe(labels, serialization_time)
+        # streamed bodies have no length up front
+        if response.content_length is not None:
+            response_bytes.observe(labels, response.content_length)
+
+        if app.config.get("SERVER_TIMING"):
+            response.headers["Server-Timing"] = ", ".join([
+                f'db;dur={db_time * 1000:.2f};desc="{statements} queries"',
+                f"serialize;dur={serialization_time * 1000:.2f}",
+                f"total;dur={duration * 1000:.2f}",
+            ])
+        return response
+
+
+def render_metrics():
+    return "\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
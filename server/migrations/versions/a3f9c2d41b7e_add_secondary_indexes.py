@@ -0,0 +1,56 @@
+"""Add secondary indexes
+
+Revision ID: a3f9c2d41b7e
+Revises: 71d2e81088ff
+Create Date: 2026-10-18 09:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c2d41b7e'
+down_revision = '71d2e81088ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_role'), ['role'], unique=False)
+
+    with op.batch_alter_table('businesses', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_businesses_verification_status'), ['verification_status'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_business_id_price', ['business_id', 'price'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_price'), ['price'], unique=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_customer_id_order_date', ['customer_id', 'order_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_orders_order_status'), ['order_status'], unique=False)
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_items_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_items_product_id'), ['product_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_items_product_id'))
+        batch_op.drop_index(batch_op.f('ix_order_items_order_id'))
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_orders_order_status'))
+        batch_op.drop_index('ix_orders_customer_id_order_date')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_price'))
+        batch_op.drop_index('ix_products_business_id_price')
+
+    with op.batch_alter_table('businesses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_businesses_verification_status'))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_role'))
@@ -0,0 +1,47 @@
+"""Add sales rollups
+
+Revision ID: a8d1e6c4f052
+Revises: f5b2d8c6e371
+Create Date: 2026-10-18 13:21:08.517364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d1e6c4f052'
+down_revision = 'f5b2d8c6e371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filled by `flask analytics rebuild`; reports scan the order tables
+    # until then
+    op.create_table('sales_rollups',
+    sa.Column('rollup_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=True),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('rollup_id'),
+    sa.UniqueConstraint('granularity', 'dimension', 'key', 'bucket')
+    )
+    with op.batch_alter_table('sales_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_rollups_granularity_dimension_bucket',
+                              ['granularity', 'dimension', 'bucket'], unique=False)
+        batch_op.create_index('ix_sales_rollups_business_id_granularity_dimension_bucket',
+                              ['business_id', 'granularity', 'dimension', 'bucket'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sales_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_rollups_business_id_granularity_dimension_bucket')
+        batch_op.drop_index('ix_sales_rollups_granularity_dimension_bucket')
+
+    op.drop_table('sales_rollups')
@@ -0,0 +1,38 @@
+"""Add order status changes
+
+Revision ID: b3f9e2d7c618
+Revises: a8d1e6c4f052
+Create Date: 2026-10-18 15:02:44.190273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f9e2d7c618'
+down_revision = 'a8d1e6c4f052'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_status_changes',
+    sa.Column('change_id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(), nullable=False),
+    sa.Column('from_status', sa.String(), nullable=True),
+    sa.Column('to_status', sa.String(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], name=op.f('fk_order_status_changes_order_id_orders')),
+    sa.PrimaryKeyConstraint('change_id')
+    )
+    with op.batch_alter_table('order_status_changes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_status_changes_order_id'), ['order_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_status_changes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_status_changes_order_id'))
+
+    op.drop_table('order_status_changes')
@@ -0,0 +1,44 @@
+"""Add stock reservations
+
+Revision ID: b5d3e9f1a6c8
+Revises: f2a6d0b7c4e1
+Create Date: 2026-10-18 10:41:07.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d3e9f1a6c8'
+down_revision = 'f2a6d0b7c4e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_reservations',
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], name=op.f('fk_stock_reservations_order_id_orders')),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], name=op.f('fk_stock_reservations_product_id_products')),
+    sa.PrimaryKeyConstraint('reservation_id')
+    )
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stock_reservations_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_stock_reservations_product_id'), ['product_id'], unique=False)
+        batch_op.create_index('ix_stock_reservations_status_expires_at', ['status', 'expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_reservations_status_expires_at')
+        batch_op.drop_index(batch_op.f('ix_stock_reservations_product_id'))
+        batch_op.drop_index(batch_op.f('ix_stock_reservations_order_id'))
+
+    op.drop_table('stock_reservations')
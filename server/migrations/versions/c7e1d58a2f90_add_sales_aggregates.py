@@ -0,0 +1,67 @@
+"""Add sales aggregate tables
+
+Revision ID: c7e1d58a2f90
+Revises: a3f9c2d41b7e
+Create Date: 2026-10-18 10:41:07.562193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e1d58a2f90'
+down_revision = 'a3f9c2d41b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('business_sales',
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('units_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('last_sale_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.vendor_id'], name=op.f('fk_business_sales_business_id_businesses')),
+    sa.PrimaryKeyConstraint('business_id')
+    )
+    op.create_table('product_sales',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('units_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('last_sale_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.vendor_id'], name=op.f('fk_product_sales_business_id_businesses')),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], name=op.f('fk_product_sales_product_id_products')),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    with op.batch_alter_table('product_sales', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_sales_business_id'), ['business_id'], unique=False)
+
+    # backfill from the existing order history
+    op.execute(
+        "INSERT INTO product_sales (product_id, business_id, units_sold, revenue, order_count, last_sale_at) "
+        "SELECT p.product_id, p.business_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price), "
+        "COUNT(DISTINCT oi.order_id), MAX(o.order_date) "
+        "FROM order_items oi JOIN products p ON p.product_id = oi.product_id "
+        "JOIN orders o ON o.order_id = oi.order_id "
+        "GROUP BY p.product_id, p.business_id"
+    )
+    op.execute(
+        "INSERT INTO business_sales (business_id, units_sold, revenue, order_count, last_sale_at) "
+        "SELECT p.business_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price), "
+        "COUNT(DISTINCT oi.order_id), MAX(o.order_date) "
+        "FROM order_items oi JOIN products p ON p.product_id = oi.product_id "
+        "JOIN orders o ON o.order_id = oi.order_id "
+        "GROUP BY p.business_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('product_sales', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_sales_business_id'))
+
+    op.drop_table('product_sales')
+    op.drop_table('business_sales')
@@ -0,0 +1,41 @@
+"""Add order events
+
+Revision ID: c7e4a1f9d253
+Revises: b3f9e2d7c618
+Create Date: 2026-10-18 17:41:09.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e4a1f9d253'
+down_revision = 'b3f9e2d7c618'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_events',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('order_events', schema=None) as batch_op:
+        batch_op.create_index('ix_order_events_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_order_events_order_id_seq', ['order_id', 'seq'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_events_order_id_seq')
+        batch_op.drop_index('ix_order_events_created_at')
+
+    op.drop_table('order_events')
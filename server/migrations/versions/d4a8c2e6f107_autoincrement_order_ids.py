@@ -0,0 +1,32 @@
+"""Never reuse order ids
+
+Revision ID: d4a8c2e6f107
+Revises: c7e4a1f9d253
+Create Date: 2026-10-18 19:12:40.731842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c2e6f107'
+down_revision = 'c7e4a1f9d253'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL sequences never go back; SQLite only stops reusing the
+    # highest rowid with AUTOINCREMENT, which needs the table rebuilt
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('orders', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('orders', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,78 @@
+"""Add product images
+
+Revision ID: d7a4c2e8b913
+Revises: b5d3e9f1a6c8
+Create Date: 2026-10-18 11:02:36.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a4c2e8b913'
+down_revision = 'b5d3e9f1a6c8'
+branch_labels = None
+depends_on = None
+
+IMAGE_MARKER = ' Image: '
+
+
+def upgrade():
+    op.create_table('product_images',
+    sa.Column('image_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('source_url', sa.String(), nullable=True),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('byte_size', sa.Integer(), nullable=True),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('thumbnail_status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], name=op.f('fk_product_images_product_id_products')),
+    sa.PrimaryKeyConstraint('image_id')
+    )
+    with op.batch_alter_table('product_images', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_images_product_id'), ['product_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_product_images_sha256'), ['sha256'], unique=False)
+
+    # move the "Description. Image: <url>" suffix out of product descriptions
+    bind = op.get_bind()
+    products = sa.table('products', sa.column('product_id', sa.Integer), sa.column('description', sa.Text))
+    images = sa.table('product_images', sa.column('product_id', sa.Integer), sa.column('source_url', sa.String),
+                      sa.column('position', sa.Integer), sa.column('thumbnail_status', sa.String))
+    rows = bind.execute(
+        sa.select(products.c.product_id, products.c.description)
+        .where(products.c.description.like(f'%{IMAGE_MARKER}%'))
+    ).all()
+    for product_id, description in rows:
+        text, _, url = description.rpartition(IMAGE_MARKER)
+        bind.execute(images.insert().values(product_id=product_id, source_url=url.strip(), position=0,
+                                            thumbnail_status='unavailable'))
+        bind.execute(products.update().where(products.c.product_id == product_id).values(description=text))
+
+
+def downgrade():
+    bind = op.get_bind()
+    products = sa.table('products', sa.column('product_id', sa.Integer), sa.column('description', sa.Text))
+    images = sa.table('product_images', sa.column('image_id', sa.Integer), sa.column('product_id', sa.Integer),
+                      sa.column('source_url', sa.String), sa.column('position', sa.Integer))
+    rows = bind.execute(
+        sa.select(images.c.product_id, images.c.source_url, products.c.description)
+        .join(products, products.c.product_id == images.c.product_id)
+        .where(images.c.source_url.isnot(None))
+        .order_by(images.c.product_id, images.c.position.desc(), images.c.image_id.desc())
+    ).all()
+    # the first image of each product goes back into its description
+    restored = {product_id: (url, description) for product_id, url, description in rows}
+    for product_id, (url, description) in restored.items():
+        bind.execute(products.update().where(products.c.product_id == product_id)
+                     .values(description=f'{description or ""}{IMAGE_MARKER}{url}'))
+
+    with op.batch_alter_table('product_images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_images_sha256'))
+        batch_op.drop_index(batch_op.f('ix_product_images_product_id'))
+
+    op.drop_table('product_images')
@@ -0,0 +1,57 @@
+"""Add product full-text search index
+
+Revision ID: e4b8a1c93d27
+Revises: c7e1d58a2f90
+Create Date: 2026-10-18 11:20:31.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8a1c93d27'
+down_revision = 'c7e1d58a2f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases fall back to ILIKE matching
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, description, content='products', content_rowid='product_id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name, description) VALUES (new.product_id, new.name, new.description); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description) "
+        "VALUES ('delete', old.product_id, old.name, old.description); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description) "
+        "VALUES ('delete', old.product_id, old.name, old.description); "
+        "INSERT INTO products_fts(rowid, name, description) VALUES (new.product_id, new.name, new.description); "
+        "END"
+    )
+    op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS products_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_ai")
+    op.execute("DROP TABLE IF EXISTS products_fts")
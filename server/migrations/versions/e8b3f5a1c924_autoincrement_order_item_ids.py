@@ -0,0 +1,32 @@
+"""Never reuse order item ids
+
+Revision ID: e8b3f5a1c924
+Revises: d4a8c2e6f107
+Create Date: 2026-10-18 19:26:03.118570
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f5a1c924'
+down_revision = 'd4a8c2e6f107'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL sequences never go back; SQLite only stops reusing the
+    # highest rowid with AUTOINCREMENT, which needs the table rebuilt
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('order_items', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('order_items', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,29 @@
+"""Add table versions
+
+Revision ID: f2a6d0b7c4e1
+Revises: e4b8a1c93d27
+Create Date: 2026-10-18 12:02:15.117840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6d0b7c4e1'
+down_revision = 'e4b8a1c93d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
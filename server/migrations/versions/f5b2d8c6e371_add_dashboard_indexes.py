@@ -0,0 +1,32 @@
+"""Add vendor dashboard indexes
+
+Revision ID: f5b2d8c6e371
+Revises: e9c3f7a2b14d
+Create Date: 2026-10-18 12:47:19.204733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b2d8c6e371'
+down_revision = 'e9c3f7a2b14d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_business_id_stock_quantity', ['business_id', 'stock_quantity'], unique=False)
+
+    with op.batch_alter_table('product_sales', schema=None) as batch_op:
+        batch_op.create_index('ix_product_sales_business_id_revenue', ['business_id', 'revenue'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product_sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_sales_business_id_revenue')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_business_id_stock_quantity')
@@ -8,6 +8,7 @@ from datetime import datetime
 
 metadata = MetaData(
     naming_convention={
+        "ix": "ix_%(column_0_label)s",
         "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"
     }
 )
@@ -18,14 +19,20 @@ db = SQLAlchemy(metadata=metadata)
 class User(db.Model, SerializerMixin):
     __tablename__ = "users"
    
-    serialize_rules = ("-business.user", "-customer.user")
+    serialize_rules = ("-business.user", "-customer.user", "-password")
+    # never serialized, not even by the admin profile
+    serialize_hidden = ("password",)
+    serialize_profiles = {
+        "summary": ("user_id", "full_name", "email", "phone", "role", "status"),
+        "detail": ("user_id", "full_name", "email", "phone", "role", "status", "created_at"),
+    }
     
     user_id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String, nullable=False)
     email = db.Column(db.String, unique=True, nullable=False)
     password = db.Column(db.String, nullable=False)
     phone = db.Column(db.String)
-    role = db.Column(db.String)
+    role = db.Column(db.String, index=True)
     status = db.Column(db.String)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -62,11 +69,15 @@ class Business(db.Model, SerializerMixin):
     __tablename__ = "businesses"
     
     serialize_rules = ("-user.business", "-products.business")
+    serialize_profiles = {
+        "summary": ("vendor_id", "user_id", "business_name", "verification_status", "rating"),
+        "detail": ("vendor_id", "user_id", "business_name", "verification_status", "rating", "created_at"),
+    }
     
     vendor_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), unique=True, nullable=False)
     business_name = db.Column(db.String, nullable=False)
-    verification_status = db.Column(db.String, default="pending")
+    verification_status = db.Column(db.String, default="pending", index=True)
     rating = db.Column(db.Numeric(3, 2))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -100,15 +111,27 @@ class Business(db.Model, SerializerMixin):
 
 class Product(db.Model, SerializerMixin):
     __tablename__ = "products"
+    # leading business_id also serves plain business_id lookups
+    __table_args__ = (
+        db.Index("ix_products_business_id_price", "business_id", "price"),
+        # vendor dashboard low-stock list, read in stock order
+        db.Index("ix_products_business_id_stock_quantity", "business_id", "stock_quantity"),
+    )
   
-    serialize_rules = ("-business.products", "-order_items.product")
+    serialize_rules = ("-business.products", "-order_items.product", "-images.product")
+    serialize_profiles = {
+        "summary": ("product_id", "business_id", "category_id", "name", "price", "bulk_price",
+                    "min_bulk_quantity", "stock_quantity"),
+        "detail": ("product_id", "business_id", "category_id", "name", "description", "price",
+                   "bulk_price", "min_bulk_quantity", "stock_quantity", "created_at"),
+    }
     
     product_id = db.Column(db.Integer, primary_key=True)
     business_id = db.Column(db.Integer, db.ForeignKey("businesses.vendor_id"), nullable=False)
     category_id = db.Column(db.Integer)
     name = db.Column(db.String, nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.Numeric(10, 2), nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False, index=True)
     bulk_price = db.Column(db.Numeric(10, 2))
     min_bulk_quantity = db.Column(db.Integer)
     stock_quantity = db.Column(db.Integer, default=0)
@@ -117,6 +140,9 @@ class Product(db.Model, SerializerMixin):
     # relationships
     business = db.relationship("Business", back_populates="products")
     order_items = db.relationship("OrderItem", back_populates="product", cascade="all, delete-orphan")
+    stock_reservations = db.relationship("StockReservation", back_populates="product", cascade="all, delete-orphan")
+    images = db.relationship("ProductImage", back_populates="product", cascade="all, delete-orphan",
+                             order_by="(ProductImage.position, ProductImage.image_id)")
     
     # validations
     @validates("name")
@@ -159,6 +185,10 @@ class Customer(db.Model, SerializerMixin):
     __tablename__ = "customers"
 
     serialize_rules = ("-user.customer", "-orders.customer")
+    serialize_profiles = {
+        "summary": ("customer_id", "user_id", "customer_type", "business_name"),
+        "detail": ("customer_id", "user_id", "customer_type", "business_name", "created_at"),
+    }
 
     customer_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), unique=True, nullable=False)
@@ -186,14 +216,28 @@ class Customer(db.Model, SerializerMixin):
 
 class Order(db.Model, SerializerMixin):
     __tablename__ = "orders"
+    # leading customer_id also serves plain customer_id lookups
+    __table_args__ = (
+        db.Index("ix_orders_customer_id_order_date", "customer_id", "order_date"),
+        # never hand a deleted order's id to a new one: job idempotency keys
+        # and order events are keyed by it
+        {"sqlite_autoincrement": True},
+    )
     
     serialize_rules = ("-customer.orders", "-order_items.order")
+    serialize_profiles = {
+        "summary": ("order_id", "customer_id", "order_type", "total_amount", "order_status",
+                    "payment_status", "delivery_status", "order_date"),
+        "detail": ("order_id", "customer_id", "order_type", "total_amount", "order_status",
+                   "payment_status", "payment_method", "transaction_reference",
+                   "delivery_address", "delivery_status", "order_date"),
+    }
 
     order_id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey("customers.customer_id"), nullable=False)
     order_type = db.Column(db.String)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
-    order_status = db.Column(db.String, default="pending")
+    order_status = db.Column(db.String, default="pending", index=True)
     payment_status = db.Column(db.String, default="unpaid")
     payment_method = db.Column(db.String)
     transaction_reference = db.Column(db.String)
@@ -204,6 +248,9 @@ class Order(db.Model, SerializerMixin):
     # relationships
     customer = db.relationship("Customer", back_populates="orders")
     order_items = db.relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    stock_reservations = db.relationship("StockReservation", back_populates="order", cascade="all, delete-orphan")
+    status_changes = db.relationship("OrderStatusChange", back_populates="order", cascade="all, delete-orphan",
+                                     order_by="OrderStatusChange.change_id")
     
     # validations
     @validates("total_amount")
@@ -241,12 +288,18 @@ class Order(db.Model, SerializerMixin):
 
 class OrderItem(db.Model, SerializerMixin):
     __tablename__ = "order_items"
+    # order events name items by id, so a deleted item's id is never reused
+    __table_args__ = {"sqlite_autoincrement": True}
    
     serialize_rules = ("-order.order_items", "-product.order_items")
+    serialize_profiles = {
+        "summary": ("order_item_id", "order_id", "product_id", "quantity", "unit_price"),
+        "detail": ("order_item_id", "order_id", "product_id", "quantity", "unit_price"),
+    }
 
     order_item_id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.order_id"), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey("products.product_id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.order_id"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.product_id"), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     unit_price = db.Column(db.Numeric(10, 2), nullable=False)
     
@@ -272,4 +325,248 @@ class OrderItem(db.Model, SerializerMixin):
         return value
     
     def __repr__(self):
-        return f"<OrderItem id={self.order_item_id} qty={self.quantity}>"
\ No newline at end of file
+        return f"<OrderItem id={self.order_item_id} qty={self.quantity}>"
+
+class ProductSales(db.Model, SerializerMixin):
+    __tablename__ = "product_sales"
+    # a vendor's best sellers, read in revenue order
+    __table_args__ = (
+        db.Index("ix_product_sales_business_id_revenue", "business_id", "revenue"),
+    )
+
+    serialize_profiles = {
+        "summary": ("product_id", "business_id", "units_sold", "revenue", "order_count", "last_sale_at"),
+        "detail": ("product_id", "business_id", "units_sold", "revenue", "order_count", "last_sale_at"),
+    }
+
+    product_id = db.Column(db.Integer, db.ForeignKey("products.product_id"), primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey("businesses.vendor_id"), nullable=False, index=True)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<ProductSales product_id={self.product_id} units={self.units_sold}>"
+
+
+class BusinessSales(db.Model, SerializerMixin):
+    __tablename__ = "business_sales"
+
+    serialize_profiles = {
+        "summary": ("business_id", "units_sold", "revenue", "order_count", "last_sale_at"),
+        "detail": ("business_id", "units_sold", "revenue", "order_count", "last_sale_at"),
+    }
+
+    business_id = db.Column(db.Integer, db.ForeignKey("businesses.vendor_id"), primary_key=True)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<BusinessSales business_id={self.business_id} revenue={self.revenue}>"
+
+
+class SalesRollup(db.Model, SerializerMixin):
+    __tablename__ = "sales_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("granularity", "dimension", "key", "bucket"),
+        # every key of a dimension over a time range
+        db.Index("ix_sales_rollups_granularity_dimension_bucket", "granularity", "dimension", "bucket"),
+        # one business's products over a time range
+        db.Index("ix_sales_rollups_business_id_granularity_dimension_bucket",
+                 "business_id", "granularity", "dimension", "bucket"),
+    )
+
+    serialize_profiles = {
+        "summary": ("granularity", "dimension", "key", "bucket", "orders", "units_sold", "revenue"),
+        "detail": ("rollup_id", "granularity", "dimension", "key", "business_id", "bucket", "orders",
+                   "units_sold", "revenue"),
+    }
+
+    rollup_id = db.Column(db.Integer, primary_key=True)
+    # "hour" or "day"
+    granularity = db.Column(db.String, nullable=False)
+    # "total", "business", "product" or "customer_type"; key is the
+    # business/product id or the customer type ("" for total)
+    dimension = db.Column(db.String, nullable=False)
+    key = db.Column(db.String, nullable=False)
+    # owning business of business and product rows
+    business_id = db.Column(db.Integer)
+    # start of the hour or day (UTC)
+    bucket = db.Column(db.DateTime, nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SalesRollup {self.granularity} {self.dimension}={self.key} {self.bucket}>"
+
+
+class TableVersion(db.Model, SerializerMixin):
+    __tablename__ = "table_versions"
+
+    serialize_profiles = {
+        "summary": ("table_name", "version", "updated_at"),
+        "detail": ("table_name", "version", "updated_at"),
+    }
+
+    table_name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<TableVersion {self.table_name}={self.version}>"
+
+
+class StockReservation(db.Model, SerializerMixin):
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        db.Index("ix_stock_reservations_status_expires_at", "status", "expires_at"),
+    )
+
+    serialize_rules = ("-order.stock_reservations", "-product.stock_reservations")
+    serialize_profiles = {
+        "summary": ("reservation_id", "order_id", "product_id", "quantity", "status", "expires_at"),
+        "detail": ("reservation_id", "order_id", "product_id", "quantity", "status", "created_at", "expires_at"),
+    }
+
+    reservation_id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.order_id"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.product_id"), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    # held -> committed (order confirmed or paid) or released (cancelled, timed out)
+    status = db.Column(db.String, nullable=False, default="held")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime)
+
+    # relationships
+    order = db.relationship("Order", back_populates="stock_reservations")
+    product = db.relationship("Product", back_populates="stock_reservations")
+
+    def __repr__(self):
+        return f"<StockReservation order={self.order_id} product={self.product_id} {self.status}>"
+
+
+class OrderStatusChange(db.Model, SerializerMixin):
+    __tablename__ = "order_status_changes"
+
+    serialize_rules = ("-order.status_changes",)
+    serialize_profiles = {
+        "summary": ("field", "from_status", "to_status", "changed_at"),
+        "detail": ("change_id", "order_id", "field", "from_status", "to_status", "changed_at"),
+    }
+
+    change_id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.order_id"), nullable=False, index=True)
+    # "order_status", "payment_status" or "delivery_status"
+    field = db.Column(db.String, nullable=False)
+    from_status = db.Column(db.String)
+    to_status = db.Column(db.String, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # relationships
+    order = db.relationship("Order", back_populates="status_changes")
+
+    def __repr__(self):
+        return f"<OrderStatusChange order={self.order_id} {self.field} {self.from_status}->{self.to_status}>"
+
+
+class ProductImage(db.Model, SerializerMixin):
+    __tablename__ = "product_images"
+
+    serialize_rules = ("-product.images",)
+    serialize_profiles = {
+        "summary": ("image_id", "product_id", "sha256", "source_url", "width", "height", "position",
+                    "thumbnail_status"),
+        "detail": ("image_id", "product_id", "sha256", "source_url", "content_type", "byte_size", "width",
+                   "height", "position", "thumbnail_status", "created_at"),
+    }
+
+    image_id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.product_id"), nullable=False, index=True)
+    # uploaded files are stored under their SHA-256; source_url is for
+    # images hosted elsewhere
+    sha256 = db.Column(db.String(64), index=True)
+    source_url = db.Column(db.String)
+    content_type = db.Column(db.String)
+    byte_size = db.Column(db.Integer)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    # pending -> ready, failed, or unavailable (no image library installed)
+    thumbnail_status = db.Column(db.String, nullable=False, default="pending")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # relationships
+    product = db.relationship("Product", back_populates="images")
+
+    def __repr__(self):
+        return f"<ProductImage id={self.image_id} product={self.product_id} {self.sha256 or self.source_url}>"
+
+
+class OrderEvent(db.Model, SerializerMixin):
+    __tablename__ = "order_events"
+    __table_args__ = (
+        db.Index("ix_order_events_order_id_seq", "order_id", "seq"),
+        db.Index("ix_order_events_created_at", "created_at"),
+        # never hand out a sequence number twice, even after compaction
+        # empties the table
+        {"sqlite_autoincrement": True},
+    )
+
+    serialize_profiles = {
+        "summary": ("seq", "order_id", "entity", "entity_id", "action", "data", "created_at"),
+        "detail": ("seq", "order_id", "entity", "entity_id", "action", "data", "created_at"),
+    }
+
+    seq = db.Column(db.Integer, primary_key=True)
+    # no foreign key: the events of a deleted order are kept
+    order_id = db.Column(db.Integer, nullable=False)
+    # "order" or "order_item"
+    entity = db.Column(db.String, nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    # "created", "updated" or "deleted"
+    action = db.Column(db.String, nullable=False)
+    # JSON: every column when created, the changed columns when updated
+    data = db.Column(db.Text, nullable=False, default="{}")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<OrderEvent seq={self.seq} {self.entity} {self.entity_id} {self.action}>"
+
+
+class Job(db.Model, SerializerMixin):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    serialize_profiles = {
+        "summary": ("job_id", "task", "status", "attempts", "run_at", "last_error"),
+        "detail": ("job_id", "task", "payload", "idempotency_key", "status", "attempts", "max_attempts",
+                   "run_at", "locked_at", "locked_by", "last_error", "created_at", "finished_at"),
+    }
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String, nullable=False)
+    # JSON-encoded keyword arguments of the task
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    # a second job with the same key is never queued
+    idempotency_key = db.Column(db.String, unique=True)
+    # queued -> running -> done, or back to queued for a retry, or dead once
+    # max_attempts is used up
+    status = db.Column(db.String, nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    # host:pid:thread of the worker running it
+    locked_by = db.Column(db.String)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<Job id={self.job_id} {self.task} {self.status}>"
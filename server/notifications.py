@@ -0,0 +1,86 @@
+# server/notifications.py
+
+from flask import current_app
+from flask_mail import Mail, Message
+from sqlalchemy import inspect
+
+from models import db, Order
+from jobs import task, enqueue_many
+
+mail = Mail()
+
+DELIVERY_MESSAGES = {
+    "not_shipped": "is being prepared",
+    "shipped": "has been shipped",
+    "in_transit": "is on its way",
+    "delivered": "has been delivered",
+}
+
+
+def send_mail(recipient, subject, body):
+    # without an SMTP server (development) the message is only logged
+    if not current_app.config.get("MAIL_SERVER"):
+        current_app.logger.info("Mail to %s: %s", recipient, subject)
+        return
+    mail.send(Message(subject, recipients=[recipient], body=body))
+
+
+def _recipient(order):
+    user = order.customer.user if order.customer else None
+    return user.email if user else None
+
+
+# ============================================
+# Tasks
+# ============================================
+@task("order_confirmation")
+def order_confirmation(order_id):
+    order = db.session.get(Order, order_id)
+    if order is None or _recipient(order) is None:
+        return
+    lines = "\n".join(f"  {item.quantity} x {item.product.name} @ {item.unit_price}" for item in order.order_items)
+    send_mail(
+        _recipient(order),
+        f"Market Mtaani order #{order.order_id} received",
+        f"Thank you for your order #{order.order_id}.\n\n{lines}\n\nTotal: {order.total_amount}\n",
+    )
+
+
+@task("delivery_status_notification")
+def delivery_status_notification(order_id, delivery_status):
+    order = db.session.get(Order, order_id)
+    if order is None or _recipient(order) is None:
+        return
+    progress = DELIVERY_MESSAGES.get(delivery_status, f"is now {delivery_status}")
+    send_mail(
+        _recipient(order),
+        f"Market Mtaani order #{order.order_id} {progress}",
+        f"Your order #{order.order_id} {progress}.\n",
+    )
+
+
+# ============================================
+# Queueing
+# ============================================
+def queue_order_confirmations(session, order_ids):
+    enqueue_many(session, "order_confirmation",
+                 [({"order_id": order_id}, f"order_confirmation:{order_id}") for order_id in order_ids])
+
+
+def queue_order_confirmation(session, order_id):
+    queue_order_confirmations(session, [order_id])
+
+
+def queue_delivery_notifications(session, order_ids, delivery_status):
+    enqueue_many(session, "delivery_status_notification",
+                 [({"order_id": order_id, "delivery_status": delivery_status},
+                   f"delivery_status:{order_id}:{delivery_status}") for order_id in order_ids])
+
+
+def queue_order_notifications(session, order):
+    """Queue the emails due for ``order``'s unflushed status changes."""
+    attrs = inspect(order).attrs
+    if attrs.delivery_status.history.has_changes() and order.delivery_status:
+        queue_delivery_notifications(session, [order.order_id], order.delivery_status)
+    if attrs.order_status.history.has_changes() and order.order_status == "confirmed":
+        queue_order_confirmation(session, order.order_id)
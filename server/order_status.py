@@ -0,0 +1,254 @@
+# server/order_status.py
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, insert, inspect, select, update
+
+from models import Order, OrderItem, Product, OrderStatusChange
+from caching import bump_versions
+from events import journal, order_event, UPDATED
+from inventory import release, commit, COMMITTED_ORDER_STATUSES
+from notifications import queue_order_confirmations, queue_delivery_notifications
+
+# where each status may move next; setting the current value again is
+# always allowed and records nothing
+TRANSITIONS = {
+    "order_status": {
+        "pending": ("confirmed", "processing", "completed", "cancelled"),
+        "confirmed": ("processing", "completed", "cancelled"),
+        "processing": ("completed", "cancelled"),
+        "completed": (),
+        "cancelled": (),
+    },
+    "payment_status": {
+        "unpaid": ("paid",),
+        "paid": ("refunded",),
+        "refunded": (),
+    },
+    "delivery_status": {
+        "not_shipped": ("shipped", "in_transit", "delivered"),
+        "shipped": ("in_transit", "delivered"),
+        "in_transit": ("delivered",),
+        "delivered": (),
+    },
+}
+STATUS_FIELDS = tuple(TRANSITIONS)
+# delivery states an order can no longer be cancelled from
+DISPATCHED = ("shipped", "in_transit", "delivered")
+# the only moves a cancelled order can still make besides order_status
+AFTER_CANCEL = {"payment_status": ("refunded",)}
+
+FILTERS = STATUS_FIELDS + ("customer_id", "business_id", "from", "to")
+MAX_ORDER_IDS = 10000
+UPDATE_BATCH = 5000
+MAX_REPORTED = 100
+
+orders = Order.__table__
+status_changes = OrderStatusChange.__table__
+
+
+class TransitionError(ValueError):
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.status = status
+
+
+def sources(field, target):
+    """The values of ``field`` from which ``target`` can be reached."""
+    return [state for state, targets in TRANSITIONS[field].items() if state == target or target in targets]
+
+
+def problem(current, changes):
+    """Why ``changes`` ({field: new}) cannot apply to an order in state
+    ``current`` ({field: value}), or ``None`` if they can."""
+    for field, new in changes.items():
+        old = current.get(field)
+        # rows from before the state machine may hold values it does not know
+        if old != new and old in TRANSITIONS[field] and new not in TRANSITIONS[field][old]:
+            return f"{field} cannot change from {old} to {new}"
+    final = dict(current, **changes)
+    if final.get("order_status") != "cancelled":
+        return None
+    if "order_status" in changes and final.get("delivery_status") in DISPATCHED:
+        return f"an order that is {final['delivery_status']} cannot be cancelled"
+    for field in ("payment_status", "delivery_status"):
+        new = final.get(field)
+        if new != current.get(field) and new not in AFTER_CANCEL.get(field, ()):
+            return f"a cancelled order cannot change {field} to {new}"
+    return None
+
+
+def _history_rows(order_id, current, changes, now):
+    return [{"order_id": order_id, "field": field, "from_status": current.get(field), "to_status": new,
+             "changed_at": now} for field, new in changes.items() if current.get(field) != new]
+
+
+# ============================================
+# One order (ORM)
+# ============================================
+def _old_value(state, field):
+    history = state.attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return state.attrs[field].loaded_value
+
+
+def record_transitions(session, order):
+    """Check ``order``'s unflushed status changes against :data:`TRANSITIONS`
+    and add them to its history; raises :class:`TransitionError`."""
+    state = inspect(order)
+    current = {field: _old_value(state, field) for field in STATUS_FIELDS}
+    changes = {field: getattr(order, field) for field in STATUS_FIELDS
+               if getattr(order, field) != current[field]}
+    if not changes:
+        return
+    reason = problem(current, changes)
+    if reason:
+        raise TransitionError(f"Order {order.order_id}: {reason}")
+    session.connection().execute(insert(status_changes),
+                                 _history_rows(order.order_id, current, changes, datetime.utcnow()))
+    bump_versions(session, [status_changes.name])
+
+
+# ============================================
+# Many orders (set-based)
+# ============================================
+def _moment(value, name, end=False):
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise TransitionError(f"{name} must be an ISO 8601 date or datetime", 400)
+    # a date-only "to" includes that whole day
+    return moment + timedelta(days=1) if end and len(str(value)) == 10 else moment
+
+
+def _scope(order_ids, filters):
+    conditions = []
+    if order_ids is not None:
+        if not isinstance(order_ids, list) or not all(isinstance(order_id, int) for order_id in order_ids):
+            raise TransitionError("order_ids must be a list of integers", 400)
+        if len(order_ids) > MAX_ORDER_IDS:
+            raise TransitionError(f"At most {MAX_ORDER_IDS} order_ids per request", 400)
+        conditions.append(orders.c.order_id.in_(order_ids))
+
+    filters = filters or {}
+    if not isinstance(filters, dict):
+        raise TransitionError("filter must be an object", 400)
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise TransitionError(f"Unknown filter(s): {', '.join(sorted(unknown))}; use {', '.join(FILTERS)}", 400)
+    for field in STATUS_FIELDS:
+        if field in filters:
+            values = filters[field] if isinstance(filters[field], list) else [filters[field]]
+            conditions.append(orders.c[field].in_(values))
+    if "customer_id" in filters:
+        conditions.append(orders.c.customer_id == filters["customer_id"])
+    if "business_id" in filters:
+        conditions.append(exists(
+            select(OrderItem.order_item_id).join(Product, Product.product_id == OrderItem.product_id)
+            .where(OrderItem.order_id == orders.c.order_id, Product.business_id == filters["business_id"])
+        ))
+    if "from" in filters:
+        conditions.append(orders.c.order_date >= _moment(filters["from"], "from"))
+    if "to" in filters:
+        conditions.append(orders.c.order_date < _moment(filters["to"], "to", end=True))
+
+    if not conditions:
+        raise TransitionError("Give order_ids or a filter", 400)
+    return conditions
+
+
+def transition_orders(session, changes, order_ids=None, filters=None):
+    """Move every order picked by ``order_ids`` and/or ``filters`` to the
+    statuses in ``changes`` ({field: new status}).
+
+    The orders are read once, each is checked against the state machine,
+    and the valid ones are moved with one ``UPDATE ... WHERE order_id IN
+    (...) AND <field> IN (<allowed sources>)`` per batch; orders that cannot
+    make the move are left alone. Stock, emails and history follow as for
+    a single ``PATCH /orders/:id``. Returns the applied, unchanged and
+    rejected counts with the first rejections.
+    """
+    if not changes:
+        raise TransitionError(f"Give at least one of: {', '.join(STATUS_FIELDS)}", 400)
+    for field, value in changes.items():
+        if field not in TRANSITIONS:
+            raise TransitionError(f"Unknown status field {field!r}", 400)
+        if value not in TRANSITIONS[field]:
+            raise TransitionError(f"{field} must be one of: {', '.join(TRANSITIONS[field])}", 400)
+
+    connection = session.connection()
+    rows = connection.execute(
+        select(orders.c.order_id, *(orders.c[field] for field in STATUS_FIELDS))
+        .where(*_scope(order_ids, filters)).with_for_update()
+    ).all()
+
+    current = {}
+    unchanged = 0
+    rejections = []
+    for order_id, *values in rows:
+        state = dict(zip(STATUS_FIELDS, values))
+        if all(state[field] == value for field, value in changes.items()):
+            unchanged += 1
+            continue
+        reason = problem(state, changes)
+        if reason:
+            rejections.append({"order_id": order_id, "error": reason})
+        else:
+            current[order_id] = state
+
+    applied = []
+    eligible = list(current)
+    guards = [orders.c[field].in_(sources(field, value)) for field, value in changes.items()]
+    for start in range(0, len(eligible), UPDATE_BATCH):
+        applied.extend(connection.scalars(
+            update(orders).where(orders.c.order_id.in_(eligible[start:start + UPDATE_BATCH]), *guards)
+            .values(**changes).returning(orders.c.order_id)
+        ))
+
+    # the guards also skip what problem() lets through: NULL or unknown
+    # legacy values, which no transition starts from
+    skipped = set(eligible) - set(applied)
+    for order_id in sorted(skipped):
+        state = current.pop(order_id)
+        field = next((field for field, value in changes.items() if state[field] not in sources(field, value)), None)
+        rejections.append({"order_id": order_id, "error": (
+            f"{field} cannot change from {state[field]} to {changes[field]}" if field
+            else "the order changed while it was being updated")})
+
+    not_found = sorted(set(order_ids or ()) - {row[0] for row in rows}) if order_ids is not None else []
+    result = {
+        "applied": len(applied),
+        "unchanged": unchanged,
+        "rejected": len(rejections),
+        "not_found": not_found,
+        "rejections": rejections[:MAX_REPORTED],
+    }
+    if not applied:
+        return result
+
+    now = datetime.utcnow()
+    connection.execute(insert(status_changes), [row for order_id in applied
+                                                for row in _history_rows(order_id, current[order_id], changes, now)])
+    bump_versions(session, [orders.name, status_changes.name])
+    journal(session, [order_event("order", order_id, order_id, UPDATED,
+                                  {field: new for field, new in changes.items() if current[order_id][field] != new})
+                      for order_id in sorted(applied)])
+
+    final = {order_id: dict(current[order_id], **changes) for order_id in applied}
+    cancelled = [order_id for order_id, state in final.items() if state["order_status"] == "cancelled"]
+    release(session, cancelled)
+    # the same rule as inventory.reservation_status
+    commit(session, [order_id for order_id, state in final.items() if order_id not in cancelled and (
+        state["payment_status"] == "paid" or state["order_status"] in COMMITTED_ORDER_STATUSES)])
+
+    if "delivery_status" in changes:
+        queue_delivery_notifications(session, [order_id for order_id in applied
+                                               if current[order_id]["delivery_status"] != changes["delivery_status"]],
+                                     changes["delivery_status"])
+    if changes.get("order_status") == "confirmed":
+        queue_order_confirmations(session, [order_id for order_id in applied
+                                            if current[order_id]["order_status"] != "confirmed"])
+    return result
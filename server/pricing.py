@@ -0,0 +1,146 @@
+# server/pricing.py
+
+import threading
+from bisect import bisect_right
+from decimal import Decimal
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, Customer, Product
+from caching import bump_versions, current_versions
+
+RETAILER = "RETAILER"
+WHOLESALER = "WHOLESALER"
+
+# table_versions entry bumped whenever a product's price fields change; the
+# products version itself also moves with every stock change
+PRICES_VERSION = "product_prices"
+PRICE_FIELDS = ("price", "bulk_price", "min_bulk_quantity")
+
+CENTS = Decimal("0.01")
+
+
+class PricingError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def price_tiers(price, bulk_price, min_bulk_quantity):
+    """Build ``{customer_type: ((min_quantity, unit_price), ...)}`` for a product.
+
+    Retailers pay the bulk price from ``min_bulk_quantity`` up; wholesalers
+    pay it from the first unit.
+    """
+    price = Decimal(price)
+    retail = [(1, price)]
+    wholesale = [(1, price)]
+    if bulk_price is not None:
+        bulk_price = Decimal(bulk_price)
+        if min_bulk_quantity and min_bulk_quantity > 1:
+            retail.append((min_bulk_quantity, bulk_price))
+        else:
+            retail = [(1, bulk_price)]
+        wholesale = [(1, bulk_price)]
+    return {RETAILER: tuple(retail), WHOLESALER: tuple(wholesale)}
+
+
+def tier_price(tiers, quantity):
+    index = bisect_right([min_quantity for min_quantity, _ in tiers], quantity) - 1
+    return tiers[max(index, 0)][1]
+
+
+class TierCache:
+    """Per-process cache of product price tiers.
+
+    Entries are tagged with the ``product_prices`` version they were read
+    at, so a price change committed by any worker empties every worker's
+    cache on its next lookup.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._tiers = {}
+        self._lock = threading.Lock()
+
+    def get(self, product_ids):
+        """Return ``{product_id: tiers}``, loading missing products with one query."""
+        version = current_versions([PRICES_VERSION])[PRICES_VERSION][0]
+        with self._lock:
+            if version != self.version:
+                self._tiers = {}
+                self.version = version
+            found = {product_id: self._tiers[product_id] for product_id in product_ids if product_id in self._tiers}
+
+        missing = [product_id for product_id in product_ids if product_id not in found]
+        if missing:
+            rows = db.session.execute(
+                select(Product.product_id, Product.price, Product.bulk_price, Product.min_bulk_quantity)
+                .where(Product.product_id.in_(missing))
+            ).all()
+            loaded = {product_id: price_tiers(price, bulk_price, min_bulk)
+                      for product_id, price, bulk_price, min_bulk in rows}
+            with self._lock:
+                if version == self.version:
+                    self._tiers.update(loaded)
+            found.update(loaded)
+        return found
+
+
+tier_cache = TierCache()
+
+
+def customer_type_for(customer_id=None, customer_type=None):
+    if customer_type is not None:
+        if customer_type not in (RETAILER, WHOLESALER):
+            raise PricingError(f"customer_type must be one of: {RETAILER}, {WHOLESALER}")
+        return customer_type
+    if customer_id is None:
+        return RETAILER
+    customer_type = db.session.scalar(select(Customer.customer_type).where(Customer.customer_id == customer_id))
+    if customer_type is None:
+        raise PricingError("Customer not found", 404)
+    return customer_type
+
+
+def quote(quantities, customer_type=RETAILER):
+    """Price ``quantities`` ({product_id: quantity}) for a customer type.
+
+    Returns one line per product with its unit price and line total; tiers
+    come from the cache, so a cart costs at most one product query.
+    """
+    tiers = tier_cache.get(list(quantities))
+    missing = [product_id for product_id in quantities if product_id not in tiers]
+    if missing:
+        raise PricingError(f"Product(s) not found: {', '.join(map(str, missing))}", 404)
+
+    lines = []
+    for product_id, quantity in quantities.items():
+        product_tiers = tiers[product_id].get(customer_type) or tiers[product_id][RETAILER]
+        unit_price = tier_price(product_tiers, quantity).quantize(CENTS)
+        lines.append({"product_id": product_id, "quantity": quantity, "unit_price": unit_price,
+                      "line_total": (unit_price * quantity).quantize(CENTS)})
+    return lines
+
+
+def unit_price(product_id, quantity, customer_type=RETAILER):
+    return quote({product_id: quantity}, customer_type)[0]["unit_price"]
+
+
+# ============================================
+# Invalidation
+# ============================================
+def _repriced(session):
+    # new products cannot be cached yet; deleted or repriced ones can
+    if any(isinstance(obj, Product) for obj in session.deleted):
+        return True
+    return any(isinstance(obj, Product) and any(db.inspect(obj).attrs[field].history.has_changes()
+                                                for field in PRICE_FIELDS)
+               for obj in session.dirty)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_prices_version(session, flush_context):
+    if _repriced(session):
+        bump_versions(session, [PRICES_VERSION])
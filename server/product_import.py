@@ -0,0 +1,157 @@
+# server/product_import.py
+
+import csv
+import io
+
+from sqlalchemy import bindparam, insert, select, update
+
+from models import Business, Product
+from bulk_load import validate_rows, BATCH_SIZE
+from caching import bump_versions
+from pricing import PRICES_VERSION, PRICE_FIELDS
+
+MAX_ROWS = 50000
+
+# the fields Products.post and ProductByID.patch accept
+CREATE_FIELDS = ("business_id", "category_id", "name", "description", "price", "bulk_price",
+                 "min_bulk_quantity", "stock_quantity")
+UPDATE_FIELDS = ("category_id", "name", "description", "price", "bulk_price", "min_bulk_quantity",
+                 "stock_quantity")
+
+products = Product.__table__
+
+
+class BulkProductError(ValueError):
+    def __init__(self, message, errors=(), status=400):
+        super().__init__(message)
+        self.errors = list(errors)
+        self.status = status
+
+    def report(self):
+        return {"error": str(self), "errors": [{"row": number, "error": message} for number, message in self.errors]}
+
+
+def parse_csv(data):
+    """Rows of a CSV upload, given as text or UTF-8 bytes. Empty cells are
+    left out, so an update only touches the columns a row fills in."""
+    try:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8-sig")
+        return [{key: value for key, value in row.items() if key and value not in ("", None)}
+                for row in csv.DictReader(io.StringIO(data))]
+    except UnicodeDecodeError:
+        raise BulkProductError("CSV files must be UTF-8")
+    except csv.Error as e:
+        raise BulkProductError(f"Invalid CSV file: {e}")
+
+
+def _check_rows(rows):
+    if not isinstance(rows, list) or not rows:
+        raise BulkProductError("Send a non-empty JSON array of products or a CSV file")
+    if len(rows) > MAX_ROWS:
+        raise BulkProductError(f"At most {MAX_ROWS} products per request")
+    if not all(isinstance(row, dict) for row in rows):
+        raise BulkProductError("Every product must be a JSON object")
+
+
+def _allowed(rows, fields):
+    # keep only the accepted fields; anything else is reported once per column
+    unknown = {key for row in rows for key in row} - set(fields)
+    errors = [(None, f"{name!r} cannot be set") for name in sorted(unknown)]
+    return [{key: value for key, value in row.items() if key in fields} for row in rows], errors
+
+
+def _fail(errors):
+    failed = len({number for number, _ in errors if number is not None})
+    message = f"{failed} row(s) failed validation" if failed else "Invalid columns"
+    raise BulkProductError(message, sorted(errors, key=lambda error: (error[0] or 0, error[1])))
+
+
+def _existing(connection, column, ids):
+    found = set()
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        found.update(connection.scalars(select(column).where(column.in_(ids[start:start + BATCH_SIZE]))))
+    return found
+
+
+def create_products(session, rows):
+    """Validate every row, then insert them all in batched statements.
+
+    Nothing is written unless every row is valid; otherwise
+    :class:`BulkProductError` carries one error per bad field. Returns the
+    new product ids, ascending.
+    """
+    _check_rows(rows)
+    rows, errors = _allowed(rows, CREATE_FIELDS)
+    numbers = range(1, len(rows) + 1)
+    cleaned, row_errors = validate_rows(Product, rows, numbers)
+    errors += row_errors
+
+    connection = session.connection()
+    known = _existing(connection, Business.vendor_id,
+                      {row["business_id"] for row in cleaned if row.get("business_id") is not None})
+    errors += [(number, f"Business {row['business_id']} not found") for number, row in zip(numbers, cleaned)
+               if row.get("business_id") is not None and row["business_id"] not in known]
+    if errors:
+        _fail(errors)
+
+    for row in cleaned:
+        if "stock_quantity" in row and row["stock_quantity"] is None:
+            row["stock_quantity"] = 0
+
+    # asking for the ids in parameter order would make SQLite insert one row
+    # per statement; unordered they come back a few hundred rows at a time
+    stmt = insert(products).returning(products.c.product_id)
+    product_ids = []
+    for start in range(0, len(cleaned), BATCH_SIZE):
+        product_ids.extend(connection.scalars(stmt, cleaned[start:start + BATCH_SIZE]))
+    bump_versions(session, [products.name, PRICES_VERSION])
+    return sorted(product_ids)
+
+
+def update_products(session, rows):
+    """Apply partial updates keyed by ``product_id`` in batched statements.
+
+    Each row only changes the fields it has. Rows sharing the same set of
+    fields (a price list, say) go out as one executemany ``UPDATE``.
+    Nothing is written unless every row is valid. Returns the number of
+    products updated.
+    """
+    _check_rows(rows)
+    rows, errors = _allowed(rows, ("product_id",) + UPDATE_FIELDS)
+    numbers = range(1, len(rows) + 1)
+    cleaned, row_errors = validate_rows(Product, rows, numbers, partial=True)
+    errors += row_errors
+
+    connection = session.connection()
+    known = _existing(connection, products.c.product_id,
+                      {row["product_id"] for row in cleaned if row.get("product_id") is not None})
+    seen = set()
+    groups = {}
+    for number, row in zip(numbers, cleaned):
+        product_id = row.pop("product_id", None)
+        if product_id is None:
+            errors.append((number, "product_id is required"))
+        elif product_id not in known:
+            errors.append((number, f"Product {product_id} not found"))
+        elif product_id in seen:
+            errors.append((number, f"Product {product_id} appears more than once"))
+        elif not row:
+            errors.append((number, "No fields to update"))
+        else:
+            seen.add(product_id)
+            groups.setdefault(tuple(sorted(row)), []).append(dict(row, b_product_id=product_id))
+    if errors:
+        _fail(errors)
+
+    stmt = update(products).where(products.c.product_id == bindparam("b_product_id"))
+    for batch in groups.values():
+        for start in range(0, len(batch), BATCH_SIZE):
+            connection.execute(stmt, batch[start:start + BATCH_SIZE])
+
+    changed = [products.name]
+    if any(set(PRICE_FIELDS) & set(fields) for fields in groups):
+        changed.append(PRICES_VERSION)
+    bump_versions(session, changed)
+    return len(seen)
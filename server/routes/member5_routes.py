@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func
-from models import db, Order, OrderItem, Product, Business
+from models import db, Order, OrderItem, Product, Business, ProductSales, BusinessSales
 
 # =====================================================
 # Blueprint
@@ -183,11 +182,8 @@ def get_business_total_revenue(business_id):
     if not business:
         return jsonify({'error': 'Business not found'}), 404
 
-    revenue = db.session.query(
-        func.sum(OrderItem.quantity * OrderItem.unit_price)
-    ).join(Product).filter(
-        Product.business_id == business_id
-    ).scalar() or 0
+    sales = db.session.get(BusinessSales, business_id)
+    revenue = sales.revenue if sales else 0
 
     return jsonify({
         'business_id': business_id,
@@ -201,9 +197,8 @@ def get_product_total_sold(product_id):
     if not product:
         return jsonify({'error': 'Product not found'}), 404
 
-    total_sold = db.session.query(
-        func.sum(OrderItem.quantity)
-    ).filter(OrderItem.product_id == product_id).scalar() or 0
+    sales = db.session.get(ProductSales, product_id)
+    total_sold = sales.units_sold if sales else 0
 
     return jsonify({
         'product_id': product_id,
@@ -0,0 +1,91 @@
+# server/search.py
+
+import re
+
+from sqlalchemy import DDL, event, func, literal_column, or_, table, column
+
+from models import Product
+
+# Products are indexed in an FTS5 external-content table; the triggers keep
+# it in step with every INSERT/UPDATE/DELETE on products, including bulk
+# Core statements that bypass the ORM.
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='product_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.product_id, new.name, new.description); "
+    "END",
+
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.product_id, old.name, old.description); "
+    "END",
+
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.product_id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.product_id, new.name, new.description); "
+    "END",
+]
+
+FTS_REBUILD = "INSERT INTO products_fts(products_fts) VALUES ('rebuild')"
+
+# bm25 column weights: a hit in the name counts ten times one in the description
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+products_fts = table("products_fts", column("rowid"))
+
+for statement in FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def rebuild_index(connection):
+    connection.exec_driver_sql(FTS_REBUILD)
+
+
+def search_terms(q):
+    return re.findall(r"\w+", q or "", re.UNICODE)
+
+
+def match_expression(terms):
+    # every term must match, each as a prefix: "dre eve" -> "dre"* "eve"*
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_products(session, q, business_id=None, category_id=None, min_price=None, max_price=None,
+                    limit=DEFAULT_LIMIT, offset=0, options=()):
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    query = session.query(Product).options(*options)
+
+    if session.get_bind().dialect.name == "sqlite":
+        rank = func.bm25(literal_column("products_fts"), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+        query = (
+            query.join(products_fts, products_fts.c.rowid == Product.product_id)
+            .filter(literal_column("products_fts").op("MATCH")(match_expression(terms)))
+            .order_by(rank, Product.product_id)
+        )
+    else:
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(Product.name.ilike(pattern), Product.description.ilike(pattern)))
+        query = query.order_by(Product.name, Product.product_id)
+
+    if business_id is not None:
+        query = query.filter(Product.business_id == business_id)
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+
+    return query.limit(limit).offset(offset).all()
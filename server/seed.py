@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
 # server/seed.py
 
-from app import app
-from models import db, User, Business, Customer, Product, Order, OrderItem
+from app import create_app
+from models import db, User, Business, Customer, Product, Order, OrderItem, ProductImage
+from bulk_load import clear
+from analytics import rebuild as rebuild_rollups, ROLLUPS_BUILT
+from caching import bump_versions
 from datetime import datetime
 
+app = create_app()
+
 def seed_data():
     with app.app_context():
         print("Clearing existing data...")
-        OrderItem.query.delete()
-        Order.query.delete()
-        Product.query.delete()
-        Business.query.delete()
-        Customer.query.delete()
-        User.query.delete()
+        clear(db.session.connection())
+        db.session.commit()
         
         print("Seeding users...")
         
@@ -131,7 +132,8 @@ def seed_data():
             Product(
                 business_id=businesses[0].vendor_id,
                 name="Elegant Evening Dress",
-                description="Beautiful evening dress perfect for special occasions. Image: https://images.unsplash.com/photo-1566174053879-31528523f8ae?w=400",
+                description="Beautiful evening dress perfect for special occasions.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1566174053879-31528523f8ae?w=400", thumbnail_status="unavailable")],
                 price=3500,
                 bulk_price=3000,
                 min_bulk_quantity=5,
@@ -141,7 +143,8 @@ def seed_data():
             Product(
                 business_id=businesses[0].vendor_id,
                 name="Ladies Casual Blouse",
-                description="Comfortable and stylish casual blouse. Image: https://images.unsplash.com/photo-1583496661160-fb5886a0aaaa?w=400",
+                description="Comfortable and stylish casual blouse.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1583496661160-fb5886a0aaaa?w=400", thumbnail_status="unavailable")],
                 price=1200,
                 bulk_price=1000,
                 min_bulk_quantity=10,
@@ -151,7 +154,8 @@ def seed_data():
             Product(
                 business_id=businesses[0].vendor_id,
                 name="Men's Formal Suit",
-                description="Premium quality formal suit for men. Image: https://images.unsplash.com/photo-1507679799987-c73779587ccf?w=400",
+                description="Premium quality formal suit for men.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1507679799987-c73779587ccf?w=400", thumbnail_status="unavailable")],
                 price=8500,
                 stock_quantity=15,
                 category_id=1
@@ -159,7 +163,8 @@ def seed_data():
             Product(
                 business_id=businesses[0].vendor_id,
                 name="Women's Maxi Dress",
-                description="Flowing maxi dress in vibrant colors. Image: https://images.unsplash.com/photo-1572804013309-59a88b7e92f1?w=400",
+                description="Flowing maxi dress in vibrant colors.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1572804013309-59a88b7e92f1?w=400", thumbnail_status="unavailable")],
                 price=2800,
                 bulk_price=2500,
                 min_bulk_quantity=8,
@@ -169,7 +174,8 @@ def seed_data():
             Product(
                 business_id=businesses[0].vendor_id,
                 name="Men's Casual Shirt",
-                description="Cotton casual shirt for everyday wear. Image: https://images.unsplash.com/photo-1596755094514-f87e34085b2c?w=400",
+                description="Cotton casual shirt for everyday wear.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1596755094514-f87e34085b2c?w=400", thumbnail_status="unavailable")],
                 price=1500,
                 bulk_price=1300,
                 min_bulk_quantity=10,
@@ -181,7 +187,8 @@ def seed_data():
             Product(
                 business_id=businesses[1].vendor_id,
                 name="Ladies High Heels",
-                description="Elegant high heels for special occasions. Image: https://images.unsplash.com/photo-1543163521-1bf539c55dd2?w=400",
+                description="Elegant high heels for special occasions.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1543163521-1bf539c55dd2?w=400", thumbnail_status="unavailable")],
                 price=3200,
                 bulk_price=2800,
                 min_bulk_quantity=6,
@@ -191,7 +198,8 @@ def seed_data():
             Product(
                 business_id=businesses[1].vendor_id,
                 name="Men's Leather Shoes",
-                description="Premium leather formal shoes. Image: https://images.unsplash.com/photo-1614252235316-8c857d38b5f4?w=400",
+                description="Premium leather formal shoes.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1614252235316-8c857d38b5f4?w=400", thumbnail_status="unavailable")],
                 price=4500,
                 stock_quantity=18,
                 category_id=2
@@ -199,7 +207,8 @@ def seed_data():
             Product(
                 business_id=businesses[1].vendor_id,
                 name="Ladies Sandals",
-                description="Comfortable summer sandals. Image: https://images.unsplash.com/photo-1603487742131-4160ec999306?w=400",
+                description="Comfortable summer sandals.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1603487742131-4160ec999306?w=400", thumbnail_status="unavailable")],
                 price=1800,
                 bulk_price=1500,
                 min_bulk_quantity=10,
@@ -209,7 +218,8 @@ def seed_data():
             Product(
                 business_id=businesses[1].vendor_id,
                 name="Men's Sneakers",
-                description="Sporty and comfortable sneakers. Image: https://images.unsplash.com/photo-1542291026-7eec264c27ff?w=400",
+                description="Sporty and comfortable sneakers.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1542291026-7eec264c27ff?w=400", thumbnail_status="unavailable")],
                 price=3800,
                 stock_quantity=25,
                 category_id=2
@@ -217,7 +227,8 @@ def seed_data():
             Product(
                 business_id=businesses[1].vendor_id,
                 name="Ladies Boots",
-                description="Stylish ankle boots. Image: https://images.unsplash.com/photo-1605812860427-4024433a70fd?w=400",
+                description="Stylish ankle boots.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1605812860427-4024433a70fd?w=400", thumbnail_status="unavailable")],
                 price=4200,
                 stock_quantity=12,
                 category_id=2
@@ -227,7 +238,8 @@ def seed_data():
             Product(
                 business_id=businesses[2].vendor_id,
                 name="Luxury French Perfume",
-                description="Exquisite long-lasting fragrance. Image: https://images.unsplash.com/photo-1541643600914-78b084683601?w=400",
+                description="Exquisite long-lasting fragrance.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1541643600914-78b084683601?w=400", thumbnail_status="unavailable")],
                 price=5500,
                 stock_quantity=30,
                 category_id=3
@@ -235,7 +247,8 @@ def seed_data():
             Product(
                 business_id=businesses[2].vendor_id,
                 name="Arabian Oud Perfume",
-                description="Traditional Arabian oud fragrance. Image: https://images.unsplash.com/photo-1592945403244-b3fbafd7f539?w=400",
+                description="Traditional Arabian oud fragrance.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1592945403244-b3fbafd7f539?w=400", thumbnail_status="unavailable")],
                 price=6200,
                 stock_quantity=20,
                 category_id=3
@@ -243,7 +256,8 @@ def seed_data():
             Product(
                 business_id=businesses[2].vendor_id,
                 name="Floral Body Spray",
-                description="Fresh floral scent body spray. Image: https://images.unsplash.com/photo-1588405748880-12d1d2a59926?w=400",
+                description="Fresh floral scent body spray.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1588405748880-12d1d2a59926?w=400", thumbnail_status="unavailable")],
                 price=1200,
                 bulk_price=1000,
                 min_bulk_quantity=12,
@@ -253,7 +267,8 @@ def seed_data():
             Product(
                 business_id=businesses[2].vendor_id,
                 name="Men's Cologne",
-                description="Masculine and sophisticated cologne. Image: https://images.unsplash.com/photo-1585386959984-a4155224a1ad?w=400",
+                description="Masculine and sophisticated cologne.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1585386959984-a4155224a1ad?w=400", thumbnail_status="unavailable")],
                 price=3800,
                 stock_quantity=25,
                 category_id=3
@@ -261,7 +276,8 @@ def seed_data():
             Product(
                 business_id=businesses[2].vendor_id,
                 name="Unisex Perfume Set",
-                description="Set of 3 unisex perfumes. Image: https://images.unsplash.com/photo-1563170351-be82bc888aa4?w=400",
+                description="Set of 3 unisex perfumes.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1563170351-be82bc888aa4?w=400", thumbnail_status="unavailable")],
                 price=4500,
                 stock_quantity=15,
                 category_id=3
@@ -271,7 +287,8 @@ def seed_data():
             Product(
                 business_id=businesses[3].vendor_id,
                 name="Gold Plated Necklace",
-                description="Beautiful gold plated necklace. Image: https://images.unsplash.com/photo-1599643478518-a784e5dc4c8f?w=400",
+                description="Beautiful gold plated necklace.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1599643478518-a784e5dc4c8f?w=400", thumbnail_status="unavailable")],
                 price=2800,
                 stock_quantity=35,
                 category_id=4
@@ -279,7 +296,8 @@ def seed_data():
             Product(
                 business_id=businesses[3].vendor_id,
                 name="Ladies Handbag",
-                description="Genuine leather handbag. Image: https://images.unsplash.com/photo-1584917865442-de89df76afd3?w=400",
+                description="Genuine leather handbag.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1584917865442-de89df76afd3?w=400", thumbnail_status="unavailable")],
                 price=3500,
                 bulk_price=3000,
                 min_bulk_quantity=5,
@@ -289,7 +307,8 @@ def seed_data():
             Product(
                 business_id=businesses[3].vendor_id,
                 name="Fashion Sunglasses",
-                description="Trendy UV protection sunglasses. Image: https://images.unsplash.com/photo-1572635196237-14b3f281503f?w=400",
+                description="Trendy UV protection sunglasses.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1572635196237-14b3f281503f?w=400", thumbnail_status="unavailable")],
                 price=1500,
                 bulk_price=1200,
                 min_bulk_quantity=10,
@@ -299,7 +318,8 @@ def seed_data():
             Product(
                 business_id=businesses[3].vendor_id,
                 name="Silver Earrings",
-                description="Elegant silver earrings. Image: https://images.unsplash.com/photo-1535632066927-ab7c9ab60908?w=400",
+                description="Elegant silver earrings.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1535632066927-ab7c9ab60908?w=400", thumbnail_status="unavailable")],
                 price=1800,
                 stock_quantity=40,
                 category_id=4
@@ -307,7 +327,8 @@ def seed_data():
             Product(
                 business_id=businesses[3].vendor_id,
                 name="Designer Watch",
-                description="Luxury designer watch. Image: https://images.unsplash.com/photo-1523170335258-f5ed11844a49?w=400",
+                description="Luxury designer watch.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1523170335258-f5ed11844a49?w=400", thumbnail_status="unavailable")],
                 price=8500,
                 stock_quantity=10,
                 category_id=4
@@ -315,7 +336,8 @@ def seed_data():
             Product(
                 business_id=businesses[3].vendor_id,
                 name="Leather Belt",
-                description="Premium leather belt. Image: https://images.unsplash.com/photo-1624222247344-550fb60583c2?w=400",
+                description="Premium leather belt.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1624222247344-550fb60583c2?w=400", thumbnail_status="unavailable")],
                 price=1200,
                 bulk_price=1000,
                 min_bulk_quantity=15,
@@ -327,7 +349,8 @@ def seed_data():
             Product(
                 business_id=businesses[4].vendor_id,
                 name="Denim Jacket",
-                description="Trendy denim jacket for all seasons. Image: https://images.unsplash.com/photo-1551028719-00167b16eac5?w=400",
+                description="Trendy denim jacket for all seasons.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1551028719-00167b16eac5?w=400", thumbnail_status="unavailable")],
                 price=3200,
                 stock_quantity=20,
                 category_id=1
@@ -335,7 +358,8 @@ def seed_data():
             Product(
                 business_id=businesses[4].vendor_id,
                 name="Sports Cap",
-                description="Comfortable sports cap. Image: https://images.unsplash.com/photo-1588850561407-ed78c282e89b?w=400",
+                description="Comfortable sports cap.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1588850561407-ed78c282e89b?w=400", thumbnail_status="unavailable")],
                 price=800,
                 bulk_price=650,
                 min_bulk_quantity=20,
@@ -345,7 +369,8 @@ def seed_data():
             Product(
                 business_id=businesses[4].vendor_id,
                 name="Wallet",
-                description="Genuine leather wallet. Image: https://images.unsplash.com/photo-1627123424574-724758594e93?w=400",
+                description="Genuine leather wallet.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1627123424574-724758594e93?w=400", thumbnail_status="unavailable")],
                 price=1500,
                 stock_quantity=35,
                 category_id=4
@@ -353,7 +378,8 @@ def seed_data():
             Product(
                 business_id=businesses[4].vendor_id,
                 name="Fashion Scarf",
-                description="Silk fashion scarf. Image: https://images.unsplash.com/photo-1601924994987-69e26d50dc26?w=400",
+                description="Silk fashion scarf.",
+                images=[ProductImage(source_url="https://images.unsplash.com/photo-1601924994987-69e26d50dc26?w=400", thumbnail_status="unavailable")],
                 price=1200,
                 bulk_price=1000,
                 min_bulk_quantity=12,
@@ -448,6 +474,10 @@ def seed_data():
         db.session.commit()
         
         print("Order items seeded successfully!")
+
+        rebuild_rollups(db.session.connection())
+        bump_versions(db.session, [ROLLUPS_BUILT])
+        db.session.commit()
         
         print("=" * 50)
         print("Database seeding completed successfully!")
@@ -0,0 +1,140 @@
+# server/serializers.py
+
+import time
+
+from flask import request, abort, make_response
+
+from metrics import add_serialization_time
+from admin import admin_denied
+
+PROFILES = ("summary", "detail", "admin")
+NESTED_PROFILE = "summary"
+MAX_EXPAND_DEPTH = 3
+
+
+class SerializationError(ValueError):
+    pass
+
+
+def _split(value):
+    if not value:
+        return ()
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+def profile_fields(model, profile):
+    if profile not in PROFILES:
+        raise SerializationError(f"profile must be one of: {', '.join(PROFILES)}")
+    if profile == "admin":
+        hidden = getattr(model, "serialize_hidden", ())
+        return tuple(attr.key for attr in model.__mapper__.column_attrs if attr.key not in hidden)
+    return model.serialize_profiles[profile]
+
+
+def expansion_tree(expand):
+    tree = {}
+    for path in expand:
+        parts = path.split(".")
+        if len(parts) > MAX_EXPAND_DEPTH:
+            raise SerializationError(f"expand '{path}' is nested too deeply")
+        node = tree
+        for part in parts:
+            node = node.setdefault(part, {})
+    return tree
+
+
+class Serialization:
+    """Serializes a model through a named profile.
+
+    Only the profile's columns are emitted; relationships are walked (and
+    lazily loaded) only when they are named in ``expand``, e.g.
+    ``expand=("order_items.product",)``.
+    """
+
+    def __init__(self, model, profile="summary", fields=None, expand=()):
+        self.model = model
+        self.profile = profile
+        self.tree = expansion_tree(expand)
+
+        columns = profile_fields(model, profile)
+        if fields:
+            unknown = [field for field in fields if field not in columns]
+            if unknown:
+                raise SerializationError(f"Unknown field(s) for {profile} profile: {', '.join(unknown)}")
+            columns = tuple(field for field in columns if field in fields)
+        self.fields = columns
+
+        self.only = columns + self._expanded_fields(model, self.tree, "")
+
+    def _expanded_fields(self, model, tree, prefix):
+        only = ()
+        relationships = model.__mapper__.relationships
+        for name, subtree in tree.items():
+            if name not in relationships:
+                raise SerializationError(f"Cannot expand '{prefix}{name}'")
+            target = relationships[name].mapper.class_
+            path = f"{prefix}{name}."
+            only += tuple(path + field for field in profile_fields(target, NESTED_PROFILE))
+            only += self._expanded_fields(target, subtree, path)
+        return only
+
+    @classmethod
+    def from_request(cls, model, default_profile="summary"):
+        profile = request.args.get("profile", default_profile)
+        # every column, so only for callers holding the admin token
+        if profile == "admin":
+            denied = admin_denied()
+            if denied is not None:
+                abort(denied)
+        try:
+            return cls(
+                model,
+                profile=profile,
+                fields=_split(request.args.get("fields")),
+                expand=_split(request.args.get("expand")),
+            )
+        except SerializationError as e:
+            abort(make_response({"error": str(e)}, 400))
+
+    def __call__(self, obj):
+        start = time.perf_counter()
+        try:
+            return obj.to_dict(only=self.only)
+        finally:
+            add_serialization_time(time.perf_counter() - start)
+
+    @property
+    def projectable(self):
+        # expanded relationships need the entities; plain columns do not
+        return not self.tree
+
+    def project(self, query, key_column):
+        """Turn ``query`` into a SELECT of just this profile's columns.
+
+        Returns the new query and a serializer for its rows. Rows skip the
+        identity map and to_dict(); the JSON provider formats their Decimal
+        and datetime values the same way to_dict() does. ``key_column`` is
+        selected as well (for pagination cursors) but not emitted.
+        """
+        columns = [getattr(self.model, field) for field in self.fields]
+        if key_column.key not in self.fields:
+            columns.append(key_column)
+        return query.with_entities(*columns), self.row
+
+    def row(self, row):
+        start = time.perf_counter()
+        try:
+            # zip stops at the profile fields, leaving out an extra cursor key
+            return dict(zip(self.fields, row))
+        finally:
+            add_serialization_time(time.perf_counter() - start)
+
+
+_default_serializations = {}
+
+
+def serialize(obj, profile="detail"):
+    key = (type(obj), profile)
+    if key not in _default_serializations:
+        _default_serializations[key] = Serialization(type(obj), profile)
+    return _default_serializations[key](obj)
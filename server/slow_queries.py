@@ -0,0 +1,166 @@
+# server/slow_queries.py
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger("market_mtaani.slow_queries")
+logger.propagate = False
+
+MAX_PARAMETER_LENGTH = 200
+SENSITIVE_PARAMETERS = ("password",)
+# statements EXPLAIN cannot or should not be run on
+UNEXPLAINED_PREFIXES = ("EXPLAIN", "PRAGMA", "ANALYZE", "VACUUM", "BEGIN", "COMMIT", "ROLLBACK",
+                        "SAVEPOINT", "RELEASE", "CREATE", "DROP", "ALTER")
+
+
+def _parameter(name, value):
+    if any(word in str(name).lower() for word in SENSITIVE_PARAMETERS):
+        return "***"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    value = str(value)
+    if len(value) > MAX_PARAMETER_LENGTH:
+        return value[:MAX_PARAMETER_LENGTH] + "..."
+    return value
+
+
+def _parameters(context, parameters, executemany):
+    # compiled_parameters carries the bind names, which lets secrets be masked
+    compiled = getattr(context, "compiled_parameters", None) if context is not None else None
+    if compiled:
+        rows = compiled
+    elif isinstance(parameters, dict):
+        rows = [parameters]
+    elif executemany:
+        rows = [dict(enumerate(row)) for row in parameters]
+    else:
+        rows = [dict(enumerate(parameters or ()))]
+    cleaned = [{str(name): _parameter(name, value) for name, value in row.items()} for row in rows[:5]]
+    if executemany:
+        return {"rows": len(rows), "first": cleaned}
+    return cleaned[0] if cleaned else {}
+
+
+def explain(dbapi_connection, dialect, statement, parameters, executemany):
+    """Return the plan for ``statement`` as a list of lines, or None."""
+    if statement.lstrip().upper().startswith(UNEXPLAINED_PREFIXES):
+        return None
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+
+    cursor = dbapi_connection.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        if dialect == "postgresql":
+            # ANALYZE executes the statement again, so only do it for reads,
+            # and inside a savepoint so a failure leaves the transaction intact
+            analyze = "ANALYZE " if statement.lstrip().upper().startswith(("SELECT", "WITH")) else ""
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN {analyze}{statement}", parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return plan
+        return None
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+def _entry(statement, parameters, context, executemany, duration, plan):
+    entry = {
+        "time": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "duration_ms": round(duration * 1000, 3),
+        "statement": statement,
+        "parameters": _parameters(context, parameters, executemany),
+        "endpoint": None,
+        "plan": plan,
+    }
+    if has_request_context():
+        entry["endpoint"] = request.endpoint
+        entry["method"] = request.method
+        entry["path"] = request.path
+    return entry
+
+
+def init_slow_query_log(app):
+    """Log statements slower than ``SLOW_QUERY_THRESHOLD_MS`` as JSON lines.
+
+    Each entry has the SQL, its (masked) parameters, the Flask endpoint that
+    ran it and, with ``SLOW_QUERY_EXPLAIN``, the database's query plan.
+    """
+    threshold = app.config.get("SLOW_QUERY_THRESHOLD_MS")
+    if threshold is None:
+        return
+    threshold = threshold / 1000
+    capture_plan = app.config.get("SLOW_QUERY_EXPLAIN", True)
+
+    path = app.config.get("SLOW_QUERY_LOG") or os.path.join(app.instance_path, "slow_queries.log")
+    app.config["SLOW_QUERY_LOG"] = path
+    if not any(getattr(handler, "baseFilename", None) == os.path.abspath(path) for handler in logger.handlers):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=app.config.get("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024),
+                                      backupCount=app.config.get("SLOW_QUERY_LOG_BACKUPS", 5))
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_slow_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def log_slow_query(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if duration < threshold:
+            return
+        plan = None
+        if capture_plan:
+            plan = explain(cursor.connection, engine.dialect.name, statement, parameters, executemany)
+        logger.info(json.dumps(_entry(statement, parameters, context, executemany, duration, plan), default=str))
+
+    @event.listens_for(engine, "handle_error")
+    def drop_slow_query_timer(context):
+        starts = context.connection.info.get("slow_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def read_entries(path, limit=100, endpoint=None, min_ms=None):
+    """Return the newest log entries first, reading rotated files as needed."""
+    entries = []
+    files = [path] + [f"{path}.{n}" for n in range(1, 100)]
+    for name in files:
+        if not os.path.exists(name):
+            break
+        with open(name, encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if endpoint and entry.get("endpoint") != endpoint:
+                continue
+            if min_ms is not None and entry["duration_ms"] < min_ms:
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                return entries
+    return entries
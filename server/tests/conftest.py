@@ -0,0 +1,57 @@
+# server/tests/conftest.py
+
+import pytest
+
+from app import create_app
+from caching import response_cache
+from config import Config
+from models import db, User, Business, Customer, Product
+from pricing import tier_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        JOB_WORKERS = 0
+        IMAGE_WORKERS = 0
+        SLOW_QUERY_THRESHOLD_MS = None
+        IMAGE_STORAGE = str(tmp_path / "images")
+
+    # the caches live in the process and are keyed by table versions, which
+    # restart at the same numbers in every fresh database
+    response_cache.clear()
+    tier_cache.version = None
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        seed(db.session)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed(session):
+    """Two vendors with five products each and one customer of each type."""
+    for number in (1, 2):
+        user = User(full_name=f"Vendor {number}", email=f"vendor{number}@example.com", password="secret1",
+                    role="vendor", status="active")
+        business = Business(user=user, business_name=f"Duka {number}", verification_status="verified")
+        session.add(business)
+        for index in range(5):
+            session.add(Product(business=business, name=f"Product {number}-{index}", description="Fresh",
+                                price=100 + index, bulk_price=90 + index, min_bulk_quantity=10,
+                                stock_quantity=5))
+    for number, customer_type in enumerate(("RETAILER", "WHOLESALER"), start=1):
+        user = User(full_name=f"Customer {number}", email=f"customer{number}@example.com", password="secret1",
+                    role="customer", status="active")
+        session.add(Customer(user=user, customer_type=customer_type))
+    session.commit()
@@ -0,0 +1,27 @@
+# server/tests/test_admin.py
+
+import pytest
+
+
+@pytest.fixture
+def production(app):
+    app.config.update(TESTING=False, DEBUG=True)
+    return app
+
+
+def test_admin_is_closed_without_a_token_outside_tests(production, client):
+    assert client.get("/admin/slow_queries").status_code == 403
+    assert client.get("/products?profile=admin").status_code == 403
+    assert client.get("/products?profile=detail").status_code == 200
+
+
+def test_admin_needs_the_configured_token(production, client):
+    production.config["ADMIN_TOKEN"] = "s3cret"
+    assert client.get("/products/1?profile=admin").status_code == 403
+    assert client.get("/products/1?profile=admin", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    assert client.get("/products/1?profile=admin", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_tests_reach_admin_without_a_token(client):
+    assert client.get("/products?profile=admin").status_code == 200
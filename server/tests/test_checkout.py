@@ -0,0 +1,80 @@
+# server/tests/test_checkout.py
+
+from models import db, Product, StockReservation
+
+
+def stock(app, product_id):
+    with app.app_context():
+        quantity = db.session.get(Product, product_id).stock_quantity
+        db.session.remove()
+        return quantity
+
+
+def checkout(client, product_id, quantity, customer_id=1):
+    return client.post("/checkout", json={
+        "customer_id": customer_id,
+        "items": [{"product_id": product_id, "quantity": quantity}],
+    })
+
+
+def test_checkout_reserves_stock(app, client):
+    response = checkout(client, 1, 2)
+    assert response.status_code == 201, response.get_json()
+    order = response.get_json()
+    assert [item["product_id"] for item in order["order_items"]] == [1]
+    assert stock(app, 1) == 3
+
+    with app.app_context():
+        reservations = StockReservation.query.filter_by(order_id=order["order_id"]).all()
+        assert [(r.product_id, r.quantity, r.status) for r in reservations] == [(1, 2, "held")]
+
+
+def test_oversold_checkout_is_a_conflict_and_reserves_nothing(app, client):
+    response = client.post("/checkout", json={
+        "customer_id": 1,
+        "items": [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 6}],
+    })
+    assert response.status_code == 409
+    assert stock(app, 1) == 5
+    assert stock(app, 2) == 5
+    with app.app_context():
+        assert StockReservation.query.count() == 0
+
+
+def test_second_checkout_for_the_last_units_is_a_conflict(app, client):
+    assert checkout(client, 3, 4).status_code == 201
+    assert checkout(client, 3, 2, customer_id=2).status_code == 409
+    assert checkout(client, 3, 1, customer_id=2).status_code == 201
+    assert stock(app, 3) == 0
+
+
+def test_cancelling_releases_the_reservation_once(app, client):
+    order_id = checkout(client, 4, 3).get_json()["order_id"]
+    for _ in range(2):
+        response = client.patch(f"/orders/{order_id}", json={"order_status": "cancelled"})
+        assert response.status_code == 200
+        assert stock(app, 4) == 5
+
+
+def test_order_item_quantity_increase_beyond_stock_is_a_conflict(app, client):
+    item_id = checkout(client, 5, 2).get_json()["order_items"][0]["order_item_id"]
+    response = client.patch(f"/order_items/{item_id}", json={"quantity": 8})
+    assert response.status_code == 409
+    assert stock(app, 5) == 3
+
+    assert client.patch(f"/order_items/{item_id}", json={"quantity": 5}).status_code == 200
+    assert stock(app, 5) == 0
+
+
+def test_closed_order_takes_no_new_items(app, client):
+    cancelled = checkout(client, 1, 1).get_json()
+    client.patch(f"/orders/{cancelled['order_id']}", json={"order_status": "cancelled"})
+    completed = checkout(client, 2, 1).get_json()
+    client.patch(f"/orders/{completed['order_id']}", json={"order_status": "completed"})
+
+    for order in (cancelled, completed):
+        response = client.post("/order_items", json={"order_id": order["order_id"], "product_id": 3, "quantity": 2})
+        assert response.status_code == 409
+        item_id = order["order_items"][0]["order_item_id"]
+        assert client.patch(f"/order_items/{item_id}", json={"quantity": 3}).status_code == 409
+    assert (stock(app, 1), stock(app, 2), stock(app, 3)) == (5, 4, 5)
@@ -0,0 +1,89 @@
+# server/tests/test_orders.py
+
+from sqlalchemy import select
+
+from jobs import jobs
+from models import db
+from notifications import queue_order_confirmation
+
+
+def place_order(client, product_id=1, quantity=1):
+    response = client.post("/checkout", json={
+        "customer_id": 1,
+        "items": [{"product_id": product_id, "quantity": quantity}],
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["order_id"]
+
+
+def confirmation_jobs(app):
+    with app.app_context():
+        return db.session.execute(
+            select(jobs.c.idempotency_key).where(jobs.c.task == "order_confirmation")
+        ).scalars().all()
+
+
+# ============================================
+# Status transitions
+# ============================================
+def test_invalid_transition_is_a_conflict(client):
+    order_id = place_order(client)
+    assert client.patch(f"/orders/{order_id}", json={"order_status": "completed"}).status_code == 200
+    response = client.patch(f"/orders/{order_id}", json={"order_status": "pending"})
+    assert response.status_code == 409
+    assert client.get(f"/orders/{order_id}").get_json()["order_status"] == "completed"
+
+
+def test_shipped_order_cannot_be_cancelled(client):
+    order_id = place_order(client)
+    assert client.patch(f"/orders/{order_id}", json={"delivery_status": "shipped"}).status_code == 200
+    assert client.patch(f"/orders/{order_id}", json={"order_status": "cancelled"}).status_code == 409
+
+
+def test_bulk_status_reports_every_order(client):
+    order_ids = [place_order(client) for _ in range(3)]
+    client.patch(f"/orders/{order_ids[0]}", json={"order_status": "confirmed"})
+
+    response = client.patch("/orders/status", json={
+        "order_ids": order_ids + [999], "order_status": "confirmed",
+    })
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report["applied"], report["unchanged"], report["not_found"]) == (2, 1, [999])
+
+
+# ============================================
+# Jobs
+# ============================================
+def test_confirmation_is_queued_once_per_order(app, client):
+    order_id = place_order(client)
+    client.patch(f"/orders/{order_id}", json={"order_status": "confirmed"})
+    with app.app_context():
+        queue_order_confirmation(db.session, order_id)
+        db.session.commit()
+    assert confirmation_jobs(app) == [f"order_confirmation:{order_id}"]
+
+
+def test_new_order_never_reuses_a_deleted_orders_id(app, client):
+    first = place_order(client)
+    assert client.delete(f"/orders/{first}").status_code == 200
+    second = place_order(client)
+    assert second != first
+    assert sorted(confirmation_jobs(app)) == sorted(f"order_confirmation:{i}" for i in (first, second))
+
+
+# ============================================
+# Events
+# ============================================
+def test_events_follow_an_order(client):
+    order_id = place_order(client)
+    client.patch(f"/orders/{order_id}", json={"order_status": "confirmed"})
+
+    feed = client.get(f"/events?order_id={order_id}").get_json()
+    actions = [(event["entity"], event["action"]) for event in feed["events"]]
+    assert actions[:2] == [("order", "created"), ("order_item", "created")]
+    assert actions[-1] == ("order", "updated")
+    assert feed["events"][-1]["data"] == {"order_status": "confirmed"}
+    assert feed["next"] == feed["events"][-1]["seq"]
+
+    assert client.get(f"/events?after={feed['next']}").get_json()["events"] == []
@@ -0,0 +1,34 @@
+# server/tests/test_pagination.py
+
+
+def test_keyset_pages_cover_every_row_once(client):
+    seen = []
+    url = "/products?limit=4"
+    while url:
+        page = client.get(url).get_json()
+        seen.extend(product["product_id"] for product in page["data"])
+        url = f"/products?limit=4&after={page['next']}" if page["next"] is not None else None
+    assert seen == list(range(1, 11))
+
+
+def test_bad_limit_is_rejected(client):
+    assert client.get("/products?limit=-1").status_code == 400
+    assert client.get("/products?after=abc").status_code == 400
+
+
+def test_unchanged_list_answers_304(client):
+    response = client.get("/products")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    assert client.get("/products", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_write_changes_the_etag(client):
+    etag = client.get("/products").headers["ETag"]
+    assert client.patch("/products/1", json={"price": 150}).status_code == 200
+
+    response = client.get("/products", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert next(p for p in response.get_json() if p["product_id"] == 1)["price"] == "150.00"
@@ -0,0 +1,38 @@
+# server/tests/test_products_bulk.py
+
+import io
+
+CSV = "business_id,name,price,stock_quantity\n1,Sukuma,40,12\n2,Mandazi,10,\n"
+
+
+def upload(client, data, method="post"):
+    return client.open("/products/bulk", method=method.upper(),
+                       data={"file": (io.BytesIO(data), "products.csv")})
+
+
+def test_csv_upload_creates_products(client):
+    response = upload(client, b"\xef\xbb\xbf" + CSV.encode())
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()["created"] == 2
+
+    names = {product["name"]: product["stock_quantity"] for product in client.get("/products").get_json()}
+    assert (names["Sukuma"], names["Mandazi"]) == (12, 0)
+
+
+def test_csv_body_updates_products(client):
+    response = client.patch("/products/bulk", data="product_id,price\n1,120\n", content_type="text/csv")
+    assert response.status_code == 200, response.get_json()
+    assert client.get("/products/1").get_json()["price"] == "120.00"
+
+
+def test_non_utf8_csv_is_rejected(client):
+    response = upload(client, "business_id,name,price\n1,Café,40\n".encode("latin-1"))
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "CSV files must be UTF-8"
+
+
+def test_malformed_csv_is_rejected(client):
+    for method in ("post", "patch"):
+        response = upload(client, b"business_id,name,price\n1," + b"x" * 200000 + b",40\n", method)
+        assert response.status_code == 400
+        assert response.get_json()["error"].startswith("Invalid CSV file")
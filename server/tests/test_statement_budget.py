@@ -0,0 +1,49 @@
+# server/tests/test_statement_budget.py
+
+import pytest
+
+from loaders import StatementBudgetExceeded
+
+# every list endpoint loads its page with a fixed number of statements, so a
+# relationship lazily loaded per row shows up here as a budget overrun
+BUDGET = 3
+
+LIST_URLS = [
+    "/users",
+    "/users?limit=2",
+    "/customers?limit=2",
+    "/products",
+    "/products?limit=3",
+    "/products?limit=3&expand=business",
+    "/products/search?q=Product",
+    "/businesses?limit=2",
+    "/businesses?expand=products",
+    "/orders",
+    "/orders?limit=2",
+    "/orders?expand=order_items.product",
+    "/order_items?limit=5",
+]
+
+
+@pytest.fixture
+def budgeted_client(app, client):
+    for customer_id, product_ids in ((1, (1, 6)), (2, (2, 7, 8))):
+        response = client.post("/checkout", json={
+            "customer_id": customer_id,
+            "items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids],
+        })
+        assert response.status_code == 201, response.get_json()
+    app.config["SQL_STATEMENT_BUDGET"] = BUDGET
+    return client
+
+
+@pytest.mark.parametrize("url", LIST_URLS)
+def test_list_endpoints_stay_within_budget(budgeted_client, url):
+    response = budgeted_client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def test_budget_overrun_fails_the_request(app, client):
+    app.config["SQL_STATEMENT_BUDGET"] = 0
+    with pytest.raises(StatementBudgetExceeded):
+        client.get("/users")
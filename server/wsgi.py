@@ -0,0 +1,11 @@
+# server/wsgi.py
+#
+# Production entrypoint, e.g. from the server directory:
+#   gunicorn -w 4 -b 0.0.0.0:5555 wsgi:app
+#   waitress-serve --port=5555 wsgi:app
+
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG') or 'production')